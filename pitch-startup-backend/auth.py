@@ -1,6 +1,28 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+load_dotenv()
+
+# Argon2 cost parameters; changing them makes old hashes `needs_update`
+ARGON2_SETTINGS = {
+    f"argon2__{name}": int(os.getenv(f"ARGON2_{name.upper()}"))
+    for name in ("time_cost", "memory_cost", "parallelism")
+    if os.getenv(f"ARGON2_{name.upper()}")
+}
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **ARGON2_SETTINGS)
+
+# "thread" works because argon2 releases the GIL; "process" isolates it fully
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 2))
+# hashes running + waiting before new ones are shed with 503
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", HASH_WORKERS * 8))
+PASSWORD_REHASH = os.getenv("PASSWORD_REHASH", "true").lower() in ("1", "true")
 
 
 def hash_password(password: str) -> str:
@@ -9,3 +31,77 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify, and return a fresh hash if the stored one uses stale parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# ------------------------------
+# EVENT-LOOP FRIENDLY WRAPPERS
+# ------------------------------
+
+_executor = None
+_pending = 0
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=HASH_WORKERS, thread_name_prefix="argon2"
+            )
+    return _executor
+
+
+async def _run_hashing(fn, *args):
+    global _pending
+    if _pending >= HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, try again",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Returns (valid, new_hash); new_hash is only set when PASSWORD_REHASH is on."""
+    if PASSWORD_REHASH:
+        return await _run_hashing(verify_and_update, plain_password, hashed_password)
+    valid = await _run_hashing(verify_password, plain_password, hashed_password)
+    return valid, None
+
+
+def hashing_stats() -> dict:
+    return {
+        "executor": HASH_EXECUTOR,
+        "workers": HASH_WORKERS,
+        "pending": _pending,
+        "max_pending": HASH_MAX_PENDING,
+    }
+
+
+def shutdown_hash_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,5 +1,7 @@
 import os
+import time
 
+from cache import MISSING, LRUCache
 from database import users_collection
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
@@ -11,14 +13,38 @@ from models import UserInDB
 
 load_dotenv()
 
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = os.getenv("ALGORITHM")
+
+AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() in ("1", "true")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# access token -> email, each entry lives until the token expires
+token_cache = LRUCache(
+    maxsize=(
+        int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10_000)) if AUTH_CACHE_ENABLED else 0
+    ),
+    ttl=0,
+)
+# email -> UserInDB, short-lived and invalidated on writes to the user
+user_cache = LRUCache(
+    maxsize=int(os.getenv("AUTH_USER_CACHE_SIZE", 10_000)) if AUTH_CACHE_ENABLED else 0,
+    ttl=float(os.getenv("AUTH_USER_CACHE_TTL", 30)),
+)
+
+
+def invalidate_user(email: str):
+    user_cache.invalidate(email)
+
+
+def _decode_email(token: str) -> str:
+    email = token_cache.get(token)
+    if email is not MISSING:
+        return email
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        payload = jwt.decode(
-            token, os.getenv("SECRET_KEY"), algorithms=[os.getenv("ALGORITHM")]
-        )
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
 
         if email is None:
@@ -27,6 +53,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(token, email, ttl=expires_in)
+    return email
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    email = _decode_email(token)
+
+    user = user_cache.get(email)
+    if user is not MISSING:
+        return user
+
     # find user in DB
     user = await users_collection.find_one({"email": email})
     if user is None:
@@ -34,4 +73,5 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 
     user["_id"] = str(user["_id"])
     user = UserInDB(**user)
+    user_cache.set(email, user)
     return user
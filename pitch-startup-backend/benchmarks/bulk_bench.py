@@ -0,0 +1,108 @@
+"""Ingestion throughput: one request per record vs the bulk endpoints.
+
+Run from pitch-startup-backend/ against a THROWAWAY MongoDB (it writes to
+the app's database), e.g. `docker run --rm -p 27017:27017 mongo`:
+
+    python -m benchmarks.bulk_bench --mongo-url mongodb://localhost:27017 --records 2000
+
+The app is driven in-process through httpx's ASGI transport, so the numbers
+are app + database time without real network overhead on the client side.
+Requires httpx.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+
+def make_pitch(i: int) -> dict:
+    return {
+        "title": f"Bulk pitch {i}",
+        "description": "A benchmark pitch for bulk ingestion",
+        "category": random.choice(["AI", "FinTech", "HealthTech", "CleanTech"]),
+        "pitch": "Lorem ipsum " * 50,
+        "funding_goal": 100_000,
+    }
+
+
+async def bench(records: int, chunk: int):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as c:
+        email = f"bench{random.randrange(10**9)}@example.com"
+        await c.post(
+            "/api/register",
+            json={"email": email, "full_name": "Bench", "password": "secret123"},
+        )
+        login = await c.post(
+            "/api/login", json={"email": email, "password": "secret123"}
+        )
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        pitches = [make_pitch(i) for i in range(records)]
+
+        start = time.perf_counter()
+        ids = []
+        for pitch in pitches:
+            response = await c.post("/api/startups", json=pitch, headers=headers)
+            ids.append(response.json()["id"])
+        report("pitches, per item", records, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(records):
+            await c.post(
+                f"/api/startups/{ids[i % len(ids)]}/invest",
+                json={"amount": 10 + i % 90},
+                headers=headers,
+            )
+        report("investments, per item", records, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        bulk_ids = []
+        for i in range(0, records, chunk):
+            response = await c.post(
+                "/api/startups/bulk", json=pitches[i : i + chunk], headers=headers
+            )
+            bulk_ids += [r["id"] for r in response.json()["results"] if "id" in r]
+        report("pitches, bulk", records, time.perf_counter() - start)
+
+        investments = [
+            {"startup_id": bulk_ids[i % len(bulk_ids)], "amount": 10 + i % 90}
+            for i in range(records)
+        ]
+        start = time.perf_counter()
+        for i in range(0, records, chunk):
+            await c.post(
+                "/api/investments/bulk",
+                json=investments[i : i + chunk],
+                headers=headers,
+            )
+        report("investments, bulk", records, time.perf_counter() - start)
+
+
+def report(label: str, records: int, elapsed: float):
+    rate = records / elapsed
+    print(f"{label:<22} {records:>7} records  {elapsed:7.2f}s  {rate:9.0f} rec/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument(
+        "--chunk", type=int, default=1000, help="records per bulk request"
+    )
+    args = parser.parse_args()
+
+    # database.py reads MONGO_URL when it is first imported
+    os.environ["MONGO_URL"] = args.mongo_url
+    asyncio.run(bench(args.records, args.chunk))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Peak RSS of exporting N investments: materialized JSON array vs streaming.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.export_bench --rows 1000000
+
+Each mode runs in a fresh subprocess so ru_maxrss is its own peak.
+"list" is what get_*_investments did before pagination: to_list(None) and
+one JSON array. "ndjson"/"csv" drain exports.stream_investments. Without
+--mongo-url the cursor is an in-memory generator of synthetic rows (no
+network or BSON decoding); with it a throwaway collection is seeded and read
+through Motor.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+BASE = datetime(2024, 1, 1)
+
+
+def make_investment(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": f"user{i % 5000}",
+        "startup_id": str(ObjectId()),
+        "amount": float(100 + i % 900),
+        "invested_at": BASE + timedelta(seconds=i),
+    }
+
+
+class FakeCursor:
+    """Just enough of a Motor cursor: rows are generated as they're read."""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for i in range(self.rows):
+            if i % 1000 == 0:
+                await asyncio.sleep(0)
+            yield make_investment(i)
+
+    async def to_list(self, length):
+        return [doc async for doc in self]
+
+    async def close(self):
+        pass
+
+
+class FakeCollection:
+    def __init__(self, rows: int):
+        self.rows = rows
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self.rows)
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+async def run(mode: str, collection) -> int:
+    from exports import stream_investments
+
+    sent = 0
+    if mode == "list":
+        docs = await collection.find({}).to_list(None)
+        for doc in docs:
+            doc["_id"] = str(doc["_id"])
+        sent = len(json.dumps(docs, default=str))
+    else:
+        async for chunk in stream_investments(ConnectedRequest(), collection, {}, mode):
+            sent += len(chunk)
+    return sent
+
+
+async def seed(mongo_url: str, rows: int):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    collection = AsyncIOMotorClient(mongo_url)["export_bench"]["investments"]
+    await collection.drop()
+    for start in range(0, rows, 10_000):
+        await collection.insert_many(
+            [make_investment(i) for i in range(start, min(rows, start + 10_000))]
+        )
+
+
+def child(mode: str, rows: int, mongo_url: str | None):
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        collection = AsyncIOMotorClient(mongo_url)["export_bench"]["investments"]
+    else:
+        collection = FakeCollection(rows)
+
+    start = time.perf_counter()
+    sent = asyncio.run(run(mode, collection))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"sent": sent, "seconds": elapsed, "peak_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", default=["list", "ndjson", "csv"])
+    parser.add_argument("--mongo-url")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.rows, args.mongo_url)
+        return
+
+    if args.mongo_url:
+        asyncio.run(seed(args.mongo_url, args.rows))
+
+    for mode in args.modes:
+        cmd = [sys.executable, "-m", "benchmarks.export_bench", "--child", mode]
+        cmd += ["--rows", str(args.rows)]
+        if args.mongo_url:
+            cmd += ["--mongo-url", args.mongo_url]
+        result = json.loads(subprocess.check_output(cmd).decode().splitlines()[-1])
+        print(
+            f"{mode:<7} rows {args.rows:>9,}  peak RSS {result['peak_mb']:8.1f} MB"
+            f"  {result['seconds']:6.2f}s  {result['sent'] / 1e6:8.1f} MB sent"
+        )
+
+
+if __name__ == "__main__":
+    main()
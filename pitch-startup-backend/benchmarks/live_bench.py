@@ -0,0 +1,122 @@
+"""How many live (SSE) subscribers one worker sustains.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.live_bench --subscribers 1000 5000 10000 20000
+
+Every subscriber runs the real SSE generator from live.py (coalescing queue
+and event formatting included) and follows one of --startups startups;
+a publisher sends --rate funding events per second for --seconds. Sockets
+are left out, so this is the bus and encoding cost on the event loop.
+Delivery latency is measured from the latest publish of a startup to the
+moment its subscriber's generator yields the chunk. One worker keeps up
+while p99 stays well below a second and the loop isn't saturated.
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+
+import live
+from bson import ObjectId
+
+
+async def consume(stream, startup_id, published_at, latencies):
+    async for _ in stream:
+        sent = published_at.get(startup_id)
+        if sent is not None:
+            latencies.append(time.perf_counter() - sent)
+
+
+async def run(subscribers: int, startups: int, rate: int, seconds: float) -> dict:
+    bus = live.live_bus = live.LiveBus(max_subscribers=subscribers)
+    ids = [str(ObjectId()) for _ in range(startups)]
+    published_at, latencies = {}, []
+
+    gc.collect()
+    tracemalloc.start()
+    tasks = []
+    for i in range(subscribers):
+        startup_id = ids[i % startups]
+        subscription = bus.subscribe({startup_id})
+        snapshot = {"type": "snapshot", "startup_id": startup_id, "investment_count": 0}
+        stream = live._stream(subscription, [snapshot])
+        tasks.append(
+            asyncio.create_task(consume(stream, startup_id, published_at, latencies))
+        )
+    await asyncio.sleep(0.1)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    latencies.clear()
+
+    rng = random.Random(0)
+    counts = dict.fromkeys(ids, 0)
+    interval = 1 / rate
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    sent = 0
+    while (now := time.perf_counter()) - start < seconds:
+        # catch up on any events the loop was too busy to send on time
+        due = int((now - start) / interval) + 1
+        for _ in range(due - sent):
+            startup_id = rng.choice(ids)
+            counts[startup_id] += 1
+            published_at[startup_id] = time.perf_counter()
+            bus.publish(
+                {
+                    "type": "funding",
+                    "startup_id": startup_id,
+                    "total_funded": counts[startup_id] * 10.0,
+                    "funding_goal": 100_000.0,
+                    "investment_count": counts[startup_id],
+                    "status": "pending",
+                }
+            )
+        sent = due
+        await asyncio.sleep(interval)
+    await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    return {
+        "subscribers": subscribers,
+        "events": sent,
+        "deliveries_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+        "cpu": cpu / elapsed,
+        "kib_per_subscriber": memory / subscribers / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--subscribers", type=int, nargs="+", default=[1000, 5000, 10000, 20000]
+    )
+    parser.add_argument("--startups", type=int, default=200)
+    parser.add_argument("--rate", type=int, default=200, help="events per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    for n in args.subscribers:
+        r = asyncio.run(run(n, args.startups, args.rate, args.seconds))
+        print(
+            f"{r['subscribers']:>7} subscribers  {r['events']:>6} events"
+            f"  {r['deliveries_per_s']:9.0f} deliveries/s"
+            f"  p50 {r['p50_ms']:7.2f} ms  p99 {r['p99_ms']:7.2f} ms"
+            f"  cpu {r['cpu'] * 100:5.1f}%  {r['kib_per_subscriber']:.1f} KiB/sub"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,639 @@
+"""Load test every route in routes.py against a local database stand-in.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.load_test --output before.json
+    # ...change something...
+    python -m benchmarks.load_test --output after.json --baseline before.json
+
+By default the app runs against mongomock-motor, an in-memory fake of Motor
+(`pip install mongomock-motor`). It has no indexes, so absolute numbers are
+pessimistic for anything that scans; use it to compare commits, not to
+size production. With --mongo-url the app uses that server instead. The
+app's collections on it are DROPPED before seeding, so only point it at a
+throwaway mongod, e.g. `docker run --rm -p 27017:27017 mongo`.
+
+The dataset is synthetic and seeded (--seed): users, pitches with Zipf-like
+prose bodies, and investments whose startups follow a power law (a few
+startups get most of the money) spread over the last --days days. Every
+route is then driven by --concurrency async clients through httpx's ASGI
+transport, and throughput plus p50/p95/p99 latency per route are printed
+and written as JSON. Requests shed by admission control (429/503) are
+counted separately and left out of both. Per-IP rate limits are off, since
+every client comes from the same address. Requires httpx.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import types
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from benchmarks.search_bench import CATEGORIES, make_pitch, make_vocabulary
+
+PASSWORD = "secret123"
+
+
+# ------------------------------
+# DATABASE STAND-IN
+# ------------------------------
+
+
+def use_database(mongo_url: str | None) -> str:
+    """Point database.py at the stand-in. Must run before the app is imported."""
+    # every simulated client shares 127.0.0.1, so the per-IP login and
+    # register buckets would turn those scenarios into 429s
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    load_dotenv()
+    # routes.py needs these at import time; .env wins if it has them
+    os.environ.setdefault("SECRET_KEY", "load-test-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+
+    if mongo_url:
+        os.environ["MONGO_URL"] = mongo_url
+        return "mongod"
+
+    # explain() isn't supported by the fake
+    os.environ["INDEX_PLAN_CHECK"] = "off"
+    import database
+    from benchmarks.stand_in import mongomock_client
+
+    database.connect(mongomock_client())
+    return "mongomock"
+
+
+# ------------------------------
+# SYNTHETIC DATA
+# ------------------------------
+
+
+async def seed(args, rng: random.Random) -> dict:
+    """Insert the dataset straight into the collections; returns what routes need."""
+    import database
+    from auth import hash_password
+    from indexes import ensure_indexes
+    from rollups import rebuild_rollups
+    from timeseries import backfill
+
+    for name, value in vars(database).items():
+        if name.endswith("_collection"):
+            await value.drop()
+    await ensure_indexes()
+
+    now = datetime.utcnow()
+    hashed = hash_password(PASSWORD)  # one Argon2 hash shared by every user
+    users = [
+        {
+            "email": f"user{i}@loadtest.example",
+            "full_name": f"Load Test User {i}",
+            "hashed_password": hashed,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(args.users)
+    ]
+    await database.users_collection.insert_many(users)
+    user_ids = [str(u["_id"]) for u in users]
+
+    vocabulary = make_vocabulary(rng)
+    weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+    )
+    startups = []
+    for i in range(args.pitches):
+        created = now - timedelta(days=rng.uniform(0, args.days))
+        startups.append(
+            {
+                **make_pitch(rng, vocabulary, weights),
+                "image_url": None,
+                "video_url": None,
+                "funding_goal": float(rng.choice([50_000, 100_000, 250_000])),
+                "user_id": rng.choice(user_ids),
+                "created_at": created,
+                "updated_at": created,
+                "total_funded": 0,
+                "status": "pending",
+            }
+        )
+    await database.startups_collection.insert_many(startups)
+    startup_ids = [str(s["_id"]) for s in startups]
+
+    # power law: the k-th most popular startup gets ~1/k^1.2 of the investments
+    popularity = list(
+        itertools.accumulate(1 / rank**1.2 for rank in range(1, len(startup_ids) + 1))
+    )
+    investments = [
+        {
+            "user_id": rng.choice(user_ids),
+            "startup_id": startup_id,
+            "amount": round(rng.lognormvariate(7, 1.2), 2),
+            "invested_at": now - timedelta(days=rng.uniform(0, args.days)),
+        }
+        for startup_id in rng.choices(
+            startup_ids, cum_weights=popularity, k=args.investments
+        )
+    ]
+    for start in range(0, len(investments), 10_000):
+        await database.investments_collection.insert_many(
+            investments[start : start + 10_000]
+        )
+    await rebuild_rollups()
+    await backfill()
+
+    return {
+        "emails": [u["email"] for u in users],
+        "user_ids": user_ids,
+        "startup_ids": startup_ids,
+        "words": rng.sample(vocabulary[:2_000], 50),
+        # request bodies for the write scenarios
+        "pitch_bodies": [
+            {**make_pitch(rng, vocabulary, weights), "funding_goal": 100_000.0}
+            for _ in range(20)
+        ],
+    }
+
+
+# ------------------------------
+# SCENARIOS
+# ------------------------------
+
+SCENARIOS = {}
+
+
+def scenario(name: str, expect=(200,)):
+    """Register `fn(client, ctx, rng) -> response` as the driver for a route."""
+
+    def register(fn):
+        SCENARIOS[name] = (fn, expect)
+        return fn
+
+    return register
+
+
+def auth(ctx, rng):
+    return rng.choice(ctx["headers"])
+
+
+async def first_event(app, url: str):
+    """GET an event stream straight through the ASGI app, hanging up after
+    the first chunk. httpx's ASGITransport waits for the whole body, which an
+    event stream never finishes."""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"host", b"loadtest")],
+        "client": ("127.0.0.1", 0),
+        "server": ("loadtest", 80),
+    }
+    received = asyncio.Event()
+    response = types.SimpleNamespace(status_code=None)
+
+    async def receive():
+        await received.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.status_code = message["status"]
+        elif message.get("body") or not message.get("more_body"):
+            received.set()
+
+    await app(scope, receive, send)
+    return response
+
+
+@scenario("POST /api/register")
+async def _(c, ctx, rng):
+    email = f"new{next(ctx['counter'])}@loadtest.example"
+    return await c.post(
+        "/api/register",
+        json={"email": email, "full_name": "New User", "password": PASSWORD},
+    )
+
+
+@scenario("POST /api/login")
+async def _(c, ctx, rng):
+    email = rng.choice(ctx["emails"])
+    return await c.post("/api/login", json={"email": email, "password": PASSWORD})
+
+
+@scenario("POST /api/refresh")
+async def _(c, ctx, rng):
+    cookie = rng.choice(ctx["refresh_tokens"])
+    return await c.post("/api/refresh", headers={"Cookie": f"refresh_token={cookie}"})
+
+
+@scenario("POST /api/logout")
+async def _(c, ctx, rng):
+    return await c.post("/api/logout")
+
+
+@scenario("GET /api/users/{user_id}/profile")
+async def _(c, ctx, rng):
+    user_id = rng.choice(ctx["user_ids"])
+    return await c.get(f"/api/users/{user_id}/profile?expand=startup")
+
+
+@scenario("GET /api/dashboard")
+async def _(c, ctx, rng):
+    return await c.get("/api/dashboard?expand=startup", headers=auth(ctx, rng))
+
+
+@scenario("POST /api/startups")
+async def _(c, ctx, rng):
+    body = rng.choice(ctx["pitch_bodies"])
+    return await c.post("/api/startups", json=body, headers=auth(ctx, rng))
+
+
+@scenario("POST /api/startups/bulk")
+async def _(c, ctx, rng):
+    body = rng.choices(ctx["pitch_bodies"], k=50)
+    return await c.post("/api/startups/bulk", json=body, headers=auth(ctx, rng))
+
+
+@scenario("GET /api/startups")
+async def _(c, ctx, rng):
+    response = await c.get("/api/startups")
+    # follow the cursor a couple of pages half of the time
+    for _ in range(rng.choice([0, 0, 1, 2])):
+        cursor = response.json().get("next_cursor")
+        if not cursor:
+            break
+        response = await c.get(f"/api/startups?cursor={cursor}")
+    return response
+
+
+@scenario("GET /api/users/{user_id}/startups")
+async def _(c, ctx, rng):
+    return await c.get(f"/api/users/{rng.choice(ctx['user_ids'])}/startups")
+
+
+@scenario("GET /api/startups/trending")
+async def _(c, ctx, rng):
+    return await c.get("/api/startups/trending")
+
+
+@scenario("GET /api/startups/top-funded")
+async def _(c, ctx, rng):
+    return await c.get("/api/startups/top-funded")
+
+
+@scenario("GET /api/startups/{startup_id}")
+async def _(c, ctx, rng):
+    return await c.get(f"/api/startups/{rng.choice(ctx['startup_ids'])}")
+
+
+@scenario("GET /api/startups/{startup_id}/similar")
+async def _(c, ctx, rng):
+    return await c.get(f"/api/startups/{rng.choice(ctx['startup_ids'])}/similar")
+
+
+@scenario("GET /api/startups/{startup_id}/live")
+async def _(c, ctx, rng):
+    startup_id = rng.choice(ctx["startup_ids"])
+    return await first_event(ctx["app"], f"/api/startups/{startup_id}/live")
+
+
+@scenario("GET /api/startups/live")
+async def _(c, ctx, rng):
+    ids = ",".join(rng.sample(ctx["startup_ids"], 20))
+    return await first_event(ctx["app"], f"/api/startups/live?ids={ids}")
+
+
+@scenario("PUT /api/startups/{startup_id}")
+async def _(c, ctx, rng):
+    index = rng.randrange(len(ctx["headers"]))
+    startup_id = rng.choice(ctx["owned"][index])
+    body = {**rng.choice(ctx["pitch_bodies"]), "title": f"Updated {rng.random()}"}
+    return await c.put(
+        f"/api/startups/{startup_id}", json=body, headers=ctx["headers"][index]
+    )
+
+
+@scenario("DELETE /api/startups/{startup_id}")
+async def _(c, ctx, rng):
+    startup_id = ctx["deletable"].pop()
+    return await c.delete(f"/api/startups/{startup_id}", headers=ctx["headers"][0])
+
+
+@scenario("POST /api/startups/{startup_id}/invest")
+async def _(c, ctx, rng):
+    startup_id = rng.choice(ctx["startup_ids"])
+    return await c.post(
+        f"/api/startups/{startup_id}/invest",
+        json={"amount": round(rng.uniform(10, 5000), 2)},
+        headers=auth(ctx, rng),
+    )
+
+
+@scenario("POST /api/investments/bulk")
+async def _(c, ctx, rng):
+    body = [
+        {"startup_id": rng.choice(ctx["startup_ids"]), "amount": 25} for _ in range(50)
+    ]
+    return await c.post("/api/investments/bulk", json=body, headers=auth(ctx, rng))
+
+
+@scenario("GET /api/users/{user_id}/investments")
+async def _(c, ctx, rng):
+    user_id = rng.choice(ctx["user_ids"])
+    return await c.get(f"/api/users/{user_id}/investments?expand=startup")
+
+
+@scenario("GET /api/startups/{startup_id}/investments")
+async def _(c, ctx, rng):
+    return await c.get(f"/api/startups/{rng.choice(ctx['startup_ids'])}/investments")
+
+
+@scenario("GET /api/users/{user_id}/investments/export")
+async def _(c, ctx, rng):
+    user_id = rng.choice(ctx["user_ids"])
+    return await c.get(f"/api/users/{user_id}/investments/export?format=csv")
+
+
+@scenario("GET /api/startups/{startup_id}/investments/export")
+async def _(c, ctx, rng):
+    startup_id = rng.choice(ctx["startup_ids"])
+    return await c.get(f"/api/startups/{startup_id}/investments/export")
+
+
+@scenario("GET /api/startups/{startup_id}/analytics")
+async def _(c, ctx, rng):
+    return await c.get(f"/api/startups/{rng.choice(ctx['startup_ids'])}/analytics")
+
+
+@scenario("GET /api/startups/{startup_id}/analytics/timeseries")
+async def _(c, ctx, rng):
+    startup_id = rng.choice(ctx["startup_ids"])
+    resolution = rng.choice(["hour", "day"])
+    return await c.get(
+        f"/api/startups/{startup_id}/analytics/timeseries?resolution={resolution}"
+    )
+
+
+@scenario("GET /api/search")
+async def _(c, ctx, rng):
+    q = " ".join(rng.sample(ctx["words"], rng.choice([1, 1, 2])))
+    if rng.random() < 0.3:
+        q = q[: max(2, len(q) - 2)]  # typed prefix
+    params = {"q": q}
+    if rng.random() < 0.3:
+        params["category"] = rng.choice(CATEGORIES)
+    return await c.get("/api/search", params=params)
+
+
+@scenario("GET /api/categories")
+async def _(c, ctx, rng):
+    return await c.get("/api/categories")
+
+
+@scenario("GET /api/cache/stats")
+async def _(c, ctx, rng):
+    return await c.get("/api/cache/stats")
+
+
+@scenario("GET /metrics")
+async def _(c, ctx, rng):
+    return await c.get("/metrics")
+
+
+@scenario("GET /healthz")
+async def _(c, ctx, rng):
+    return await c.get("/healthz")
+
+
+@scenario("GET /readyz")
+async def _(c, ctx, rng):
+    return await c.get("/readyz")
+
+
+# ------------------------------
+# RUNNER
+# ------------------------------
+
+
+def percentile(samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))]
+
+
+# admission control turning requests away; counted apart from errors and
+# left out of the latencies, which would otherwise measure the rejections
+SHED = (429, 503)
+
+
+async def drive(c, fn, expect, ctx, rng, requests: int, concurrency: int) -> dict:
+    latencies, errors, shed = [], {}, {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await fn(c, ctx, rng)
+                status = response.status_code
+            except Exception as exc:
+                status = type(exc).__name__
+            if status in SHED and status not in expect:
+                shed[str(status)] = shed.get(str(status), 0) + 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status not in expect:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latencies) or [0.0]
+    return {
+        "requests": requests,
+        "errors": errors,
+        "shed": shed,
+        # served requests only
+        "throughput_rps": round((requests - sum(shed.values())) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def prepare(c, app, data: dict, args, rng) -> dict:
+    """Log some users in and set up per-scenario state."""
+    from similar import similar_index
+
+    ctx = {
+        **data,
+        "app": app,
+        "counter": itertools.count(),
+        "headers": [],
+        "refresh_tokens": [],
+    }
+    for email in data["emails"][: args.sessions]:
+        response = await c.post(
+            "/api/login", json={"email": email, "password": PASSWORD}
+        )
+        ctx["headers"].append(
+            {"Authorization": f"Bearer {response.json()['access_token']}"}
+        )
+        ctx["refresh_tokens"].append(response.cookies["refresh_token"])
+
+    # startups each logged-in user owns, for update; and a pool to delete
+    ctx["owned"] = []
+    for headers in ctx["headers"]:
+        response = await c.post(
+            "/api/startups", json=ctx["pitch_bodies"][0], headers=headers
+        )
+        ctx["owned"].append([response.json()["id"]])
+    ctx["deletable"] = []
+    for _ in range(args.requests + args.warmup):
+        response = await c.post(
+            "/api/startups", json=ctx["pitch_bodies"][0], headers=ctx["headers"][0]
+        )
+        ctx["deletable"].append(response.json()["id"])
+
+    # the similar-pitches index builds in the background after startup
+    while not similar_index.built:
+        await asyncio.sleep(0.1)
+    return ctx
+
+
+async def run(args) -> dict:
+    import database
+    import httpx
+    from main import app
+
+    # seeding runs before the app starts; the lifespan keeps this client
+    database.connect()
+    rng = random.Random(args.seed)
+    seed_start = time.perf_counter()
+    data = await seed(args, rng)
+    seed_seconds = time.perf_counter() - seed_start
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://loadtest", timeout=None
+    ) as c:
+        ctx = await prepare(c, app, data, args, rng)
+        for name, (fn, expect) in SCENARIOS.items():
+            if args.routes and not any(r in name for r in args.routes):
+                continue
+            if args.warmup:
+                await drive(c, fn, expect, ctx, rng, args.warmup, args.concurrency)
+            results[name] = await drive(
+                c, fn, expect, ctx, rng, args.requests, args.concurrency
+            )
+            print(format_row(name, results[name]), file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "backend": args.backend,
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "dataset": {
+                "users": args.users,
+                "pitches": args.pitches,
+                "investments": args.investments,
+                "days": args.days,
+            },
+            "requests_per_route": args.requests,
+            "concurrency": args.concurrency,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "routes": results,
+    }
+
+
+# ------------------------------
+# REPORTING
+# ------------------------------
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_row(name: str, r: dict) -> str:
+    errors = f"  errors {r['errors']}" if r["errors"] else ""
+    if r.get("shed"):
+        errors += f"  shed {r['shed']}"
+    return (
+        f"{name:<52} {r['throughput_rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f}"
+        f"  p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms{errors}"
+    )
+
+
+def compare(report: dict, baseline: dict):
+    print(f"\nvs baseline {baseline['meta'].get('commit')}:", file=sys.stderr)
+    for name, r in report["routes"].items():
+        old = baseline["routes"].get(name)
+        if not old:
+            continue
+        deltas = [
+            f"{key.split('_')[0]} {100 * (r[key] - old[key]) / old[key]:+6.1f}%"
+            for key in ("throughput_rps", "p50_ms", "p99_ms")
+            if old[key]
+        ]
+        print(f"{name:<52} " + "  ".join(deltas), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", help="throwaway mongod; default is in-memory")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--pitches", type=int, default=2_000)
+    parser.add_argument("--investments", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--sessions", type=int, default=20, help="logged-in users")
+    parser.add_argument("--requests", type=int, default=200, help="per route")
+    parser.add_argument("--warmup", type=int, default=10, help="per route, unmeasured")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--routes", nargs="*", help="only routes containing these")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    args = parser.parse_args()
+
+    args.backend = use_database(args.mongo_url)
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Latency of an unrelated endpoint while a login storm is running.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.login_storm_bench --logins 200 --concurrency 8
+
+A minimal app exposes /ping and two login variants, one verifying Argon2
+inline on the event loop (the old behaviour) and one going through
+verify_password_async. /ping is probed sequentially for the duration of each
+storm and its p50/p99 reported. Logins beyond HASH_MAX_PENDING are shed
+with 503, so raise --concurrency past it to see load shedding. Requires httpx.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from auth import hash_password, verify_password, verify_password_async
+from fastapi import FastAPI, HTTPException
+
+HASHED = hash_password("secret123")
+PROBE_INTERVAL = 0.005
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+@app.post("/login-inline")
+async def login_inline():
+    if not verify_password("secret123", HASHED):
+        raise HTTPException(status_code=400)
+    return {"ok": True}
+
+
+@app.post("/login-offload")
+async def login_offload():
+    valid, _ = await verify_password_async("secret123", HASHED)
+    if not valid:
+        raise HTTPException(status_code=400)
+    return {"ok": True}
+
+
+async def probe(client, stop: asyncio.Event) -> list[float]:
+    # measured from when the probe was due, so event-loop stalls count
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        await client.get("/ping")
+        samples.append(time.perf_counter() - start - PROBE_INTERVAL)
+    return samples
+
+
+async def storm(client, path: str | None, logins: int, concurrency: int):
+    statuses = {}
+    queue = asyncio.Queue()
+    for _ in range(logins):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            response = await client.post(path)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(client, stop))
+    start = time.perf_counter()
+    if path is None:
+        await asyncio.sleep(1)
+    else:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    samples = sorted(await prober)
+
+    p50 = statistics.median(samples) * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    return p50, p99, elapsed, statuses
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for label, path in (
+            ("idle", None),
+            ("inline argon2", "/login-inline"),
+            ("offloaded argon2", "/login-offload"),
+        ):
+            p50, p99, elapsed, statuses = await storm(
+                c, path, args.logins, args.concurrency
+            )
+            print(
+                f"{label:<17} /ping p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+                f"  storm {elapsed:5.2f}s  statuses {statuses}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Cost of metrics.py: per-request middleware overhead and per-command listener cost.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.metrics_bench --requests 20000
+
+The middleware is measured around a trivial ASGI app (no network, no
+routing), so the difference between the two columns is all metrics code.
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import metrics
+
+
+async def trivial_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(app, requests: int) -> float:
+    route = SimpleNamespace(path="/api/startups/{startup_id}")
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "route": route}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def listener_round(n: int) -> float:
+    listener = metrics.MongoCommandListener()
+    reply = {"cursor": {"firstBatch": [{}] * 20}}
+    start = time.perf_counter()
+    for i in range(n):
+        started = SimpleNamespace(
+            command_name="find",
+            command={"find": "startup_pitch"},
+            connection_id=1,
+            request_id=i,
+        )
+        listener.started(started)
+        listener.succeeded(
+            SimpleNamespace(
+                command_name="find",
+                connection_id=1,
+                request_id=i,
+                duration_micros=800,
+                reply=reply,
+            )
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.requests
+
+    bare = asyncio.run(drive(trivial_app, n))
+    wrapped = asyncio.run(drive(metrics.MetricsMiddleware(trivial_app), n))
+    per_request = (wrapped - bare) / n * 1e6
+    print(
+        f"middleware   bare {bare / n * 1e6:6.2f} us  with metrics"
+        f" {wrapped / n * 1e6:6.2f} us  overhead {per_request:5.2f} us/request"
+    )
+
+    print(f"listener     {listener_round(n) / n * 1e6:6.2f} us/command")
+
+    # a scrape with ~30 routes x 3 statuses and ~40 collection/command pairs
+    for r in range(30):
+        for status in (200, 400, 404):
+            metrics.http_request_duration.observe(("GET", f"/r{r}", status), 0.01)
+    for c in range(40):
+        metrics.mongo_command_duration.observe((f"c{c}", "find", "ok"), 0.001)
+    start = time.perf_counter()
+    body = metrics.render()
+    elapsed = time.perf_counter() - start
+    print(f"render       {elapsed * 1000:6.2f} ms for {len(body) // 1024} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Wire bytes and serialization time for card lists, full documents vs CARD_PROJECTION.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.projection_bench --cards 100
+
+"Mongo bytes" is the BSON size of the documents the driver receives.
+"before" is what the search/trending/top-funded routes used to do with full
+documents (jsonable_encoder + json.dumps, pitch included); "after" is the
+projected documents validated and dumped through the card response model.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import random
+import time
+
+import bson
+from fastapi.encoders import jsonable_encoder
+from models import StartUpPitchCard
+from projections import CARD_PROJECTION
+from pydantic import TypeAdapter
+
+from benchmarks.search_bench import make_pitch, make_vocabulary
+
+
+def make_docs(count: int) -> list[dict]:
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(rng, 5_000)
+    weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+    )
+    now = datetime.datetime.utcnow()
+    docs = []
+    for _ in range(count):
+        doc = make_pitch(rng, vocabulary, weights)
+        doc.update(
+            {
+                "_id": bson.ObjectId(),
+                "user_id": str(bson.ObjectId()),
+                "image_url": "https://example.com/cover.png",
+                "video_url": None,
+                "funding_goal": 100_000.0,
+                "total_funded": rng.random() * 100_000,
+                "status": "pending",
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        docs.append(doc)
+    return docs
+
+
+def project(doc: dict) -> dict:
+    return {key: value for key, value in doc.items() if key in CARD_PROJECTION}
+
+
+def stringify(docs: list[dict]) -> list[dict]:
+    return [{**d, "_id": str(d["_id"])} for d in docs]
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    full = make_docs(args.cards)
+    projected = [project(d) for d in full]
+
+    full_bytes = sum(len(bson.encode(d)) for d in full)
+    projected_bytes = sum(len(bson.encode(d)) for d in projected)
+
+    cards = TypeAdapter(list[StartUpPitchCard])
+    full_str = stringify(full)
+    projected_str = stringify(projected)
+
+    before = timed(lambda: json.dumps(jsonable_encoder(full_str)), args.rounds)
+    after = timed(
+        lambda: cards.dump_json(cards.validate_python(projected_str), by_alias=True),
+        args.rounds,
+    )
+    response_before = len(json.dumps(jsonable_encoder(full_str)))
+    response_after = len(
+        cards.dump_json(cards.validate_python(projected_str), by_alias=True)
+    )
+
+    print(f"{args.cards} cards")
+    print(f"  mongo bytes     full {full_bytes:>10}  projected {projected_bytes:>10}")
+    print(
+        f"  response bytes  full {response_before:>10}  card      {response_after:>10}"
+    )
+    print(f"  serialize ms    full {before:>10.3f}  card      {after:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
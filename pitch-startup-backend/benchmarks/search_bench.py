@@ -0,0 +1,160 @@
+"""Compare /api/search latency: in-process BM25 index vs the $regex path.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.search_bench --sizes 10000 100000
+
+Without --mongo-url the regex path is measured as the same case-insensitive
+unanchored regex evaluated in Python over title/description/pitch of every
+document, which is the per-document work Mongo does for the COLLSCAN (minus
+network and BSON decoding, so it flatters the regex path). With --mongo-url a
+throwaway collection is seeded and the real $regex query is timed.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import re
+import statistics
+import time
+
+from search import SearchIndex
+
+WORDS = (
+    "ai platform health data cloud payments fintech marketplace climate "
+    "energy solar battery logistics robotics education learning students "
+    "crypto wallet security privacy mobile app social network video music "
+    "food delivery farm agriculture water carbon analytics insurance loans "
+    "banking retail fashion travel booking hotel gaming sports fitness "
+    "medical diagnostics genomics biotech drug research quantum chips"
+).split()
+CATEGORIES = ["AI", "FinTech", "HealthTech", "EdTech", "E-commerce", "CleanTech"]
+QUERIES = ["ai", "payments", "solar batt", "health data", "quantum", "deliv", "xyzzy"]
+
+
+def make_vocabulary(rng: random.Random, size: int = 20_000) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    filler = {
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    }
+    vocabulary = sorted(filler)
+    rng.shuffle(vocabulary)
+    # product keywords are mid-frequency terms, not stopwords
+    for word in WORDS:
+        vocabulary.insert(rng.randint(100, 2_000), word)
+    return vocabulary
+
+
+def make_pitch(rng: random.Random, vocabulary: list[str], weights) -> dict:
+    # Zipf-like term frequencies, as in real prose
+    def text(n):
+        return " ".join(rng.choices(vocabulary, cum_weights=weights, k=n))
+
+    return {
+        "title": text(4).title(),
+        "description": text(25),
+        "pitch": text(400),
+        "category": rng.choice(CATEGORIES),
+    }
+
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return p50 * 1000, p99 * 1000
+
+
+def bench(fn, rounds: int) -> tuple[float, float]:
+    samples = []
+    for i in range(rounds):
+        q = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        fn(q)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def regex_scan(docs: list[dict], q: str) -> list[dict]:
+    pattern = re.compile(q, re.IGNORECASE)
+    hits = []
+    for doc in docs:
+        if (
+            pattern.search(doc["title"])
+            or pattern.search(doc["description"])
+            or pattern.search(doc["pitch"])
+        ):
+            hits.append(doc)
+            if len(hits) == 50:
+                break
+    return hits
+
+
+async def bench_mongo(url: str, docs: list[dict], rounds: int):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(url)
+    collection = client["search_bench"]["startup_pitch"]
+    await collection.drop()
+    await collection.insert_many([dict(d) for d in docs])
+
+    samples = []
+    for i in range(rounds):
+        q = QUERIES[i % len(QUERIES)]
+        query = {
+            "$or": [
+                {"title": {"$regex": q, "$options": "i"}},
+                {"description": {"$regex": q, "$options": "i"}},
+                {"pitch": {"$regex": q, "$options": "i"}},
+            ]
+        }
+        start = time.perf_counter()
+        await collection.find(query).limit(50).to_list(50)
+        samples.append(time.perf_counter() - start)
+
+    await client.drop_database("search_bench")
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--mongo-url")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+    )
+    for size in args.sizes:
+        docs = [make_pitch(rng, vocabulary, weights) for _ in range(size)]
+
+        index = SearchIndex()
+        start = time.perf_counter()
+        for i, doc in enumerate(docs):
+            index.add(str(i), doc)
+        build = time.perf_counter() - start
+
+        index_p50, index_p99 = bench(index.search, args.rounds)
+        if args.mongo_url:
+            label = "mongo $regex"
+            regex_p50, regex_p99 = asyncio.run(
+                bench_mongo(args.mongo_url, docs, args.rounds)
+            )
+        else:
+            label = "python regex"
+            regex_p50, regex_p99 = bench(
+                lambda q: regex_scan(docs, q), max(args.rounds // 10, 10)
+            )
+
+        print(f"{size} pitches (index build {build:.1f}s)")
+        print(f"  bm25 index    p50 {index_p50:8.2f} ms  p99 {index_p99:8.2f} ms")
+        print(f"  {label:<13} p50 {regex_p50:8.2f} ms  p99 {regex_p99:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
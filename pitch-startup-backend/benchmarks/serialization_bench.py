@@ -0,0 +1,117 @@
+"""Response serialization throughput: the old per-route path vs serialization.py.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.serialization_bench --rounds 200
+
+"old" is what a route did before: stringify every ObjectId in a loop, then
+either validate and dump through the response model (cards) or run
+jsonable_encoder (investments, no response model), and render with the
+stdlib json module. "trusted" renders
+the raw Mongo documents with serialization.BSONResponse.
+"""
+
+import argparse
+import copy
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from models import StartUpPitchCardPage
+from pydantic import TypeAdapter
+from serialization import orjson, trusted
+
+BASE = datetime(2024, 1, 1)
+CARD_PAGE = TypeAdapter(StartUpPitchCardPage)
+
+
+def make_card(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "title": f"Startup {i}",
+        "description": "Short description of the startup " * 3,
+        "category": "FinTech",
+        "image_url": "https://example.com/image.png",
+        "video_url": None,
+        "funding_goal": 100_000.0,
+        "total_funded": float(i * 37),
+        "status": "pending",
+        "created_at": BASE + timedelta(minutes=i),
+    }
+
+
+def make_investment(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "startup_id": str(ObjectId()),
+        "amount": float(100 + i),
+        "invested_at": BASE + timedelta(seconds=i),
+    }
+
+
+def old_cards(docs: list[dict]) -> bytes:
+    for s in docs:
+        s["_id"] = str(s["_id"])
+        s["user_id"] = str(s["user_id"])
+    # what FastAPI's serialize_response does with a response_model
+    page = CARD_PAGE.validate_python({"items": docs, "next_cursor": None})
+    return JSONResponse(CARD_PAGE.dump_python(page, mode="json", by_alias=True)).body
+
+
+def old_investments(docs: list[dict]) -> bytes:
+    for inv in docs:
+        inv["_id"] = str(inv["_id"])
+        inv["user_id"] = str(inv["user_id"])
+        inv["startup_id"] = str(inv["startup_id"])
+    return JSONResponse(jsonable_encoder({"items": docs, "next_cursor": None})).body
+
+
+def new_cards(docs: list[dict]) -> bytes:
+    return trusted({"items": docs, "next_cursor": None}).body
+
+
+def new_investments(docs: list[dict]) -> bytes:
+    return trusted({"items": docs, "next_cursor": None}).body
+
+
+def timed(fn, docs: list[dict], rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        # the old path mutates its input, so every round gets fresh documents
+        payload = copy.deepcopy(docs)
+        start = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}")
+    for label, docs, old, new in (
+        ("100 cards", [make_card(i) for i in range(100)], old_cards, new_cards),
+        (
+            "1000 investments",
+            [make_investment(i) for i in range(1000)],
+            old_investments,
+            new_investments,
+        ),
+    ):
+        old_t = timed(old, docs, args.rounds)
+        new_t = timed(new, docs, args.rounds)
+        print(
+            f"{label:<17} old {old_t * 1000:7.3f} ms  trusted {new_t * 1000:7.3f} ms"
+            f"  x{old_t / new_t:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
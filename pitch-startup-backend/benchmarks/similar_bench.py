@@ -0,0 +1,105 @@
+"""Build time and memory of the similar-pitches index, and its update costs.
+
+Run from pitch-startup-backend/:
+
+    python -m benchmarks.similar_bench --sizes 10000 100000
+
+Pitches are the synthetic Zipf-distributed ones from search_bench. For
+each size this reports the full rebuild (vectorize + blocked top-K), the
+peak memory traced while building, what the finished index keeps resident
+(matrix, IDF and neighbour table), and per-call latency of the incremental
+add (create/update), add_many (bulk create), remove (delete) and the
+neighbour lookup a request does.
+"""
+
+import argparse
+import gc
+import itertools
+import random
+import time
+import tracemalloc
+
+from benchmarks.search_bench import make_pitch, make_vocabulary, percentiles
+from similar import SimilarIndex
+
+
+def resident_bytes(index: SimilarIndex) -> int:
+    main = index.main
+    arrays = (
+        main.data,
+        main.indices,
+        main.indptr,
+        index.idf,
+        index.alive,
+        index.neighbour_rows,
+        index.neighbour_scores,
+    )
+    return sum(array.nbytes for array in arrays)
+
+
+def timed(fn, args_list) -> tuple[float, float]:
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+    )
+    for size in args.sizes:
+        docs = [(str(i), make_pitch(rng, vocabulary, weights)) for i in range(size)]
+
+        gc.collect()
+        start = time.perf_counter()
+        index = SimilarIndex.build(docs)
+        build = time.perf_counter() - start
+
+        # again under tracemalloc, which slows the Python parts down
+        del index
+        gc.collect()
+        tracemalloc.start()
+        index = SimilarIndex.build(docs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        new = [
+            (f"new{i}", make_pitch(rng, vocabulary, weights))
+            for i in range(args.rounds)
+        ]
+        add_p50, add_p99 = timed(index.add, new)
+        batches = [
+            ([(f"bulk{i}-{j}", doc) for j, (_, doc) in enumerate(new[:100])],)
+            for i in range(5)
+        ]
+        bulk_p50, _ = timed(index.add_many, batches)
+        lookup_p50, lookup_p99 = timed(
+            index.similar, [(str(rng.randrange(size)),) for _ in range(args.rounds)]
+        )
+        remove_p50, remove_p99 = timed(
+            index.remove, [(str(i),) for i in rng.sample(range(size), args.rounds)]
+        )
+
+        print(
+            f"{size} pitches: build {build:.1f}s, peak {peak / 2**20:.0f} MiB,"
+            f" resident {resident_bytes(index) / 2**20:.0f} MiB,"
+            f" {index.main.nnz} nonzeros, {len(index.terms)} terms"
+        )
+        print(f"  add     p50 {add_p50:8.2f} ms  p99 {add_p99:8.2f} ms")
+        print(f"  add_many(100)  {bulk_p50:8.2f} ms")
+        print(f"  remove  p50 {remove_p50:8.2f} ms  p99 {remove_p99:8.2f} ms")
+        print(f"  similar p50 {lookup_p50:8.3f} ms  p99 {lookup_p99:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""mongomock-motor as a stand-in for Motor, for the load test and unit tests.
+
+mongomock-motor is an in-memory fake of Motor (`pip install mongomock-motor`).
+Two of its differences from a server matter to this app and are patched
+here, once per process, by `mongomock_client`.
+"""
+
+_patched = False
+
+
+def _patch():
+    global _patched
+    if _patched:
+        return
+    import mongomock.collection
+    import mongomock_motor
+
+    # mongomock's create_indexes drops partialFilterExpression (which would
+    # make the idempotency-key index reject every second investment) and
+    # rebuilds indexes that already exist, unlike a server
+    def create_indexes(self, indexes, session=None, **kwargs):
+        existing = self.index_information()
+        for index in indexes:
+            spec = dict(index.document)
+            if spec["name"] not in existing:
+                self.create_index(list(spec.pop("key").items()), **spec)
+        return [index.document["name"] for index in indexes]
+
+    mongomock.collection.Collection.create_indexes = create_indexes
+
+    # Motor's cursor.close() is awaitable, the fake's isn't
+    async def close(self):
+        self._AsyncCursor__cursor.close()
+
+    mongomock_motor.AsyncCursor.close = close
+    _patched = True
+
+
+def mongomock_client():
+    """A fresh, empty AsyncMongoMockClient with the patches applied."""
+    import mongomock_motor
+
+    _patch()
+    return mongomock_motor.AsyncMongoMockClient()
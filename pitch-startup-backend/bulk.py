@@ -0,0 +1,180 @@
+"""Bulk ingestion of pitches and investments.
+
+Records arrive as a JSON array or as NDJSON (Content-Type
+application/x-ndjson), are validated one by one, and are written with
+unordered insert_many calls of BULK_CHUNK_SIZE documents. Every record gets
+its own result, so one bad row never fails the batch.
+"""
+
+import asyncio
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from bson import ObjectId
+from database import (
+    investments_collection,
+    startup_investors_collection,
+    startups_collection,
+)
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from rollups import batch_rollup_update
+from timeseries import record_buckets
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 10_000))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+
+DUPLICATE_KEY = 11000
+
+
+async def read_records(request: Request) -> list:
+    """The request body as a list of raw records (JSON array or NDJSON)."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type:
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON/NDJSON")
+
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="Expected an array of records")
+    if len(records) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {BULK_MAX_ITEMS} records per request"
+        )
+    return records
+
+
+def validate_records(records: list, model: type[BaseModel]):
+    """Split records into [(index, model)] and {index: error message}."""
+    valid, errors = [], {}
+    for index, record in enumerate(records):
+        try:
+            valid.append((index, model.model_validate(record)))
+        except ValidationError as exc:
+            errors[index] = "; ".join(
+                f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}"
+                for e in exc.errors()
+            )
+    return valid, errors
+
+
+async def insert_chunked(collection, docs: list[dict]) -> dict[int, str]:
+    """Unordered insert_many in chunks; returns {position in docs: error}."""
+    errors = {}
+    for start in range(0, len(docs), BULK_CHUNK_SIZE):
+        try:
+            await collection.insert_many(
+                docs[start : start + BULK_CHUNK_SIZE], ordered=False
+            )
+        except BulkWriteError as exc:
+            for error in exc.details.get("writeErrors", []):
+                errors[start + error["index"]] = (
+                    "Duplicate idempotency key"
+                    if error.get("code") == DUPLICATE_KEY
+                    else error.get("errmsg", "Write failed")
+                )
+    return errors
+
+
+def bulk_results(size: int, ids: dict[int, str], errors: dict[int, str]) -> dict:
+    results = [
+        {"index": i, "id": ids[i]} if i in ids else {"index": i, "error": errors[i]}
+        for i in range(size)
+    ]
+    return {"inserted": len(ids), "failed": size - len(ids), "results": results}
+
+
+# ------------------------------
+# INVESTMENTS
+# ------------------------------
+
+
+async def ingest_investments(items: list, user_id: str) -> tuple[dict, dict]:
+    """Insert validated BulkInvestmentItems for one investor.
+
+    Returns ({index: error}, {index: inserted investment doc}). total_funded and the
+    funding_stats rollup get one update per startup, however many of the
+    investments went to it, and each funding time-series bucket one upsert.
+    """
+    errors = {}
+    known = set()
+    oids = {item.startup_id for _, item in items if ObjectId.is_valid(item.startup_id)}
+    if oids:
+        async for doc in startups_collection.find(
+            {"_id": {"$in": [ObjectId(sid) for sid in oids]}}, {"_id": 1}
+        ):
+            known.add(str(doc["_id"]))
+
+    indexes, docs = [], []
+    invested_at = datetime.utcnow()
+    for index, item in items:
+        if not ObjectId.is_valid(item.startup_id):
+            errors[index] = "Invalid startup ID"
+            continue
+        if item.startup_id not in known:
+            errors[index] = "Startup not found"
+            continue
+        doc = {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "startup_id": item.startup_id,
+            "amount": item.amount,
+            "invested_at": invested_at,
+        }
+        if item.idempotency_key:
+            doc["idempotency_key"] = item.idempotency_key
+        indexes.append(index)
+        docs.append(doc)
+
+    failed = await insert_chunked(investments_collection, docs)
+    for position, error in failed.items():
+        errors[indexes[position]] = error
+    inserted = {
+        index: doc
+        for position, (index, doc) in enumerate(zip(indexes, docs))
+        if position not in failed
+    }
+    if not inserted:
+        return errors, {}
+
+    by_startup = defaultdict(list)
+    for doc in inserted.values():
+        by_startup[doc["startup_id"]].append(doc)
+
+    # one investor marker per startup; upserted ones are first-time investors
+    startup_ids = list(by_startup)
+    markers = await startup_investors_collection.bulk_write(
+        [
+            UpdateOne(
+                {"startup_id": sid, "user_id": user_id},
+                {"$setOnInsert": {"startup_id": sid, "user_id": user_id}},
+                upsert=True,
+            )
+            for sid in startup_ids
+        ],
+        ordered=False,
+    )
+    new_investor = {startup_ids[i] for i in markers.upserted_ids}
+
+    await asyncio.gather(
+        startups_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": ObjectId(sid)},
+                    batch_rollup_update(invs, 1 if sid in new_investor else 0),
+                )
+                for sid, invs in by_startup.items()
+            ],
+            ordered=False,
+        ),
+        record_buckets(list(inserted.values())),
+    )
+    return errors, inserted
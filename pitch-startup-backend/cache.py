@@ -0,0 +1,127 @@
+import os
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    """Bounded LRU cache with per-entry TTL and negative caching.
+
+    `set_missing` remembers that a key does not exist (for `negative_ttl`
+    seconds), which `get` reports as None, as opposed to MISSING for a key
+    the cache knows nothing about. A `maxsize` of 0 disables the cache.
+    Not thread-safe; every caller runs on the event loop.
+
+    A load that may race a write takes `token()` before reading the source
+    and passes it as `since`; its `set` is dropped if `mark_written` (or
+    `invalidate`) was called for the key in between, so a slow read can't
+    put back what the write replaced.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._clock = 0
+        self._written = OrderedDict()  # key -> clock at its last write
+        self._forgotten = 0  # latest write dropped from _written
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return value
+
+    def peek(self, key):
+        """Live cached value without touching LRU order or counters."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def token(self) -> int:
+        return self._clock
+
+    def mark_written(self, key):
+        self._clock += 1
+        self._written[key] = self._clock
+        self._written.move_to_end(key)
+        while len(self._written) > max(self.maxsize, 1):
+            _, self._forgotten = self._written.popitem(last=False)
+
+    def set(self, key, value, ttl: float | None = None, since: int | None = None):
+        if self.maxsize <= 0:
+            return
+        # a key whose write was forgotten counts as written just then
+        if since is not None and self._written.get(key, self._forgotten) > since:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def set_missing(self, key, since: int | None = None):
+        self.set(key, None, self.negative_ttl, since)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+        self.mark_written(key)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (
+                round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0
+            ),
+        }
+
+
+# Pitch detail documents keyed by startup id (string)
+startup_cache = LRUCache(
+    maxsize=int(os.getenv("STARTUP_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("STARTUP_CACHE_TTL", 60)),
+    negative_ttl=float(os.getenv("STARTUP_CACHE_NEGATIVE_TTL", 10)),
+)
+
+# Startup cards shown on the leaderboard, keyed by startup id (string);
+# total_funded comes from the leaderboard, so only edits invalidate them
+card_cache = LRUCache(
+    maxsize=int(os.getenv("CARD_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("CARD_CACHE_TTL", 300)),
+)
@@ -0,0 +1,162 @@
+"""Conditional GET: ETag / Last-Modified validators and 304 responses.
+
+Details are tagged from the document (`updated_at`, `total_funded`); lists
+from a per-collection version counter that every write to the collection
+bumps. The counter lives in MongoDB so all workers agree on it; readers
+cache it for COLLECTION_VERSION_TTL seconds, so another worker's write can
+take that long to invalidate a list ETag here.
+
+Bumps stay off the write path: each worker increments the shared counter
+in the background, at most once per COLLECTION_VERSION_TTL however many
+writes it saw, and until then tags its own lists with a worker-local
+suffix so its readers see their writes immediately.
+
+A 304 is answered before the response body is built (for lists, before the
+query even runs).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from bson import ObjectId
+from database import collection_versions_collection
+from fastapi import Request, Response
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_VERSION_TTL = float(os.getenv("COLLECTION_VERSION_TTL", 1))
+
+# per route; "no-cache" still lets browsers and CDNs store, but revalidate
+CACHE_CONTROL = {
+    "startup": os.getenv("CACHE_CONTROL_STARTUP", "public, no-cache"),
+    "startups": os.getenv("CACHE_CONTROL_STARTUPS", "public, no-cache"),
+    "categories": os.getenv("CACHE_CONTROL_CATEGORIES", "public, max-age=60"),
+}
+
+
+def make_etag(*parts) -> str:
+    raw = "\x1f".join(str(part) for part in parts).encode()
+    return '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+
+
+def _utc(value: datetime) -> datetime:
+    # Mongo hands back naive datetimes in UTC; HTTP dates have whole seconds
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def validators(route: str, etag: str, last_modified: datetime | None = None):
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL[route]}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    """RFC 9110 evaluation: If-None-Match wins; If-Modified-Since otherwise."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # GET compares weakly, so W/"x" matches "x"
+        return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _utc(last_modified) <= since
+    return False
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+# tells this process's unflushed versions apart from other workers'
+_WORKER = ObjectId()
+
+
+class CollectionVersion:
+    """Change counter for one collection; call bump() after every write to it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = None
+        self.fetched_at = 0.0
+        self.writes = 0  # bumps by this worker, ever
+        self.unflushed = 0  # ...not yet in the shared counter
+        self.flushed_at = 0.0
+        self._flusher = None
+
+    def _remember(self, doc: dict | None):
+        # the epoch changes if the counter document is ever recreated, so
+        # versions never repeat
+        self.value = f"{doc['epoch']}.{doc['version']}" if doc else "0"
+        self.fetched_at = time.monotonic()
+
+    async def current(self) -> str:
+        if (
+            self.value is None
+            or time.monotonic() - self.fetched_at > COLLECTION_VERSION_TTL
+        ):
+            self._remember(
+                await collection_versions_collection.find_one({"_id": self.name})
+            )
+        if self.unflushed:
+            return f"{self.value}+{_WORKER}.{self.writes}"
+        return self.value
+
+    def bump(self):
+        """Count a write; the shared counter catches up in the background."""
+        self.writes += 1
+        self.unflushed += 1
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_soon())
+
+    async def _flush_soon(self):
+        while self.unflushed:
+            wait = self.flushed_at + COLLECTION_VERSION_TTL - time.monotonic()
+            await asyncio.sleep(max(0.0, wait))
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Updating the %s version failed", self.name)
+        self._flusher = None
+
+    async def flush(self):
+        """Increment the shared counter now, covering every bump so far."""
+        covered = self.unflushed
+        self.flushed_at = time.monotonic()
+        self._remember(
+            await collection_versions_collection.find_one_and_update(
+                {"_id": self.name},
+                {"$inc": {"version": 1}, "$setOnInsert": {"epoch": ObjectId()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        )
+        self.unflushed -= covered
+
+    async def close(self):
+        """Flush what is pending now instead of in the background (shutdown)."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self.unflushed:
+            await self.flush()
+
+
+startups_version = CollectionVersion("startup_pitch")
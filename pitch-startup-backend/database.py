@@ -1,12 +1,157 @@
+"""MongoDB client lifecycle and the collections the app uses.
+
+The client is created by `connect()` in the app lifespan (so it lives on the
+server's event loop) and closed by `disconnect()`. Modules import the collection
+names below as usual; each is a stand-in that forwards to the real Motor
+collection once `connect()` has run.
+
+Pool, timeout, compression and read-preference settings come from the
+environment, or from MONGO_URL's options when their env var isn't set.
+`*_read_collection` are for read-heavy routes (lists, search, analytics,
+exports) and go to secondaries when SECONDARY_READS is on.
+"""
+
 import os
+from urllib.parse import parse_qs, urlsplit
 
 from dotenv import load_dotenv
+from metrics import mongo_listener, pool_listener
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import (
+    Nearest,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
 
 load_dotenv()
 
-client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
-db = client["Cluster0"]  # your database name
-users_collection = db["users"]
-startups_collection = db["startup_pitch"]
-investments_collection = db["investments"]
+MONGO_URL = os.getenv("MONGO_URL")
+MONGO_DATABASE = os.getenv("MONGO_DATABASE", "Cluster0")
+
+# option -> (env var, default). A set env var is passed to AsyncIOMotorClient
+# and wins over MONGO_URL; otherwise an option given in MONGO_URL is left to
+# it, and only options set in neither get the default here
+_CLIENT_SETTINGS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", 100),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", 0),
+    # how long a request waits for a free pooled connection
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_MS", 5000),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", 5000),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", 30000),
+    "readPreference": ("MONGO_READ_PREFERENCE", "primary"),
+    # e.g. "zstd,snappy,zlib"; zstd and snappy need their python packages
+    "compressors": ("MONGO_COMPRESSORS", None),
+}
+
+
+def _uri_options(url: str | None) -> dict:
+    """Options in a connection string, keyed by lower-cased name."""
+    query = urlsplit(url or "").query
+    return {key.lower(): values[-1] for key, values in parse_qs(query).items()}
+
+
+def _client_options(url: str | None) -> dict:
+    in_url = _uri_options(url)
+    options = {}
+    for option, (env, default) in _CLIENT_SETTINGS.items():
+        value = os.getenv(env)
+        if value:
+            options[option] = type(default)(value) if default is not None else value
+        elif default is not None and option.lower() not in in_url:
+            options[option] = default
+    return options
+
+
+CLIENT_OPTIONS = _client_options(MONGO_URL)
+MAX_POOL_SIZE = int(
+    CLIENT_OPTIONS.get("maxPoolSize", _uri_options(MONGO_URL).get("maxpoolsize", 100))
+)
+
+SECONDARY_READS = os.getenv("SECONDARY_READS", "false").lower() in ("1", "true")
+SECONDARY_READ_PREFERENCE = {
+    "secondaryPreferred": SecondaryPreferred,
+    "secondary": Secondary,
+    "nearest": Nearest,
+    "primaryPreferred": PrimaryPreferred,
+}[os.getenv("SECONDARY_READ_PREFERENCE", "secondaryPreferred")]
+# -1 leaves staleness unbounded; otherwise at least 90 (a server requirement)
+SECONDARY_MAX_STALENESS = int(os.getenv("SECONDARY_MAX_STALENESS", -1))
+
+client: AsyncIOMotorClient | None = None
+db = None
+
+_collections = []
+
+
+class _Collection:
+    """Forwards everything to the Motor collection bound by connect()."""
+
+    def __init__(self, name: str, secondary: bool = False):
+        self.name = name
+        self.secondary = secondary
+        self._target = None
+        _collections.append(self)
+
+    def bind(self, database):
+        target = database[self.name] if database is not None else None
+        if target is not None and self.secondary and SECONDARY_READS:
+            target = target.with_options(
+                read_preference=SECONDARY_READ_PREFERENCE(
+                    max_staleness=SECONDARY_MAX_STALENESS
+                )
+            )
+        self._target = target
+
+    def __getattr__(self, attr):
+        if self._target is None:
+            raise RuntimeError(
+                f"{self.name}: database not connected, call database.connect()"
+            )
+        return getattr(self._target, attr)
+
+
+users_collection = _Collection("users")
+startups_collection = _Collection("startup_pitch")
+investments_collection = _Collection("investments")
+startup_investors_collection = _Collection("startup_investors")
+trending_checkpoints_collection = _Collection("trending_checkpoints")
+collection_versions_collection = _Collection("collection_versions")
+funding_buckets_collection = _Collection("funding_buckets")
+startups_read_collection = _Collection("startup_pitch", secondary=True)
+investments_read_collection = _Collection("investments", secondary=True)
+funding_buckets_read_collection = _Collection("funding_buckets", secondary=True)
+
+
+def connect(motor_client: AsyncIOMotorClient | None = None) -> AsyncIOMotorClient:
+    """Create the client (or adopt `motor_client`) and bind the collections.
+
+    A no-op when already connected, so a caller can install its own client
+    before the app starts.
+    """
+    global client, db
+    if client is not None:
+        return client
+    client = motor_client or AsyncIOMotorClient(
+        MONGO_URL, event_listeners=[mongo_listener, pool_listener], **CLIENT_OPTIONS
+    )
+    db = client[MONGO_DATABASE]
+    for collection in _collections:
+        collection.bind(db)
+    return client
+
+
+def disconnect():
+    global client, db
+    if client is not None:
+        client.close()
+    client = db = None
+    for collection in _collections:
+        collection.bind(None)
+
+
+def get_client() -> AsyncIOMotorClient:
+    if client is None:
+        raise RuntimeError("database not connected, call database.connect()")
+    return client
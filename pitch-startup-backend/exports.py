@@ -0,0 +1,115 @@
+"""Streaming exports of investment history as NDJSON or CSV.
+
+Rows are read from the Motor cursor in batches of EXPORT_BATCH_SIZE and
+each batch is encoded and sent before the next one is fetched, so memory
+stays constant however many investments match. The export stops (and the
+server-side cursor is killed) as soon as the client goes away.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+EXPORT_FIELDS = ["_id", "user_id", "startup_id", "amount", "invested_at"]
+EXPORT_PROJECTION = {field: 1 for field in EXPORT_FIELDS}
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# what may appear in a Content-Disposition filename; the rest becomes "_"
+UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def naive_utc(value: datetime | None) -> datetime | None:
+    """Query parameters may carry an offset; stored datetimes are naive UTC."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def invested_at_range(since: datetime | None, until: datetime | None) -> dict:
+    """Filter on invested_at for since <= invested_at < until."""
+    since, until = naive_utc(since), naive_utc(until)
+    if since and until and since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    bounds = {}
+    if since:
+        bounds["$gte"] = since
+    if until:
+        bounds["$lt"] = until
+    return {"invested_at": bounds} if bounds else {}
+
+
+def _row(doc: dict) -> list:
+    return [
+        doc["invested_at"].isoformat() if field == "invested_at" else doc.get(field)
+        for field in EXPORT_FIELDS
+    ]
+
+
+def _encode_ndjson(docs: list[dict]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, _row(doc))), default=str) + "\n"
+        for doc in docs
+    )
+
+
+def _encode_csv(docs: list[dict]) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for doc in docs:
+        writer.writerow(_row(doc))
+    return out.getvalue()
+
+
+async def stream_investments(
+    request: Request,
+    collection,
+    query: dict,
+    fmt: str,
+    batch_size: int = EXPORT_BATCH_SIZE,
+):
+    """Yield the matching investments, oldest first, one encoded batch at a time."""
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    if fmt == "csv":
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+
+    cursor = (
+        collection.find(query, EXPORT_PROJECTION)
+        .sort([("invested_at", 1), ("_id", 1)])
+        .batch_size(batch_size)
+    )
+    try:
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) < batch_size:
+                continue
+            if await request.is_disconnected():
+                return
+            yield encode(batch)
+            batch = []
+        if batch:
+            yield encode(batch)
+    finally:
+        await cursor.close()
+
+
+def export_response(
+    request: Request, collection, query: dict, fmt: str, filename: str
+) -> StreamingResponse:
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of: {', '.join(MEDIA_TYPES)}"
+        )
+    filename = UNSAFE_FILENAME_RE.sub("_", f"{filename}.{fmt}")
+    return StreamingResponse(
+        stream_investments(request, collection, query, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,60 @@
+"""Liveness and readiness probes (served at the root, outside /api).
+
+/healthz only says the process is serving requests. /readyz pings MongoDB
+and reports the ping latency and how saturated each connection pool is; it
+answers 503 when the ping fails or times out, or when a pool has every
+connection checked out with requests still queueing for one.
+"""
+
+import asyncio
+import os
+import time
+
+from database import MAX_POOL_SIZE, get_client
+from fastapi import APIRouter
+from metrics import pool_stats
+from serialization import trusted
+
+READYZ_TIMEOUT = float(os.getenv("READYZ_TIMEOUT", 2))
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    max_pool_size = MAX_POOL_SIZE
+    pools = {}
+    saturated = False
+    for address, stats in pool_stats().items():
+        # maxPoolSize=0 means no limit: a pool can't saturate
+        if max_pool_size:
+            stats["saturation"] = round(stats.get("checked_out", 0) / max_pool_size, 3)
+            saturated |= stats["saturation"] >= 1 and stats.get("waiting", 0) > 0
+        else:
+            stats["saturation"] = None
+        pools[address] = stats
+
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(get_client().admin.command("ping"), READYZ_TIMEOUT)
+        ping_ms, error = round((time.perf_counter() - start) * 1000, 2), None
+    except asyncio.TimeoutError:
+        ping_ms, error = None, f"ping timed out after {READYZ_TIMEOUT}s"
+    except Exception as exc:
+        ping_ms, error = None, f"{type(exc).__name__}: {exc}"
+
+    ready = error is None and not saturated
+    body = {
+        "status": "ready" if ready else "unavailable",
+        "ping_ms": ping_ms,
+        "max_pool_size": max_pool_size,
+        "pools": pools,
+    }
+    if error:
+        body["error"] = error
+    return trusted(body, status_code=200 if ready else 503)
@@ -0,0 +1,270 @@
+import logging
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from database import (
+    funding_buckets_collection,
+    investments_collection,
+    startup_investors_collection,
+    startups_collection,
+    users_collection,
+)
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# off    -> skip the explain() self-check
+# warn   -> log every COLLSCAN plan as an error but keep starting
+# strict -> refuse to start if any query shape would COLLSCAN
+INDEX_PLAN_CHECK = os.getenv("INDEX_PLAN_CHECK", "warn").lower()
+
+
+# ------------------------------
+# INDEX DECLARATIONS
+# ------------------------------
+
+INDEXES = [
+    (
+        users_collection,
+        [IndexModel([("email", ASCENDING)], unique=True, name="email_unique")],
+    ),
+    (
+        startups_collection,
+        [
+            IndexModel(
+                [("user_id", ASCENDING), ("_id", DESCENDING)], name="user_id_id"
+            ),
+            IndexModel([("total_funded", DESCENDING)], name="total_funded_desc"),
+            IndexModel(
+                [("category", ASCENDING), ("_id", DESCENDING)], name="category_id"
+            ),
+        ],
+    ),
+    (
+        investments_collection,
+        [
+            IndexModel(
+                [
+                    ("startup_id", ASCENDING),
+                    ("invested_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="startup_id_invested_at_id",
+            ),
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("invested_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="user_id_invested_at_id",
+            ),
+            IndexModel([("invested_at", DESCENDING)], name="invested_at_desc"),
+            # retried invest requests carry the same key and are counted once
+            IndexModel(
+                [("user_id", ASCENDING), ("idempotency_key", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"idempotency_key": {"$exists": True}},
+                name="user_id_idempotency_key_unique",
+            ),
+        ],
+    ),
+    (
+        startup_investors_collection,
+        [
+            IndexModel(
+                [("startup_id", ASCENDING), ("user_id", ASCENDING)],
+                unique=True,
+                name="startup_id_user_id_unique",
+            )
+        ],
+    ),
+    (
+        funding_buckets_collection,
+        [
+            IndexModel(
+                [
+                    ("startup_id", ASCENDING),
+                    ("resolution", ASCENDING),
+                    ("start", ASCENDING),
+                ],
+                unique=True,
+                name="startup_id_resolution_start_unique",
+            )
+        ],
+    ),
+]
+
+
+async def ensure_indexes():
+    """Create every declared index. Already-existing indexes are a no-op."""
+    for collection, models in INDEXES:
+        names = await collection.create_indexes(models)
+        logger.info("Indexes ready on %s: %s", collection.name, ", ".join(names))
+
+
+# ------------------------------
+# QUERY SHAPES (one per query in routes.py)
+# ------------------------------
+
+_SAMPLE_ID = "000000000000000000000000"
+
+QUERY_SHAPES = [
+    {
+        "name": "users by email (register, login, get_current_user)",
+        "collection": users_collection,
+        "filter": {"email": "someone@example.com"},
+    },
+    {
+        "name": "users by _id (profile)",
+        "collection": users_collection,
+        "filter": {"_id": ObjectId(_SAMPLE_ID)},
+    },
+    {
+        "name": "startups by _id (detail, update, delete, invest, analytics)",
+        "collection": startups_collection,
+        "filter": {"_id": ObjectId(_SAMPLE_ID)},
+    },
+    {
+        "name": "startups by user_id (user startups, profile, dashboard)",
+        "collection": startups_collection,
+        "filter": {"user_id": _SAMPLE_ID},
+        "sort": [("_id", DESCENDING)],
+        "limit": 21,
+    },
+    {
+        "name": "startup totals by user_id (profile, dashboard)",
+        "collection": startups_collection,
+        "pipeline": [
+            {"$match": {"user_id": _SAMPLE_ID}},
+            {"$group": {"_id": None, "total": {"$sum": "$total_funded"}}},
+        ],
+    },
+    {
+        "name": "startups by category (search with category filter)",
+        "collection": startups_collection,
+        "filter": {"category": "AI"},
+        "sort": [("_id", DESCENDING)],
+        "limit": 21,
+    },
+    {
+        "name": "all startups (startups list)",
+        "collection": startups_collection,
+        "filter": {},
+        "sort": [("_id", DESCENDING)],
+        "limit": 21,
+    },
+    {
+        "name": "investments by startup_id (startup investments, analytics)",
+        "collection": investments_collection,
+        "filter": {"startup_id": _SAMPLE_ID},
+        "sort": [("invested_at", DESCENDING), ("_id", DESCENDING)],
+        "limit": 21,
+    },
+    {
+        "name": "investments by user_id (user investments, profile, dashboard)",
+        "collection": investments_collection,
+        "filter": {"user_id": _SAMPLE_ID},
+        "sort": [("invested_at", DESCENDING), ("_id", DESCENDING)],
+        "limit": 21,
+    },
+    {
+        "name": "investment totals by user_id (profile, dashboard)",
+        "collection": investments_collection,
+        "pipeline": [
+            {"$match": {"user_id": _SAMPLE_ID}},
+            {"$group": {"_id": None, "total": {"$sum": "$amount"}}},
+        ],
+    },
+    {
+        "name": "investments since checkpoint (trending refresh)",
+        "collection": investments_collection,
+        "filter": {"invested_at": {"$gt": datetime(2000, 1, 1)}},
+    },
+    {
+        "name": "investor marker (invest)",
+        "collection": startup_investors_collection,
+        "filter": {"startup_id": _SAMPLE_ID, "user_id": _SAMPLE_ID},
+    },
+    {
+        "name": "funding buckets in a range (analytics timeseries)",
+        "collection": funding_buckets_collection,
+        "filter": {
+            "startup_id": _SAMPLE_ID,
+            "resolution": "day",
+            "start": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2000, 2, 1)},
+        },
+    },
+    # Known scans: explained and reported, but never fail startup.
+    {
+        "name": "regex search (search, SEARCH_BACKEND=regex)",
+        "collection": startups_collection,
+        "filter": {"title": {"$regex": "x", "$options": "i"}},
+        "collscan_ok": "unanchored case-insensitive regex cannot use an index",
+    },
+]
+
+
+# ------------------------------
+# EXPLAIN SELF-CHECK
+# ------------------------------
+
+
+def _winning_stages(node, in_winning_plan=False):
+    """Yield every stage name under a winningPlan, wherever explain() nests it."""
+    if isinstance(node, dict):
+        if in_winning_plan and "stage" in node:
+            yield node["stage"]
+        for key, value in node.items():
+            if key == "rejectedPlans":
+                continue
+            yield from _winning_stages(value, in_winning_plan or key == "winningPlan")
+    elif isinstance(node, list):
+        for item in node:
+            yield from _winning_stages(item, in_winning_plan)
+
+
+async def explain_shape(shape: dict) -> dict:
+    collection = shape["collection"]
+    if "pipeline" in shape:
+        return await collection.database.command(
+            "aggregate", collection.name, pipeline=shape["pipeline"], explain=True
+        )
+
+    cursor = collection.find(shape["filter"])
+    if shape.get("sort"):
+        cursor = cursor.sort(shape["sort"])
+    if shape.get("limit"):
+        cursor = cursor.limit(shape["limit"])
+    return await cursor.explain()
+
+
+async def verify_query_plans(mode: str = INDEX_PLAN_CHECK) -> list[str]:
+    """Explain every query shape and report the ones that would COLLSCAN.
+
+    Returns the names of offending shapes. In strict mode an offending shape
+    raises RuntimeError so the app never starts without its indexes.
+    """
+    if mode == "off":
+        return []
+
+    offenders = []
+    for shape in QUERY_SHAPES:
+        stages = set(_winning_stages(await explain_shape(shape)))
+        if "COLLSCAN" not in stages:
+            logger.debug("Query plan ok: %s (%s)", shape["name"], ", ".join(stages))
+            continue
+
+        if shape.get("collscan_ok"):
+            logger.info("Known COLLSCAN: %s (%s)", shape["name"], shape["collscan_ok"])
+            continue
+
+        offenders.append(shape["name"])
+        logger.error("!!! COLLSCAN query plan: %s", shape["name"])
+
+    if offenders and mode == "strict":
+        raise RuntimeError(
+            "Query shapes without a usable index: " + "; ".join(offenders)
+        )
+    return offenders
@@ -0,0 +1,186 @@
+"""In-memory funding leaderboard and category counts.
+
+Every startup is kept in an ascending (total_funded, startup_id) list, one
+overall and one per category, so top-K is a slice of the tail and a change
+is two bisects. The routes update it in place on create, update (category
+changes), delete and invest, which makes top-funded and the category list
+memory reads.
+
+Like trending.py this is per worker: investments made through another
+worker show up here at the next rebuild, every LEADERBOARD_REFRESH_SECONDS.
+
+Startups edited or funded while a rebuild scans are re-read once the new
+snapshot is in (the scan may already have passed them). Re-reading rather
+than replaying keeps an investment the scan did see from counting twice.
+"""
+
+import asyncio
+import logging
+import os
+from bisect import bisect_left, insort
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_REFRESH_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", 300))
+# re-reads of startups touched during a rebuild; one edited during every
+# round is left to the next rebuild
+LEADERBOARD_RECONCILE_ROUNDS = 3
+
+
+class FundingLeaderboard:
+    def __init__(self):
+        # startup_id -> (total_funded, category)
+        self.entries = {}
+        # ascending (total_funded, startup_id); the top-K is the tail
+        self.ranked = []
+        self.by_category = {}
+        # category -> number of startups
+        self.counts = {}
+        # ids edited while a rebuild runs
+        self._touched = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _insert(self, startup_id: str, total: float, category: str):
+        self.entries[startup_id] = (total, category)
+        insort(self.ranked, (total, startup_id))
+        insort(self.by_category.setdefault(category, []), (total, startup_id))
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+    def _delete(self, startup_id: str) -> tuple[float, str] | None:
+        entry = self.entries.pop(startup_id, None)
+        if entry is None:
+            return None
+        total, category = entry
+        key = (total, startup_id)
+        del self.ranked[bisect_left(self.ranked, key)]
+        ranked = self.by_category[category]
+        del ranked[bisect_left(ranked, key)]
+        self.counts[category] -= 1
+        if not self.counts[category]:
+            del self.counts[category]
+            del self.by_category[category]
+        return entry
+
+    # ------------------------------
+    # UPDATES
+    # ------------------------------
+
+    def _touch(self, startup_id: str):
+        if self._touched is not None:
+            self._touched.add(startup_id)
+
+    def add(self, startup_id: str, category: str, total: float = 0):
+        self._touch(startup_id)
+        self._delete(startup_id)
+        self._insert(startup_id, total, category)
+
+    def remove(self, startup_id: str):
+        self._touch(startup_id)
+        self._delete(startup_id)
+
+    def set_category(self, startup_id: str, category: str):
+        self._touch(startup_id)
+        entry = self._delete(startup_id)
+        if entry is not None:
+            self._insert(startup_id, entry[0], category)
+
+    def fund(self, startup_id: str, amount: float):
+        self._touch(startup_id)
+        entry = self._delete(startup_id)
+        if entry is not None:
+            self._insert(startup_id, entry[0] + amount, entry[1])
+
+    # ------------------------------
+    # READS
+    # ------------------------------
+
+    def top(self, k: int = 10, category: str | None = None) -> list[tuple[str, float]]:
+        """(startup_id, total_funded) for the k best funded, overall or in category."""
+        ranked = self.ranked if category is None else self.by_category.get(category, [])
+        return [(startup_id, total) for total, startup_id in reversed(ranked[-k:])]
+
+    def total(self, startup_id: str) -> float | None:
+        entry = self.entries.get(startup_id)
+        return None if entry is None else entry[0]
+
+    def categories(self) -> dict[str, int]:
+        """Startups per named category, by category name."""
+        return {
+            category: self.counts[category]
+            for category in sorted(self.counts)
+            if category
+        }
+
+    # ------------------------------
+    # SEEDING
+    # ------------------------------
+
+    @staticmethod
+    async def _read(startups, query: dict) -> dict:
+        entries = {}
+        async for doc in startups.find(query, {"total_funded": 1, "category": 1}):
+            entries[str(doc["_id"])] = (
+                doc.get("total_funded", 0),
+                doc.get("category", ""),
+            )
+        return entries
+
+    async def rebuild(self, startups):
+        self._touched = set()
+        try:
+            self._swap(await self._read(startups, {}))
+            reread = await self._reconcile(startups)
+        finally:
+            self._touched = None
+        logger.info(
+            "Leaderboard rebuilt: %d startups in %d categories, %d re-read",
+            len(self.entries),
+            len(self.by_category),
+            reread,
+        )
+
+    async def _reconcile(self, startups) -> int:
+        """Re-read the startups touched since the rebuild began."""
+        reread = 0
+        for _ in range(LEADERBOARD_RECONCILE_ROUNDS):
+            touched, self._touched = self._touched, set()
+            if not touched:
+                break
+            ids = [ObjectId(s) for s in touched if ObjectId.is_valid(s)]
+            found = await self._read(startups, {"_id": {"$in": ids}})
+            # one touched again during the read is re-read next round
+            for startup_id in touched - self._touched:
+                self._delete(startup_id)
+                if startup_id in found:
+                    self._insert(startup_id, *found[startup_id])
+            reread += len(touched)
+        return reread
+
+    def _swap(self, entries: dict):
+        by_category = {}
+        for startup_id, (total, category) in entries.items():
+            by_category.setdefault(category, []).append((total, startup_id))
+        for ranked in by_category.values():
+            ranked.sort()
+
+        self.entries = entries
+        self.ranked = sorted((total, sid) for sid, (total, _) in entries.items())
+        self.by_category = by_category
+        self.counts = {
+            category: len(ranked) for category, ranked in by_category.items()
+        }
+
+    async def run_refresh(self, startups, interval=LEADERBOARD_REFRESH_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebuild(startups)
+            except Exception:
+                logger.exception("Leaderboard refresh failed")
+
+
+leaderboard = FundingLeaderboard()
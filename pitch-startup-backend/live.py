@@ -0,0 +1,315 @@
+"""Live funding progress over Server-Sent Events.
+
+Routes publish to an in-process bus after invest, update and delete; SSE
+streams (one startup, or a set of them for card lists) subscribe to it.
+Each subscriber has a bounded queue holding at most one pending event per
+startup: a burst of investments reaches a slow client as one event with the
+latest totals, and past LIVE_MAX_PENDING startups the oldest is dropped.
+
+With several workers, set LIVE_CHANGE_STREAMS=true (needs a replica set):
+every worker then feeds its bus from a change stream on the startups
+collection instead of from its own routes, so a client sees investments
+made through any worker.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict, defaultdict
+
+from bson import ObjectId
+from database import startups_collection
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from metrics import Counter, Gauge
+from projections import CARD_PROJECTION
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+LIVE_CHANGE_STREAMS = os.getenv("LIVE_CHANGE_STREAMS", "false").lower() in (
+    "1",
+    "true",
+)
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", 10_000))
+# startups with an undelivered event, per subscriber
+LIVE_MAX_PENDING = int(os.getenv("LIVE_MAX_PENDING", 100))
+# startups one multiplexed stream may follow
+LIVE_MAX_IDS = int(os.getenv("LIVE_MAX_IDS", 100))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", 15))
+
+LIVE_PROJECTION = {**CARD_PROJECTION, "funding_stats.investment_count": 1}
+# fields of an "update" event; the rest of a card never changes
+UPDATE_FIELDS = ("title", "description", "category", "image_url", "video_url")
+
+live_subscribers = Gauge("live_subscribers", "Open SSE subscriptions")
+live_events = Counter(
+    "live_events_total",
+    "Events through the live bus: published, delivered, coalesced or dropped",
+    ("outcome",),
+)
+
+
+def funding_event(doc: dict) -> dict:
+    """Snapshot event for a startup document projected with LIVE_PROJECTION."""
+    return {
+        "type": "funding",
+        "startup_id": str(doc["_id"]),
+        "total_funded": doc.get("total_funded", 0),
+        "funding_goal": doc.get("funding_goal"),
+        "investment_count": doc.get("funding_stats", {}).get("investment_count", 0),
+        "status": doc.get("status"),
+    }
+
+
+# ------------------------------
+# BUS
+# ------------------------------
+
+
+class Subscription:
+    def __init__(self, startup_ids: set[str], max_pending: int = LIVE_MAX_PENDING):
+        self.startup_ids = startup_ids
+        self.max_pending = max_pending
+        self.pending = OrderedDict()  # startup_id -> latest undelivered event
+        self.ready = asyncio.Event()
+
+    def push(self, event: dict):
+        startup_id = event["startup_id"]
+        previous = self.pending.pop(startup_id, None)
+        if previous is not None:
+            live_events.inc(("coalesced",))
+            # an update and a funding event fold into one update; a delete wins
+            if event["type"] != "delete" and previous["type"] != "delete":
+                merged = {**previous, **event}
+                if previous["type"] == "update":
+                    merged["type"] = "update"
+                event = merged
+        elif len(self.pending) >= self.max_pending:
+            self.pending.popitem(last=False)
+            live_events.inc(("dropped",))
+        self.pending[startup_id] = event
+        self.ready.set()
+
+    async def next(self, timeout: float) -> list[dict]:
+        """Pending events, oldest first; empty if none arrived within timeout."""
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        live_events.inc(("delivered",), len(events))
+        return events
+
+
+class LiveBus:
+    def __init__(self, max_subscribers: int = LIVE_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self.topics = defaultdict(set)  # startup_id -> subscriptions
+        self.subscribers = 0
+        # startup_id -> highest investment_count published, so a funding
+        # snapshot read before a newer one can't overtake it
+        self.last_count = {}
+
+    def watching(self, startup_id: str) -> bool:
+        return startup_id in self.topics
+
+    def subscribe(self, startup_ids: set[str]) -> Subscription:
+        if self.subscribers >= self.max_subscribers:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many live subscribers",
+                headers={"Retry-After": "5"},
+            )
+        subscription = Subscription(startup_ids)
+        for startup_id in startup_ids:
+            self.topics[startup_id].add(subscription)
+        self.subscribers += 1
+        live_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for startup_id in subscription.startup_ids:
+            subscribers = self.topics.get(startup_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.topics[startup_id]
+                self.last_count.pop(startup_id, None)
+        self.subscribers -= 1
+        live_subscribers.dec()
+
+    def publish(self, event: dict):
+        startup_id = event["startup_id"]
+        subscribers = self.topics.get(startup_id)
+        if not subscribers:
+            return
+        if event["type"] == "funding":
+            count = event["investment_count"]
+            if count < self.last_count.get(startup_id, 0):
+                return
+            self.last_count[startup_id] = count
+        live_events.inc(("published",))
+        for subscription in subscribers:
+            subscription.push(event)
+
+
+live_bus = LiveBus()
+
+
+# ------------------------------
+# PUBLISHING (called by the routes)
+# ------------------------------
+
+
+async def publish_funding(startup_ids):
+    """Publish the current totals of the startups somebody is watching."""
+    if LIVE_CHANGE_STREAMS:
+        return
+    watched = [ObjectId(s) for s in set(startup_ids) if live_bus.watching(s)]
+    if not watched:
+        return
+    async for doc in startups_collection.find(
+        {"_id": {"$in": watched}}, LIVE_PROJECTION
+    ):
+        live_bus.publish(funding_event(doc))
+
+
+def publish_update(startup: dict):
+    if LIVE_CHANGE_STREAMS:
+        return
+    event = {field: startup.get(field) for field in UPDATE_FIELDS}
+    live_bus.publish(
+        {
+            **event,
+            "type": "update",
+            "startup_id": str(startup["_id"]),
+            "funding_goal": startup.get("funding_goal"),
+            "status": startup.get("status"),
+        }
+    )
+
+
+def publish_delete(startup_id: str):
+    if LIVE_CHANGE_STREAMS:
+        return
+    live_bus.publish({"type": "delete", "startup_id": startup_id})
+
+
+# ------------------------------
+# CHANGE STREAM INGESTION
+# ------------------------------
+
+
+async def run_change_stream(retry_seconds: float = 5):
+    """Feed the bus from the startups change stream, resuming after errors."""
+    pipeline = [
+        {"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}},
+        {
+            "$project": {
+                "operationType": 1,
+                "documentKey": 1,
+                "updateDescription.updatedFields": 1,
+                **{f"fullDocument.{field}": 1 for field in LIVE_PROJECTION},
+            }
+        },
+    ]
+    resume_after = None
+    while True:
+        try:
+            async with startups_collection.watch(
+                pipeline, full_document="updateLookup", resume_after=resume_after
+            ) as stream:
+                async for change in stream:
+                    resume_after = stream.resume_token
+                    _ingest(change)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Live change stream failed, retrying")
+            await asyncio.sleep(retry_seconds)
+
+
+def _ingest(change: dict):
+    startup_id = str(change["documentKey"]["_id"])
+    if not live_bus.watching(startup_id):
+        return
+    if change["operationType"] == "delete":
+        live_bus.publish({"type": "delete", "startup_id": startup_id})
+        return
+    doc = change.get("fullDocument")
+    if doc is None:  # deleted before the lookup ran
+        return
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    event = funding_event(doc)
+    if any(field in updated for field in UPDATE_FIELDS):
+        event.update({field: doc.get(field) for field in UPDATE_FIELDS}, type="update")
+    live_bus.publish(event)
+
+
+# ------------------------------
+# SSE
+# ------------------------------
+
+
+def _format(event: dict) -> bytes:
+    return b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+
+async def _stream(subscription: Subscription, snapshots: list[dict]):
+    try:
+        # the reconnect delay for EventSource, then the current state
+        yield b"retry: 3000\n\n" + b"".join(_format(event) for event in snapshots)
+        remaining = {event["startup_id"] for event in snapshots}
+        while remaining:
+            events = await subscription.next(LIVE_HEARTBEAT_SECONDS)
+            if not events:
+                yield b": ping\n\n"
+                continue
+            yield b"".join(_format(event) for event in events)
+            remaining -= {e["startup_id"] for e in events if e["type"] == "delete"}
+    finally:
+        live_bus.unsubscribe(subscription)
+
+
+async def live_response(collection, startup_ids: list[str]) -> StreamingResponse:
+    """SSE response: a snapshot per existing startup, then its live events.
+
+    The stream ends once every followed startup has been deleted.
+    """
+    # subscribe before reading the snapshots so nothing in between is lost
+    subscription = live_bus.subscribe(set(startup_ids))
+    try:
+        docs = await collection.find(
+            {"_id": {"$in": [ObjectId(s) for s in startup_ids]}}, LIVE_PROJECTION
+        ).to_list(None)
+    except BaseException:
+        live_bus.unsubscribe(subscription)
+        raise
+    if not docs:
+        live_bus.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail="Startup not found")
+
+    snapshots = [dict(funding_event(doc), type="snapshot") for doc in docs]
+    for event in snapshots:
+        live_bus.last_count.setdefault(event["startup_id"], event["investment_count"])
+    return StreamingResponse(
+        _stream(subscription, snapshots),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def parse_ids(ids: str) -> list[str]:
+    startup_ids = list(dict.fromkeys(s for s in ids.split(",") if s))
+    if not startup_ids or not all(ObjectId.is_valid(s) for s in startup_ids):
+        raise HTTPException(status_code=400, detail="Invalid startup ID")
+    if len(startup_ids) > LIVE_MAX_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {LIVE_MAX_IDS} startups per stream"
+        )
+    return startup_ids
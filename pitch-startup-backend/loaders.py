@@ -0,0 +1,96 @@
+"""Per-request batched loading of related documents (DataLoader style).
+
+Instead of one find_one per investment row, every startup id requested
+during the same event-loop tick is collected, deduplicated and fetched with
+a single `$in` query. Results are memoised for the rest of the request, so
+the profile's and dashboard's lists share lookups.
+
+Use it through the `get_startup_loader` dependency: FastAPI resolves a
+dependency once per request, which gives each request its own loader.
+"""
+
+import asyncio
+
+from bson import ObjectId
+from database import startups_collection
+from fastapi import HTTPException
+from projections import CARD_PROJECTION
+
+EXPANDABLE = {"startup"}
+
+
+def parse_expand(expand: str | None) -> set[str]:
+    """`?expand=startup` -> {"startup"}; unknown names are a 400."""
+    if not expand:
+        return set()
+    names = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = names - EXPANDABLE
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Cannot expand: {', '.join(sorted(unknown))}"
+        )
+    return names
+
+
+class StartupLoader:
+    def __init__(self):
+        # startup_id -> future resolving to a card dict, or None if missing
+        self.futures = {}
+        self.queue = []
+        self.dispatching = None
+        self.batches = 0
+
+    def load(self, startup_id: str) -> asyncio.Future:
+        future = self.futures.get(startup_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.futures[startup_id] = future
+        if not ObjectId.is_valid(startup_id):
+            future.set_result(None)
+            return future
+
+        if not self.queue:
+            # the task first runs on the next loop iteration, so everything
+            # asked for until then goes out as one batch
+            self.dispatching = loop.create_task(self._dispatch())
+        self.queue.append(startup_id)
+        return future
+
+    def prime(self, startup_id: str, card: dict):
+        """Seed the loader with a card the request already has."""
+        if startup_id not in self.futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(card)
+            self.futures[startup_id] = future
+
+    async def load_many(self, startup_ids) -> list[dict | None]:
+        return await asyncio.gather(*(self.load(sid) for sid in startup_ids))
+
+    async def _dispatch(self):
+        batch, self.queue = self.queue, []
+        self.batches += 1
+        try:
+            docs = await startups_collection.find(
+                {"_id": {"$in": [ObjectId(sid) for sid in batch]}}, CARD_PROJECTION
+            ).to_list(len(batch))
+        except Exception as exc:
+            for sid in batch:
+                self.futures.pop(sid).set_exception(exc)
+            return
+
+        by_id = {str(doc["_id"]): doc for doc in docs}
+        for sid in batch:
+            self.futures[sid].set_result(by_id.get(sid))
+
+    async def attach(self, investments: list[dict], key: str = "startup"):
+        """Embed each investment's startup card under `key` (None if deleted)."""
+        cards = await self.load_many(inv["startup_id"] for inv in investments)
+        for inv, card in zip(investments, cards):
+            inv[key] = card
+
+
+def get_startup_loader() -> StartupLoader:
+    return StartupLoader()
@@ -1,9 +1,76 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from auth import hashing_stats, shutdown_hash_executor
+from auth_dependencies import token_cache, user_cache
+from cache import card_cache, startup_cache
+from conditional import startups_version
+from database import (
+    connect,
+    disconnect,
+    investments_collection,
+    startups_collection,
+    trending_checkpoints_collection,
+)
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from health import router as health_router
+from indexes import ensure_indexes, verify_query_plans
+from leaderboard import leaderboard
+from live import LIVE_CHANGE_STREAMS, run_change_stream
+from metrics import MetricsMiddleware, metrics_endpoint, register_stats
+from ratelimit import admission_stats
 from routes import router
+from search import search_index
+from serialization import BSONResponse
+from similar import similar_index
+from trending import trending
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect()
+    await ensure_indexes()
+    await verify_query_plans()
+    await search_index.rebuild(startups_collection)
+    await leaderboard.rebuild(startups_collection)
+    await trending.refresh(trending_checkpoints_collection, investments_collection)
+    trending_refresh = asyncio.create_task(
+        trending.run_refresh(trending_checkpoints_collection, investments_collection)
+    )
+    refresh = asyncio.create_task(leaderboard.run_refresh(startups_collection))
+    search_refresh = asyncio.create_task(search_index.run_refresh(startups_collection))
+    # builds in the background (about a minute per 100k pitches)
+    similar_refresh = asyncio.create_task(
+        similar_index.run_refresh(startups_collection)
+    )
+    changes = asyncio.create_task(run_change_stream()) if LIVE_CHANGE_STREAMS else None
+    yield
+    trending_refresh.cancel()
+    refresh.cancel()
+    search_refresh.cancel()
+    similar_refresh.cancel()
+    if changes:
+        changes.cancel()
+    await startups_version.close()
+    shutdown_hash_executor()
+    disconnect()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=BSONResponse)
 app.include_router(router)
+app.include_router(health_router)
+app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+for name, lru in (
+    ("startup", startup_cache),
+    ("card", card_cache),
+    ("token", token_cache),
+    ("user", user_cache),
+):
+    register_stats("cache_stats", "In-process cache statistics", lru.stats, cache=name)
+register_stats("password_hashing", "Password hashing executor", hashing_stats)
+register_stats("auth_admission", "Login/register admission", admission_stats)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,3 +79,6 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# added last so it is the outermost middleware and times CORS handling too
+app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,324 @@
+"""Request and Mongo command metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and labels it with the route's path
+template (/api/startups/{startup_id}, never the raw URL), so the number of
+series stays bounded. MongoCommandListener is attached to the Motor client
+in database.py and times every command by collection and command name.
+Everything is served on GET /metrics.
+
+The metric types are deliberately tiny: a histogram observation is a
+bisect plus three additions under a lock (listener callbacks run on
+Motor's worker threads).
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from fastapi.responses import PlainTextResponse
+from pymongo import monitoring
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true")
+
+# seconds; the usual Prometheus defaults, plus finer steps under 5ms
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)  # fmt: skip
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {value}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        # per-bucket (not cumulative) counts; render() accumulates
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = _labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{plain} {total}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+# callables returning extra exposition lines, evaluated on every scrape
+COLLECTORS = []
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    for collect in COLLECTORS:
+        lines += collect()
+    return "\n".join(lines) + "\n"
+
+
+def register_stats(name: str, help: str, stats, **labels):
+    """Expose the numeric values of a stats() dict as one gauge, keyed by `stat`."""
+    label_names = (*labels, "stat")
+
+    def collect() -> list[str]:
+        lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        for key, value in stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                names = _labels(label_names, (*labels.values(), key))
+                lines.append(f"{name}{names} {value}")
+        return lines
+
+    COLLECTORS.append(collect)
+
+
+async def metrics_endpoint():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+# ------------------------------
+# HTTP
+# ------------------------------
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by route template",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests currently being served"
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses aren't buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            # set by the router once a route matched
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe((scope["method"], path, status), elapsed)
+
+
+# ------------------------------
+# MONGO COMMANDS
+# ------------------------------
+
+mongo_command_duration = Histogram(
+    "mongo_command_duration_seconds",
+    "Round trip of a MongoDB command, by collection",
+    ("collection", "command", "outcome"),
+)
+mongo_documents = Counter(
+    "mongo_documents_total",
+    "Documents returned (find/aggregate/getMore) or written (insert/update/delete)",
+    ("collection", "command"),
+)
+
+
+def _documents(command_name: str, reply) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        # request_id -> collection, from the started event (replies don't say)
+        self.collections = {}
+
+    def started(self, event):
+        if not METRICS_ENABLED:
+            return
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        self.collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        collection = self.collections.pop((event.connection_id, event.request_id), None)
+        if collection is None:
+            return
+        labels = (collection, event.command_name)
+        mongo_command_duration.observe(
+            (*labels, outcome), event.duration_micros / 1_000_000
+        )
+        if outcome == "ok":
+            mongo_documents.inc(labels, _documents(event.command_name, event.reply))
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+mongo_listener = MongoCommandListener()
+
+
+# ------------------------------
+# MONGO CONNECTION POOL
+# ------------------------------
+
+mongo_pool_connections = Gauge(
+    "mongo_pool_connections", "Open pooled connections", ("address",)
+)
+mongo_pool_checked_out = Gauge(
+    "mongo_pool_checked_out", "Pooled connections in use", ("address",)
+)
+mongo_pool_waiting = Gauge(
+    "mongo_pool_waiting", "Operations waiting for a pooled connection", ("address",)
+)
+mongo_pool_checkout_failures = Counter(
+    "mongo_pool_checkout_failures_total",
+    "Connection check-outs that failed (timeout = pool exhausted)",
+    ("address", "reason"),
+)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc((_address(event),))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec((_address(event),))
+
+    def connection_check_out_started(self, event):
+        mongo_pool_waiting.inc((_address(event),))
+
+    def connection_checked_out(self, event):
+        address = (_address(event),)
+        mongo_pool_waiting.dec(address)
+        mongo_pool_checked_out.inc(address)
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_waiting.dec((_address(event),))
+        mongo_pool_checkout_failures.inc((_address(event), str(event.reason)))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec((_address(event),))
+
+
+def pool_stats() -> dict:
+    """{address: {connections, checked_out, waiting}} from the gauges above."""
+    stats = {}
+    for name, gauge in (
+        ("connections", mongo_pool_connections),
+        ("checked_out", mongo_pool_checked_out),
+        ("waiting", mongo_pool_waiting),
+    ):
+        for (address,), value in list(gauge.values.items()):
+            stats.setdefault(address, {})[name] = value
+    return stats
+
+
+pool_listener = MongoPoolListener()
@@ -1,5 +1,5 @@
 import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
@@ -97,6 +97,11 @@ class StartUpPitchCard(BaseModel):
     created_at: datetime.datetime
 
 
+class StartUpPitchCardPage(BaseModel):
+    items: List[StartUpPitchCard]
+    next_cursor: Optional[str] = None
+
+
 class StartUpPitchUpdate(BaseModel):
     updated_at: Optional[datetime.datetime] = None
     title: str
@@ -116,7 +121,12 @@ class InvestementBase(BaseModel):
 
 
 class InvestmentRequest(BaseModel):
-    amount: float
+    amount: float = Field(..., gt=0)
+
+
+class BulkInvestmentItem(InvestmentRequest):
+    startup_id: str
+    idempotency_key: Optional[str] = None
 
 
 class InvestementInDB(InvestementBase):
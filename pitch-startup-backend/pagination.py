@@ -0,0 +1,101 @@
+import base64
+import os
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 20))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
+
+def clamp_limit(limit: int | None) -> int:
+    """Client asks, server caps."""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+# ------------------------------
+# CURSOR ENCODING
+# ------------------------------
+
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor from the sort key(s) of the last item on a page."""
+    raw = json_util.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+# ------------------------------
+# KEYSET PAGINATION
+# ------------------------------
+
+
+def keyset_filter(query: dict, sort_key: str | None, cursor: str | None) -> dict:
+    """Restrict `query` to documents after the cursor in (sort_key, _id) desc order."""
+    if not cursor:
+        return query
+
+    values = decode_cursor(cursor)
+    if not isinstance(values[-1], ObjectId) or len(values) != (2 if sort_key else 1):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if sort_key is None:
+        after = {"_id": {"$lt": values[0]}}
+    else:
+        value, last_id = values
+        after = {
+            "$or": [
+                {sort_key: {"$lt": value}},
+                {sort_key: value, "_id": {"$lt": last_id}},
+            ]
+        }
+    return {"$and": [query, after]} if query else after
+
+
+async def paginate(
+    collection,
+    query: dict,
+    *,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort_key: str | None = None,
+    projection: dict | None = None,
+) -> tuple[list[dict], str | None]:
+    """Fetch one page sorted by (sort_key, _id) descending, or by _id alone.
+
+    Every page is a single index range scan bounded by `limit`, so page 1000
+    costs the same as page one. Returns the raw documents and the cursor for
+    the next page (None on the last page).
+    """
+    limit = clamp_limit(limit)
+    sort = [("_id", -1)] if sort_key is None else [(sort_key, -1), ("_id", -1)]
+
+    # one extra document tells us whether another page exists
+    docs = (
+        await collection.find(keyset_filter(query, sort_key, cursor), projection)
+        .sort(sort)
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        if sort_key is None:
+            next_cursor = encode_cursor(last["_id"])
+        else:
+            next_cursor = encode_cursor(last.get(sort_key), last["_id"])
+    return docs, next_cursor
@@ -0,0 +1,20 @@
+from models import StartUpPitchCard, StartUpPitchPublic
+from pydantic import BaseModel
+
+
+def projection_for(model: type[BaseModel]) -> dict:
+    """Mongo projection selecting exactly the fields a response model declares.
+
+    Field aliases are honoured, so `id = Field(alias="_id")` projects `_id`.
+    """
+    return {(field.alias or name): 1 for name, field in model.model_fields.items()}
+
+
+# List endpoints render cards, so they never need the markdown pitch body
+CARD_PROJECTION = projection_for(StartUpPitchCard)
+
+# Detail page: everything but the funding rollup
+PUBLIC_PROJECTION = projection_for(StartUpPitchPublic)
+
+# ...plus when the funding rollup last changed, for the detail Last-Modified
+DETAIL_PROJECTION = {**PUBLIC_PROJECTION, "funding_stats.updated_at": 1}
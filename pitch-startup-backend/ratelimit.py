@@ -0,0 +1,163 @@
+"""Admission control for the password routes (/api/login, /api/register).
+
+Every login attempt costs an Argon2 verify (and register a hash), so both
+routes are gated before any database or hashing work:
+
+- a token bucket per client IP, checked by the `Admission` dependency;
+- a token bucket per email, checked first thing in the route body;
+- one cap on password requests in flight across both routes, shed with 503.
+
+Limits are "<attempts>/<seconds>" per route, e.g. LOGIN_EMAIL_LIMIT=5/60;
+"off" disables a bucket. State is per worker, like the caches.
+
+Behind a reverse proxy or CDN every request comes from the proxy's
+address. List the proxies in TRUSTED_PROXIES (addresses or CIDR ranges,
+comma-separated) and the client IP is read from X-Forwarded-For instead:
+the rightmost address that isn't one of them.
+"""
+
+import ipaddress
+import math
+import os
+import time
+from collections import OrderedDict
+
+from auth import HASH_MAX_PENDING
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+from metrics import Counter
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true")
+# login + register requests past admission, across both routes
+AUTH_MAX_IN_FLIGHT = int(os.getenv("AUTH_MAX_IN_FLIGHT", HASH_MAX_PENDING))
+# buckets kept per limiter; the least recently seen key is dropped first
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.getenv("TRUSTED_PROXIES", "").split(",")
+    if proxy.strip()
+]
+
+DEFAULT_LIMITS = {
+    "LOGIN_IP_LIMIT": "30/60",
+    "LOGIN_EMAIL_LIMIT": "5/60",
+    "REGISTER_IP_LIMIT": "10/60",
+    "REGISTER_EMAIL_LIMIT": "3/60",
+}
+
+rejections = Counter(
+    "auth_admission_rejections_total",
+    "Login/register requests rejected before any hashing or database work",
+    ("route", "reason"),
+)
+
+
+class TokenBucket:
+    """`capacity` attempts, refilled evenly over `period` seconds, per key."""
+
+    def __init__(self, capacity: int, period: float, maxsize: int):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.maxsize = maxsize
+        self.buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key: str, now: float | None = None) -> float:
+        """Spend one token; returns 0 on success, else seconds until one is free."""
+        now = time.monotonic() if now is None else now
+        tokens, updated_at = self.buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.maxsize:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+def _bucket(name: str) -> TokenBucket | None:
+    spec = os.getenv(name, DEFAULT_LIMITS[name]).strip().lower()
+    if not RATE_LIMIT_ENABLED or spec in ("", "0", "off"):
+        return None
+    capacity, _, period = spec.partition("/")
+    return TokenBucket(int(capacity), float(period or 60), RATE_LIMIT_MAX_KEYS)
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """The peer's address, or the client's as forwarded by TRUSTED_PROXIES."""
+    ip = request.client.host if request.client else "unknown"
+    if not _trusted(ip):
+        return ip
+    # each proxy appends the address it received the request from
+    forwarded = request.headers.get("x-forwarded-for", "")
+    for hop in reversed([hop.strip() for hop in forwarded.split(",")]):
+        if not hop:
+            continue
+        ip = hop
+        if not _trusted(hop):
+            break
+    return ip
+
+
+_in_flight = 0
+
+
+class Admission:
+    """Dependency for one password route; see the module docstring."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.by_ip = _bucket(f"{route.upper()}_IP_LIMIT")
+        self.by_email = _bucket(f"{route.upper()}_EMAIL_LIMIT")
+
+    def _reject(self, reason: str, status_code: int, retry_after: float):
+        rejections.inc((self.route, reason))
+        detail = "Too many attempts, try again later"
+        if status_code == 503:
+            detail = "Server busy, try again"
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def __call__(self, request: Request):
+        global _in_flight
+        if self.by_ip is not None:
+            wait = self.by_ip.take(client_ip(request))
+            if wait:
+                self._reject("ip", 429, wait)
+        if _in_flight >= AUTH_MAX_IN_FLIGHT:
+            self._reject("in_flight", 503, 1)
+
+        _in_flight += 1
+        try:
+            yield self
+        finally:
+            _in_flight -= 1
+
+    def check_email(self, email: str):
+        if self.by_email is not None:
+            wait = self.by_email.take(email.lower())
+            if wait:
+                self._reject("email", 429, wait)
+
+
+login_admission = Admission("login")
+register_admission = Admission("register")
+
+
+def admission_stats() -> dict:
+    return {"in_flight": _in_flight, "max_in_flight": AUTH_MAX_IN_FLIGHT}
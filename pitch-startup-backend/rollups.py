@@ -0,0 +1,316 @@
+"""Per-startup funding rollups, kept on the startup document itself.
+
+`funding_stats` holds investment_count, investor_count (distinct),
+min_amount, max_amount and the RECENT_INVESTMENTS most recent investments;
+the sum is `total_funded`. All of it changes in the same single-document
+update as `total_funded`, so readers never see them disagree.
+
+Recompute everything from the investments collection with:
+
+    python -m rollups
+
+Startups whose rollup covers every investment carry ROLLUP_COMPLETE: new
+ones from the start, older ones (from before rollups existed) once that has
+run. Until then analytics computes their stats from the investments.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from conditional import startups_version
+from database import (
+    connect,
+    disconnect,
+    get_client,
+    investments_collection,
+    startup_investors_collection,
+    startups_collection,
+)
+from pymongo import UpdateOne
+from timeseries import record_buckets, unrecord_buckets
+
+logger = logging.getLogger(__name__)
+
+RECENT_INVESTMENTS = int(os.getenv("RECENT_INVESTMENTS", 5))
+ROLLUP_COMPLETE = "rollup_complete"
+RECENT_PROJECTION = {"user_id": 1, "amount": 1, "invested_at": 1}
+# wrap each invest in a multi-document transaction (needs a replica set)
+INVEST_TRANSACTIONS = os.getenv("INVEST_TRANSACTIONS", "false").lower() in (
+    "1",
+    "true",
+)
+
+
+def rollup_update(investment: dict, new_investor: bool) -> dict:
+    """Update document folding one investment into total_funded and funding_stats."""
+    return batch_rollup_update([investment], 1 if new_investor else 0)
+
+
+def batch_rollup_update(investments: list[dict], new_investors: int) -> dict:
+    """rollup_update for several investments in the same startup at once."""
+    amounts = [inv["amount"] for inv in investments]
+    recent = sorted(investments, key=lambda inv: inv["invested_at"], reverse=True)
+    return {
+        "$inc": {
+            "total_funded": sum(amounts),
+            "funding_stats.investment_count": len(investments),
+            "funding_stats.investor_count": new_investors,
+        },
+        "$currentDate": {"funding_stats.updated_at": True},
+        "$min": {"funding_stats.min_amount": min(amounts)},
+        "$max": {"funding_stats.max_amount": max(amounts)},
+        "$push": {
+            "funding_stats.recent_investments": {
+                "$each": [
+                    {
+                        "_id": inv["_id"],
+                        "user_id": inv["user_id"],
+                        "amount": inv["amount"],
+                        "invested_at": inv["invested_at"],
+                    }
+                    for inv in recent[:RECENT_INVESTMENTS]
+                ],
+                "$sort": {"invested_at": -1},
+                "$slice": RECENT_INVESTMENTS,
+            }
+        },
+    }
+
+
+async def mark_investor(startup_id: str, user_id: str, session=None) -> bool:
+    """Remember that user_id invested in startup_id; True the first time."""
+    result = await startup_investors_collection.update_one(
+        {"startup_id": startup_id, "user_id": user_id},
+        {"$setOnInsert": {"startup_id": startup_id, "user_id": user_id}},
+        upsert=True,
+        session=session,
+    )
+    return result.upserted_id is not None
+
+
+async def record_investment(investment: dict, session=None) -> bool:
+    """Insert an investment and fold it into its startup's total_funded and rollup.
+
+    Returns False (and writes nothing that sticks) if the startup doesn't
+    exist. A duplicate idempotency key raises DuplicateKeyError before the
+    startup is touched, so a retried request never counts twice.
+
+    Without a session the insert goes first, on its own: neither the investor
+    marker nor the funding time-series buckets may be written for an insert
+    that fails (a reused key would otherwise leave a marker for a startup the
+    user never invested in). The marker and buckets then go out together,
+    and the startup update last, since it needs to know whether the investor
+    is new. Inside a transaction (`session`) the same four writes are
+    sequential but all-or-nothing.
+    """
+    investment.setdefault("_id", ObjectId())
+    startup_id, user_id = investment["startup_id"], investment["user_id"]
+    update = {"_id": ObjectId(startup_id)}
+    if session is None:
+        await investments_collection.insert_one(investment)
+        new_investor, _ = await asyncio.gather(
+            mark_investor(startup_id, user_id), record_buckets([investment])
+        )
+        result = await startups_collection.update_one(
+            update, rollup_update(investment, new_investor)
+        )
+    else:
+        await investments_collection.insert_one(investment, session=session)
+        new_investor = await mark_investor(startup_id, user_id, session=session)
+        await record_buckets([investment], session=session)
+        result = await startups_collection.update_one(
+            update, rollup_update(investment, new_investor), session=session
+        )
+
+    if result.matched_count:
+        return True
+
+    # unknown startup: the caller aborts the transaction, or we undo by hand
+    if session is None:
+        await asyncio.gather(
+            investments_collection.delete_one({"_id": investment["_id"]}),
+            startup_investors_collection.delete_one(
+                {"startup_id": startup_id, "user_id": user_id}
+            ),
+            unrecord_buckets([investment]),
+        )
+    return False
+
+
+async def _recent(investments, startup_id: str) -> list[dict]:
+    return (
+        await investments.find({"startup_id": startup_id}, RECENT_PROJECTION)
+        .sort([("invested_at", -1), ("_id", -1)])
+        .limit(RECENT_INVESTMENTS)
+        .to_list(RECENT_INVESTMENTS)
+    )
+
+
+async def stats_from_investments(investments, startup_id: str) -> dict:
+    """funding_stats computed from the investments, for a startup without
+    ROLLUP_COMPLETE (empty if nobody invested)."""
+    pipeline = [
+        {"$match": {"startup_id": startup_id}},
+        {
+            "$group": {
+                "_id": "$user_id",
+                "count": {"$sum": 1},
+                "min": {"$min": "$amount"},
+                "max": {"$max": "$amount"},
+            }
+        },
+        {
+            "$group": {
+                "_id": None,
+                "investors": {"$sum": 1},
+                "count": {"$sum": "$count"},
+                "min": {"$min": "$min"},
+                "max": {"$max": "$max"},
+            }
+        },
+    ]
+    rows, recent = await asyncio.gather(
+        investments.aggregate(pipeline).to_list(1), _recent(investments, startup_id)
+    )
+    if not rows:
+        return {}
+    return {
+        "investment_count": rows[0]["count"],
+        "investor_count": rows[0]["investors"],
+        "min_amount": rows[0]["min"],
+        "max_amount": rows[0]["max"],
+        "recent_investments": recent,
+    }
+
+
+async def record_investment_once(investment: dict) -> bool:
+    """record_investment, inside a transaction when INVEST_TRANSACTIONS is on.
+
+    Without transactions a crash between the insert and the startup update
+    can leave total_funded short (`python -m rollups` repairs it), but with
+    an idempotency key it can never count the same investment twice.
+    """
+    if not INVEST_TRANSACTIONS:
+        return await record_investment(investment)
+
+    async with await get_client().start_session() as session:
+        async with session.start_transaction():
+            applied = await record_investment(investment, session=session)
+            if not applied:
+                await session.abort_transaction()
+            return applied
+
+
+# ------------------------------
+# REBUILD
+# ------------------------------
+
+
+async def rebuild_rollups(batch_size: int = 500):
+    """Recompute total_funded and funding_stats for every startup.
+
+    Streams one aggregated row per startup, so memory stays flat no matter
+    how many investments there are. Startups without investments are reset.
+    """
+    pairs = {
+        "$group": {
+            "_id": {"startup_id": "$startup_id", "user_id": "$user_id"},
+            "count": {"$sum": 1},
+            "sum": {"$sum": "$amount"},
+            "min": {"$min": "$amount"},
+            "max": {"$max": "$amount"},
+        }
+    }
+
+    # 1) one investor marker per (startup, investor) pair
+    investor_ops = []
+    async for row in investments_collection.aggregate([pairs], allowDiskUse=True):
+        investor_ops.append(
+            UpdateOne(row["_id"], {"$setOnInsert": row["_id"]}, upsert=True)
+        )
+        if len(investor_ops) >= batch_size:
+            await startup_investors_collection.bulk_write(investor_ops, ordered=False)
+            investor_ops.clear()
+    if investor_ops:
+        await startup_investors_collection.bulk_write(investor_ops, ordered=False)
+
+    # 2) one rollup per startup
+    pipeline = [
+        pairs,
+        {
+            "$group": {
+                "_id": "$_id.startup_id",
+                "investors": {"$sum": 1},
+                "count": {"$sum": "$count"},
+                "sum": {"$sum": "$sum"},
+                "min": {"$min": "$min"},
+                "max": {"$max": "$max"},
+            }
+        },
+    ]
+
+    seen = set()
+    startup_ops = []
+    async for row in investments_collection.aggregate(pipeline, allowDiskUse=True):
+        startup_id = row["_id"]
+        if not ObjectId.is_valid(startup_id):
+            continue
+        seen.add(startup_id)
+
+        recent = await _recent(investments_collection, startup_id)
+        startup_ops.append(
+            UpdateOne(
+                {"_id": ObjectId(startup_id)},
+                {
+                    "$set": {
+                        "total_funded": row["sum"],
+                        "funding_stats": {
+                            "investment_count": row["count"],
+                            "investor_count": row["investors"],
+                            "min_amount": row["min"],
+                            "max_amount": row["max"],
+                            "recent_investments": recent,
+                            "updated_at": datetime.utcnow(),
+                        },
+                        ROLLUP_COMPLETE: True,
+                    }
+                },
+            )
+        )
+
+        if len(startup_ops) >= batch_size:
+            await startups_collection.bulk_write(startup_ops, ordered=False)
+            startup_ops.clear()
+    if startup_ops:
+        await startups_collection.bulk_write(startup_ops, ordered=False)
+
+    # startups nobody invested in (anymore)
+    reset = await startups_collection.update_many(
+        {"_id": {"$nin": [ObjectId(s) for s in seen]}},
+        {
+            "$set": {"total_funded": 0, ROLLUP_COMPLETE: True},
+            "$unset": {"funding_stats": ""},
+        },
+    )
+    await startups_version.flush()
+    logger.info(
+        "Rebuilt funding rollups for %d startups, reset %d",
+        len(seen),
+        reset.modified_count,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        connect()
+        try:
+            await rebuild_rollups()
+        finally:
+            disconnect()
+
+    asyncio.run(main())
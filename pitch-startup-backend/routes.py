@@ -1,22 +1,62 @@
+import asyncio
 import os
 import re
 from datetime import datetime, timedelta
 from typing import List
 
-from auth import hash_password, verify_password
-from auth_dependencies import get_current_user
+from auth import hash_password_async, verify_password_async
+from auth_dependencies import (
+    get_current_user,
+    invalidate_user,
+    token_cache,
+    user_cache,
+)
 from bson import ObjectId
-from database import investments_collection, startups_collection, users_collection
+from bulk import (
+    bulk_results,
+    ingest_investments,
+    insert_chunked,
+    read_records,
+    validate_records,
+)
+from cache import MISSING, card_cache, startup_cache
+from conditional import (
+    is_not_modified,
+    make_etag,
+    not_modified,
+    startups_version,
+    validators,
+)
+from database import (
+    funding_buckets_read_collection,
+    investments_collection,
+    investments_read_collection,
+    startups_collection,
+    startups_read_collection,
+    users_collection,
+)
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, Request
+from exports import export_response, invested_at_range
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from fastapi._compat.v1 import RequestErrorModel
 from fastapi.responses import JSONResponse
 from jose import JWTError, jwt
+from leaderboard import leaderboard
+from live import (
+    live_response,
+    parse_ids,
+    publish_delete,
+    publish_funding,
+    publish_update,
+)
+from loaders import StartupLoader, get_startup_loader, parse_expand
 from models import (
+    BulkInvestmentItem,
     InvestementInDB,
     InvestmentRequest,
     LoginRequest,
     StartUpPitchCard,
+    StartUpPitchCardPage,
     StartUpPitchCreate,
     StartUpPitchPublic,
     StartUpPitchUpdate,
@@ -26,6 +66,33 @@ from models import (
     UserInDB,
     UserPublic,
 )
+from pagination import (
+    DEFAULT_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from projections import CARD_PROJECTION, DETAIL_PROJECTION, PUBLIC_PROJECTION
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from ratelimit import Admission, login_admission, register_admission
+from rollups import ROLLUP_COMPLETE, record_investment_once, stats_from_investments
+from search import search_index
+from serialization import trusted
+from similar import SIMILAR_DELTA_ROWS, SIMILAR_K, SIMILAR_PROJECTION, similar_index
+from singleflight import (
+    analytics_flight,
+    startup_flight,
+    startup_investments_flight,
+)
+from timeseries import (
+    BUCKETS_COMPLETE,
+    read_series,
+    read_series_from_investments,
+    series_range,
+)
+from trending import trending
 
 load_dotenv()
 router = APIRouter(prefix="/api")
@@ -34,6 +101,8 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS"))
+# "index" -> in-process BM25 index (search.py), "regex" -> legacy Mongo $regex scan
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "index")
 
 
 # ------------------------------
@@ -55,18 +124,104 @@ def create_refresh_token(data: dict):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# ------------------------------
+# QUERY HELPERS
+# ------------------------------
+
+
+async def _raise_not_found_or_forbidden(oid: ObjectId):
+    """An owner-filtered write matched nothing: tell 404 apart from 403."""
+    if await startups_collection.count_documents({"_id": oid}, limit=1):
+        raise HTTPException(status_code=403, detail="Not allowed")
+    raise HTTPException(status_code=404, detail="Startup not found")
+
+
+async def _load_startup(oid: ObjectId) -> dict | None:
+    """Detail document from Mongo, remembered (or its absence) in startup_cache."""
+    token = startup_cache.token()
+    startup = await startups_collection.find_one({"_id": oid}, DETAIL_PROJECTION)
+    # unless a write to it landed meanwhile
+    if startup is None:
+        startup_cache.set_missing(str(oid), since=token)
+    else:
+        startup_cache.set(str(oid), startup, since=token)
+    return startup
+
+
+async def _totals(collection, query: dict, field: str) -> tuple[float, int]:
+    """(sum of field, number of documents) matching query, computed by Mongo."""
+    pipeline = [
+        {"$match": query},
+        {"$group": {"_id": None, "total": {"$sum": f"${field}"}, "count": {"$sum": 1}}},
+    ]
+    rows = await collection.aggregate(pipeline).to_list(1)
+    if not rows:
+        return 0, 0
+    return rows[0]["total"], rows[0]["count"]
+
+
+async def _user_overview(
+    user_id: str, limit: int, loader: StartupLoader | None = None
+) -> dict:
+    """First page of a user's startups and investments plus their totals.
+
+    The four queries are independent, so they run concurrently.
+    """
+    (
+        (startups, startups_next_cursor),
+        (investments, investments_next_cursor),
+        (total_raised, startups_count),
+        (total_invested, investments_count),
+    ) = await asyncio.gather(
+        paginate(
+            startups_collection,
+            {"user_id": user_id},
+            limit=limit,
+            projection=CARD_PROJECTION,
+        ),
+        paginate(
+            investments_collection,
+            {"user_id": user_id},
+            limit=limit,
+            sort_key="invested_at",
+        ),
+        _totals(startups_collection, {"user_id": user_id}, "total_funded"),
+        _totals(investments_collection, {"user_id": user_id}, "amount"),
+    )
+
+    if loader is not None:
+        # the user's own startups are already loaded, don't fetch them again
+        for s in startups:
+            loader.prime(str(s["_id"]), s)
+        await loader.attach(investments)
+
+    return {
+        "startups": startups,
+        "startups_next_cursor": startups_next_cursor,
+        "investments": investments,
+        "investments_next_cursor": investments_next_cursor,
+        "total_raised": total_raised,
+        "startups_count": startups_count,
+        "total_invested": total_invested,
+        "investments_count": investments_count,
+    }
+
+
 # ------------------------------
 # REGISTER
 # ------------------------------
 
 
 @router.post("/register", response_model=UserPublic)
-async def register_user(user: UserCreate):
+async def register_user(
+    user: UserCreate, admission: Admission = Depends(register_admission)
+):
+    admission.check_email(user.email)
     existing = await users_collection.find_one({"email": user.email})
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
 
-    hashed = hash_password(user.password)
+    hashed = await hash_password_async(user.password)
 
     user_in_db = StoreUserCreate(
         email=user.email,
@@ -76,7 +231,12 @@ async def register_user(user: UserCreate):
         updated_at=datetime.utcnow(),
     )
 
-    await users_collection.insert_one(user_in_db.model_dump())
+    try:
+        await users_collection.insert_one(user_in_db.model_dump())
+    except DuplicateKeyError:
+        # a concurrent registration won the race to the unique email index
+        raise HTTPException(status_code=400, detail="User already exists")
+    invalidate_user(user.email)
 
     return UserPublic(email=user.email, full_name=user.full_name)
 
@@ -87,7 +247,8 @@ async def register_user(user: UserCreate):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, admission: Admission = Depends(login_admission)):
+    admission.check_email(request.email)
     user = await users_collection.find_one({"email": request.email})
     if not user:
         raise HTTPException(status_code=400, detail="Invalid username or password")
@@ -95,9 +256,19 @@ async def login(request: LoginRequest):
     user["_id"] = str(user["_id"])
     user_in_db = UserInDB(**user)
 
-    if not verify_password(request.password, user_in_db.hashed_password):
+    valid, new_hash = await verify_password_async(
+        request.password, user_in_db.hashed_password
+    )
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid username or password")
 
+    # stored hash predates the current Argon2 parameters
+    if new_hash:
+        await users_collection.update_one(
+            {"_id": ObjectId(user_in_db.id)}, {"$set": {"hashed_password": new_hash}}
+        )
+        invalidate_user(user_in_db.email)
+
     access_token = create_access_token({"sub": user_in_db.email})
     refresh_token = create_refresh_token({"sub": user_in_db.email})
 
@@ -127,47 +298,49 @@ async def login(request: LoginRequest):
 
 
 @router.get("/users/{user_id}/profile")
-async def get_user_full_profile(user_id: str):
-    """Get complete user profile with startups and investments in ONE call"""
-
-    # 1. Get user basic info
-    user = await users_collection.find_one({"_id": ObjectId(user_id)})
+async def get_user_full_profile(
+    user_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    expand: str | None = None,
+    loader: StartupLoader = Depends(get_startup_loader),
+):
+    """Get complete user profile with startups and investments in ONE call
+
+    Startups and investments are the first page of each list; their
+    `*_next_cursor` values continue on /users/{user_id}/startups and
+    /users/{user_id}/investments. `?expand=startup` embeds each
+    investment's startup card.
+    """
+    expand = parse_expand(expand)
+
+    # user lookup runs alongside the startups/investments queries
+    user, overview = await asyncio.gather(
+        users_collection.find_one({"_id": ObjectId(user_id)}),
+        _user_overview(user_id, limit, loader if "startup" in expand else None),
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # 2. Get user's startups
-    startups = await startups_collection.find({"user_id": user_id}).to_list(None)
-    for s in startups:
-        s["_id"] = str(s["_id"])
-        s["user_id"] = str(s["user_id"])
-
-    # 3. Get user's investments
-    investments = await investments_collection.find({"user_id": user_id}).to_list(None)
-    for inv in investments:
-        inv["_id"] = str(inv["_id"])
-        inv["user_id"] = str(inv["user_id"])
-        inv["startup_id"] = str(inv["startup_id"])
-
-    # 4. Calculate totals
-    total_raised = sum(s.get("total_funded", 0) for s in startups)
-    total_invested = sum(inv.get("amount", 0) for inv in investments)
-
-    return {
-        "user": {
-            "id": str(user["_id"]),
-            "email": user["email"],
-            "full_name": user["full_name"],
-            "created_at": user.get("created_at"),
-        },
-        "startups": startups,
-        "investments": investments,
-        "stats": {
-            "total_startups": len(startups),
-            "total_raised": total_raised,
-            "total_invested": total_invested,
-            "total_investments": len(investments),
-        },
-    }
+    return trusted(
+        {
+            "user": {
+                "id": user["_id"],
+                "email": user["email"],
+                "full_name": user["full_name"],
+                "created_at": user.get("created_at"),
+            },
+            "startups": overview["startups"],
+            "startups_next_cursor": overview["startups_next_cursor"],
+            "investments": overview["investments"],
+            "investments_next_cursor": overview["investments_next_cursor"],
+            "stats": {
+                "total_startups": overview["startups_count"],
+                "total_raised": overview["total_raised"],
+                "total_invested": overview["total_invested"],
+                "total_investments": overview["investments_count"],
+            },
+        }
+    )
 
 
 # ------------------------------
@@ -176,38 +349,35 @@ async def get_user_full_profile(user_id: str):
 
 
 @router.get("/dashboard")
-async def get_dashboard(current_user: UserInDB = Depends(get_current_user)):
+async def get_dashboard(
+    limit: int = DEFAULT_PAGE_SIZE,
+    expand: str | None = None,
+    loader: StartupLoader = Depends(get_startup_loader),
+    current_user: UserInDB = Depends(get_current_user),
+):
     """Get complete dashboard for logged-in user"""
 
     user_id = current_user.id
+    expand = parse_expand(expand)
 
-    # Get user's startups
-    startups = await startups_collection.find({"user_id": user_id}).to_list(None)
-    for s in startups:
-        s["_id"] = str(s["_id"])
-        s["user_id"] = str(s["user_id"])
-
-    # Get user's investments
-    investments = await investments_collection.find({"user_id": user_id}).to_list(None)
-    for inv in investments:
-        inv["_id"] = str(inv["_id"])
-        inv["user_id"] = str(inv["user_id"])
-        inv["startup_id"] = str(inv["startup_id"])
-
-    # Calculate totals
-    total_raised = sum(s.get("total_funded", 0) for s in startups)
-    total_invested = sum(inv.get("amount", 0) for inv in investments)
+    overview = await _user_overview(
+        user_id, limit, loader if "startup" in expand else None
+    )
 
-    return {
-        "my_startups": startups,
-        "my_investments": investments,
-        "total_raised": total_raised,
-        "total_invested": total_invested,
-        "stats": {
-            "startups_count": len(startups),
-            "investments_count": len(investments),
-        },
-    }
+    return trusted(
+        {
+            "my_startups": overview["startups"],
+            "my_startups_next_cursor": overview["startups_next_cursor"],
+            "my_investments": overview["investments"],
+            "my_investments_next_cursor": overview["investments_next_cursor"],
+            "total_raised": overview["total_raised"],
+            "total_invested": overview["total_invested"],
+            "stats": {
+                "startups_count": overview["startups_count"],
+                "investments_count": overview["investments_count"],
+            },
+        }
+    )
 
 
 # ------------------------------
@@ -261,26 +431,97 @@ async def create_startup(
             "updated_at": datetime.utcnow(),
             "total_funded": 0,
             "status": "pending",
+            ROLLUP_COMPLETE: True,
+            BUCKETS_COMPLETE: True,
         }
     )
 
     result = await startups_collection.insert_one(startup_data)
-    print(result)
+    startups_version.bump()
+    search_index.add(str(result.inserted_id), startup_data)
+    similar_index.add(str(result.inserted_id), startup_data)
+    leaderboard.add(str(result.inserted_id), startup_data["category"])
+    startup_cache.invalidate(str(result.inserted_id))
     return {"id": str(result.inserted_id)}
 
 
+# ------------------------------
+# BULK CREATE PITCHES
+# ------------------------------
+
+
+@router.post("/startups/bulk")
+async def create_startups_bulk(
+    request: Request, current_user: UserInDB = Depends(get_current_user)
+):
+    """Create many pitches from a JSON array or NDJSON body, one result per record"""
+
+    records = await read_records(request)
+    valid, errors = validate_records(records, StartUpPitchCreate)
+
+    now = datetime.utcnow()
+    docs = [
+        {
+            **startup.model_dump(),
+            "_id": ObjectId(),
+            "user_id": current_user.id,
+            "created_at": now,
+            "updated_at": now,
+            "total_funded": 0,
+            "status": "pending",
+            ROLLUP_COMPLETE: True,
+            BUCKETS_COMPLETE: True,
+        }
+        for _, startup in valid
+    ]
+    failed = await insert_chunked(startups_collection, docs)
+    if len(failed) < len(docs):
+        startups_version.bump()
+
+    ids = {}
+    for position, ((index, _), doc) in enumerate(zip(valid, docs)):
+        if position in failed:
+            errors[index] = failed[position]
+            continue
+        ids[index] = str(doc["_id"])
+        search_index.add(ids[index], doc)
+        leaderboard.add(ids[index], doc["category"])
+        startup_cache.invalidate(ids[index])
+
+    # about a millisecond of CPU per pitch: let other requests in between
+    created = [
+        (ids[index], doc) for (index, _), doc in zip(valid, docs) if index in ids
+    ]
+    for start in range(0, len(created), SIMILAR_DELTA_ROWS):
+        similar_index.add_many(created[start : start + SIMILAR_DELTA_ROWS])
+        await asyncio.sleep(0)
+
+    return bulk_results(len(records), ids, errors)
+
+
 # ------------------------------
 # GET ALL STARTUPS
 # ------------------------------
 
 
-@router.get("/startups", response_model=List[StartUpPitchCard])
-async def get_all_startups():
-    startups = await startups_collection.find().to_list(100)
-    for s in startups:
-        s["_id"] = str(s["_id"])  # convert ObjectId → string
-        s["user_id"] = str(s["user_id"])  # do same for user_id if needed
-    return startups
+@router.get("/startups", response_model=StartUpPitchCardPage)
+async def get_all_startups(
+    request: Request, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None
+):
+    # any write to the collection changes the version, so this is a full page
+    etag = make_etag(await startups_version.current(), limit, cursor)
+    headers = validators("startups", etag)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+
+    startups, next_cursor = await paginate(
+        startups_read_collection,
+        {},
+        limit=limit,
+        cursor=cursor,
+        projection=CARD_PROJECTION,
+    )
+    return trusted({"items": startups, "next_cursor": next_cursor}, headers=headers)
 
 
 # ------------------------------
@@ -288,14 +529,92 @@ async def get_all_startups():
 # ------------------------------
 
 
-@router.get("/users/{user_id}/startups", response_model=List[StartUpPitchCard])
-async def get_all_startups_of_user(user_id: str):
-    startups = await startups_collection.find({"user_id": user_id}).to_list(100)
-    for s in startups:
-        # s["id"] = str(s["_id"])
-        s["_id"] = str(s["_id"])  # convert ObjectId → string
-        s["user_id"] = str(s["user_id"])  # do same for user_id if needed
-    return startups
+@router.get("/users/{user_id}/startups", response_model=StartUpPitchCardPage)
+async def get_all_startups_of_user(
+    user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None
+):
+    startups, next_cursor = await paginate(
+        startups_read_collection,
+        {"user_id": user_id},
+        limit=limit,
+        cursor=cursor,
+        projection=CARD_PROJECTION,
+    )
+    return trusted({"items": startups, "next_cursor": next_cursor})
+
+
+# ------------------------------
+# TRENDING AND TOP FUNDED
+# (registered before /startups/{startup_id} so the path parameter doesn't
+# swallow them)
+# ------------------------------
+
+
+@router.get("/startups/trending", response_model=List[StartUpPitchCard])
+async def get_trending_startups(limit: int = 10):
+    # ranked in memory by time-decayed investment volume (trending.py)
+    hot = trending.top(clamp_limit(limit))
+    ids = [ObjectId(startup_id) for startup_id, _ in hot]
+
+    docs = await startups_read_collection.find(
+        {"_id": {"$in": ids}}, CARD_PROJECTION
+    ).to_list(len(ids))
+    by_id = {str(d["_id"]): d for d in docs}
+    startups = [by_id[startup_id] for startup_id, _ in hot if startup_id in by_id]
+
+    return trusted(startups)
+
+
+@router.get("/startups/top-funded", response_model=List[StartUpPitchCard])
+async def get_top_funded_startups(limit: int = 10, category: str | None = None):
+    # ranked in memory (leaderboard.py); cards only change when edited
+    top = leaderboard.top(clamp_limit(limit), category)
+    cards = await _cards([startup_id for startup_id, _ in top])
+    startups = [
+        dict(cards[startup_id], total_funded=total)
+        for startup_id, total in top
+        if startup_id in cards
+    ]
+
+    return trusted(startups)
+
+
+async def _cards(startup_ids: list[str]) -> dict[str, dict]:
+    """Card documents by id, from card_cache or one $in query for the rest."""
+    cards, missing = {}, []
+    for startup_id in startup_ids:
+        card = card_cache.get(startup_id)
+        if card is MISSING:
+            missing.append(ObjectId(startup_id))
+        else:
+            cards[startup_id] = card
+    if missing:
+        async for doc in startups_read_collection.find(
+            {"_id": {"$in": missing}}, CARD_PROJECTION
+        ):
+            startup_id = str(doc["_id"])
+            card_cache.set(startup_id, doc)
+            cards[startup_id] = doc
+    return cards
+
+
+# ------------------------------
+# LIVE FUNDING (Server-Sent Events)
+# ------------------------------
+
+
+@router.get("/startups/live")
+async def live_startups(ids: str):
+    """Live funding events for a list of cards: `?ids=<id>,<id>,...`"""
+    return await live_response(startups_collection, parse_ids(ids))
+
+
+@router.get("/startups/{startup_id}/live")
+async def live_startup(startup_id: str):
+    """Live funding events for one pitch page; ends when the startup is deleted"""
+    if not ObjectId.is_valid(startup_id):
+        raise HTTPException(status_code=400, detail="Invalid startup ID")
+    return await live_response(startups_collection, [startup_id])
 
 
 # ------------------------------
@@ -308,23 +627,39 @@ async def get_all_startups_of_user(user_id: str):
     response_model=StartUpPitchPublic,
     response_model_by_alias=False,
 )
-async def get_startup(startup_id: str):
+async def get_startup(startup_id: str, request: Request):
     # convert string → ObjectId
     try:
         oid = ObjectId(startup_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid startup ID")
 
-    startup = await startups_collection.find_one({"_id": oid})
+    # read-through cache, None means a cached 404
+    startup = startup_cache.get(str(oid))
+    if startup is MISSING:
+        # concurrent misses for the same id share one query
+        startup = await startup_flight.do(str(oid), _load_startup, oid)
 
     if startup is None:
         raise HTTPException(status_code=404, detail="Startup not found")
 
-    # convert ObjectId → str
-    startup["_id"] = str(startup["_id"])
-    startup["user_id"] = str(startup["user_id"])
+    # total_funded moves on every investment without touching updated_at
+    last_modified = startup["updated_at"]
+    funded_at = startup.get("funding_stats", {}).get("updated_at")
+    if funded_at and funded_at > last_modified:
+        last_modified = funded_at
+    etag = make_etag(
+        startup["_id"], startup["updated_at"].isoformat(), startup["total_funded"]
+    )
+    headers = validators("startup", etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
 
-    return startup
+    # response_model_by_alias=False: the id goes out as "id", not "_id"
+    public = dict(startup, id=startup["_id"])
+    del public["_id"]
+    public.pop("funding_stats", None)
+    return trusted(public, headers=headers)
 
 
 # ------------------------------
@@ -343,27 +678,32 @@ async def update_startup(
     except:
         raise HTTPException(status_code=400, detail="Invalid startup ID")
 
-    # 1) Get existing startup
-    existing = await startups_collection.find_one({"_id": oid})
-    if existing is None:
-        raise HTTPException(status_code=404, detail="Startup not found")
-
-    # 2) Make sure the logged-in user owns this startup
-    if str(existing["user_id"]) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Not allowed")
-
-    # 3) Get only fields user sent
+    # 1) Get only fields user sent
     update_data = startup.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
 
-    # 4) Update DB
-    await startups_collection.update_one({"_id": oid}, {"$set": update_data})
-
-    # 5) Fetch updated document
-    updated = await startups_collection.find_one({"_id": oid})
+    # 2) Update only if the logged-in user owns it, getting the new version back
+    updated = await startups_collection.find_one_and_update(
+        {"_id": oid, "user_id": current_user.id},
+        {"$set": update_data},
+        projection=PUBLIC_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    if updated is None:
+        await _raise_not_found_or_forbidden(oid)
+    startups_version.bump()
 
     updated["_id"] = str(updated["_id"])
     updated["user_id"] = str(updated["user_id"])
+    search_index.add(updated["_id"], updated)
+    similar_index.add(updated["_id"], updated)
+    if "category" in update_data:
+        leaderboard.set_category(updated["_id"], updated["category"])
+    card_cache.invalidate(updated["_id"])
+    startup_cache.mark_written(updated["_id"])
+    startup_cache.set(updated["_id"], updated)
+    startup_flight.forget(updated["_id"])
+    publish_update(updated)
 
     return updated
 
@@ -383,17 +723,24 @@ async def delete_startup(
     except:
         raise HTTPException(status_code=400, detail="Invalid startup ID")
 
-    # 1) Get existing startup
-    existing = await startups_collection.find_one({"_id": oid})
-    if existing is None:
-        raise HTTPException(status_code=404, detail="Startup not found")
-
-    # 2) Make sure the logged-in user owns this startup
-    if str(existing["user_id"]) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Not allowed")
-
-    # 3) Delete startup
-    await startups_collection.delete_one({"_id": oid})
+    # 1) Delete only if the logged-in user owns it
+    deleted = await startups_collection.find_one_and_delete(
+        {"_id": oid, "user_id": current_user.id}, projection={"_id": 1}
+    )
+    if deleted is None:
+        await _raise_not_found_or_forbidden(oid)
+    startups_version.bump()
+
+    search_index.remove(startup_id)
+    similar_index.remove(startup_id)
+    trending.remove_startup(startup_id)
+    leaderboard.remove(startup_id)
+    card_cache.invalidate(startup_id)
+    startup_flight.forget(startup_id)
+    analytics_flight.forget(startup_id)
+    publish_delete(startup_id)
+    startup_cache.mark_written(str(oid))
+    startup_cache.set_missing(str(oid))
 
     return {"message": "Startup deleted"}
 
@@ -401,13 +748,18 @@ async def delete_startup(
 # ------------------------------
 # INVEST IN A PITCH
 # ------------------------------
-#
+
+
 @router.post("/startups/{startup_id}/invest")
 async def invest(
     startup_id: str,
     data: InvestmentRequest,
+    idempotency_key: str | None = Header(None),
     current_user: UserInDB = Depends(get_current_user),
 ):
+    if not ObjectId.is_valid(startup_id):
+        raise HTTPException(status_code=400, detail="Invalid startup ID")
+
     amount = data.amount
     user_id = current_user.id
     invested_at = datetime.utcnow()
@@ -418,14 +770,39 @@ async def invest(
         "amount": amount,
         "invested_at": invested_at,
     }
+    if idempotency_key:
+        investment_doc["idempotency_key"] = idempotency_key
 
-    result = await investments_collection.insert_one(investment_doc)
-    if result.inserted_id:
-        await startups_collection.update_one(
-            {"_id": ObjectId(startup_id)}, {"$inc": {"total_funded": amount}}
+    try:
+        # insert + $inc total_funded and the funding_stats rollup
+        applied = await record_investment_once(investment_doc)
+    except DuplicateKeyError:
+        # a retry of an investment we already counted: replay it
+        investment_doc = await investments_collection.find_one(
+            {"user_id": user_id, "idempotency_key": idempotency_key}
         )
-
-        # Convert Mongo ObjectIds → strings
+        if investment_doc is None or investment_doc["startup_id"] != startup_id:
+            raise HTTPException(status_code=409, detail="Idempotency key already used")
+        applied = False
+    else:
+        if not applied:
+            raise HTTPException(status_code=404, detail="Startup not found")
+
+    if applied:
+        startups_version.bump()
+        trending.add(startup_id, amount, invested_at, investment_doc["_id"])
+        leaderboard.fund(startup_id, amount)
+        # keep a cached detail page in step with the $inc
+        cached = startup_cache.peek(startup_id)
+        if cached:
+            cached["total_funded"] = cached.get("total_funded", 0) + amount
+            cached["funding_stats"] = {"updated_at": invested_at}
+        startup_cache.mark_written(startup_id)
+        startup_flight.forget(startup_id)
+        analytics_flight.forget(startup_id)
+        await publish_funding([startup_id])
+
+    # Convert Mongo ObjectIds → strings
     investment_doc["_id"] = str(investment_doc["_id"])
     investment_doc["user_id"] = str(investment_doc["user_id"])
     investment_doc["startup_id"] = str(investment_doc["startup_id"])
@@ -433,23 +810,75 @@ async def invest(
     return InvestementInDB(**investment_doc)
 
 
+# ------------------------------
+# BULK INVEST
+# ------------------------------
+
+
+@router.post("/investments/bulk")
+async def invest_bulk(
+    request: Request, current_user: UserInDB = Depends(get_current_user)
+):
+    """Record many investments from a JSON array or NDJSON body, one result per record
+
+    Each record is {"startup_id", "amount", "idempotency_key"?}; records whose
+    idempotency key was already used are reported as failed and not counted.
+    """
+
+    records = await read_records(request)
+    valid, errors = validate_records(records, BulkInvestmentItem)
+    failed, inserted = await ingest_investments(valid, current_user.id)
+    errors.update(failed)
+    if inserted:
+        startups_version.bump()
+
+    ids = {}
+    for index, doc in inserted.items():
+        ids[index] = str(doc["_id"])
+        trending.add(doc["startup_id"], doc["amount"], doc["invested_at"], doc["_id"])
+        leaderboard.fund(doc["startup_id"], doc["amount"])
+
+    funded = {doc["startup_id"] for doc in inserted.values()}
+    for startup_id in funded:
+        startup_cache.invalidate(startup_id)
+        startup_flight.forget(startup_id)
+        analytics_flight.forget(startup_id)
+    await publish_funding(funded)
+
+    return bulk_results(len(records), ids, errors)
+
+
 # ------------------------------
 # SEE ALL INVESTMENT HISTORY OF THE USER
 # ------------------------------
 
 
 @router.get("/users/{user_id}/investments")
-async def get_user_investments(user_id: str):
-    """Get investments of any user by their ID"""
-
-    investments = await investments_collection.find({"user_id": user_id}).to_list(None)
+async def get_user_investments(
+    user_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    expand: str | None = None,
+    loader: StartupLoader = Depends(get_startup_loader),
+):
+    """Get investments of any user by their ID, newest first
+
+    `?expand=startup` embeds each investment's startup card.
+    """
+    expand = parse_expand(expand)
+
+    investments, next_cursor = await paginate(
+        investments_read_collection,
+        {"user_id": user_id},
+        limit=limit,
+        cursor=cursor,
+        sort_key="invested_at",
+    )
 
-    for investment in investments:
-        investment["_id"] = str(investment["_id"])
-        investment["user_id"] = str(investment["user_id"])
-        investment["startup_id"] = str(investment["startup_id"])
+    if "startup" in expand:
+        await loader.attach(investments)
 
-    return investments
+    return trusted({"items": investments, "next_cursor": next_cursor})
 
 
 # ------------------------------
@@ -458,24 +887,78 @@ async def get_user_investments(user_id: str):
 
 
 @router.get("/startups/{startup_id}/investments")
-async def get_startup_investments(startup_id: str):
-    """Get all investments made to a specific startup"""
+async def get_startup_investments(
+    startup_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None
+):
+    """Get investments made to a specific startup, newest first"""
 
     try:
         ObjectId(startup_id)  # Validate
     except:
         raise HTTPException(status_code=400, detail="Invalid startup ID")
 
-    investments = await investments_collection.find({"startup_id": startup_id}).to_list(
-        None
+    investments, next_cursor = await startup_investments_flight.do(
+        (startup_id, limit, cursor),
+        paginate,
+        investments_read_collection,
+        {"startup_id": startup_id},
+        limit=limit,
+        cursor=cursor,
+        sort_key="invested_at",
     )
 
-    for inv in investments:
-        inv["_id"] = str(inv["_id"])
-        inv["user_id"] = str(inv["user_id"])
-        inv["startup_id"] = str(inv["startup_id"])
+    return trusted({"items": investments, "next_cursor": next_cursor})
+
+
+# ------------------------------
+# EXPORT INVESTMENT HISTORY (streamed)
+# ------------------------------
+
+
+@router.get("/users/{user_id}/investments/export")
+async def export_user_investments(
+    request: Request,
+    user_id: str,
+    format: str = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Every investment of a user as NDJSON or CSV, oldest first"""
+
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+
+    query = {"user_id": user_id, **invested_at_range(since, until)}
+    return export_response(
+        request,
+        investments_read_collection,
+        query,
+        format,
+        f"investments-user-{user_id}",
+    )
+
+
+@router.get("/startups/{startup_id}/investments/export")
+async def export_startup_investments(
+    request: Request,
+    startup_id: str,
+    format: str = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Every investment in a startup as NDJSON or CSV, oldest first"""
+
+    if not ObjectId.is_valid(startup_id):
+        raise HTTPException(status_code=400, detail="Invalid startup ID")
 
-    return investments
+    query = {"startup_id": startup_id, **invested_at_range(since, until)}
+    return export_response(
+        request,
+        investments_read_collection,
+        query,
+        format,
+        f"investments-startup-{startup_id}",
+    )
 
 
 # ------------------------------
@@ -492,113 +975,207 @@ async def get_startup_analytics(startup_id: str):
     except:
         raise HTTPException(status_code=400, detail="Invalid startup ID")
 
-    # Get startup
-    startup = await startups_collection.find_one({"_id": oid})
+    # Get startup with its funding rollup (maintained by invest)
+    startup = await analytics_flight.do(
+        startup_id,
+        startups_read_collection.find_one,
+        {"_id": oid},
+        {"total_funded": 1, "funding_goal": 1, "funding_stats": 1, ROLLUP_COMPLETE: 1},
+    )
     if not startup:
         raise HTTPException(status_code=404, detail="Startup not found")
 
-    # Get all investments
-    investments = await investments_collection.find({"startup_id": startup_id}).to_list(
-        None
-    )
-
     # Calculate analytics
+    stats = startup.get("funding_stats", {})
+    if not startup.get(ROLLUP_COMPLETE):
+        # from before rollups and `python -m rollups` hasn't run yet
+        stats = await stats_from_investments(investments_read_collection, startup_id)
     total_funded = startup.get("total_funded", 0)
     funding_goal = startup.get("funding_goal", 0)
-    investor_count = len(investments)
     funding_progress = (total_funded / funding_goal * 100) if funding_goal > 0 else 0
 
-    # Recent investments (last 5)
-    recent_investments = sorted(
-        investments, key=lambda x: x.get("invested_at", datetime.utcnow()), reverse=True
-    )[:5]
+    # Recent investments (last RECENT_INVESTMENTS, newest first)
+    # copies: the document may be shared with concurrent requests
+    recent_investments = [
+        dict(inv, startup_id=startup_id) for inv in stats.get("recent_investments", [])
+    ]
 
-    for inv in recent_investments:
-        inv["_id"] = str(inv["_id"])
-        inv["user_id"] = str(inv["user_id"])
-        inv["startup_id"] = str(inv["startup_id"])
+    return trusted(
+        {
+            "startup_id": startup_id,
+            "total_funded": total_funded,
+            "funding_goal": funding_goal,
+            "investor_count": stats.get("investor_count", 0),
+            "investment_count": stats.get("investment_count", 0),
+            "min_investment": stats.get("min_amount"),
+            "max_investment": stats.get("max_amount"),
+            "funding_progress": round(funding_progress, 2),
+            "recent_investments": recent_investments,
+        }
+    )
 
-    return {
-        "startup_id": startup_id,
-        "total_funded": total_funded,
-        "funding_goal": funding_goal,
-        "investor_count": investor_count,
-        "funding_progress": round(funding_progress, 2),
-        "recent_investments": recent_investments,
-    }
 
+@router.get("/startups/{startup_id}/analytics/timeseries")
+async def get_startup_funding_timeseries(
+    startup_id: str,
+    resolution: str = "day",
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Funding per hour or day (sum and count), from the pre-aggregated buckets"""
 
-# ------------------------------
-# SEARCH AND FILTER STARTUPS
-# ------------------------------
+    if not ObjectId.is_valid(startup_id):
+        raise HTTPException(status_code=400, detail="Invalid startup ID")
+    since, until = series_range(resolution, since, until)
+
+    startup, points = await asyncio.gather(
+        startups_read_collection.find_one(
+            {"_id": ObjectId(startup_id)}, {BUCKETS_COMPLETE: 1}
+        ),
+        read_series(
+            funding_buckets_read_collection, startup_id, resolution, since, until
+        ),
+    )
+    if startup is None:
+        raise HTTPException(status_code=404, detail="Startup not found")
+    if not startup.get(BUCKETS_COMPLETE):
+        # from before buckets and `python -m timeseries` hasn't run yet
+        points = await read_series_from_investments(
+            investments_read_collection, startup_id, resolution, since, until
+        )
 
+    return trusted(
+        {
+            "startup_id": startup_id,
+            "resolution": resolution,
+            "since": since,
+            "until": until,
+            "points": points,
+        }
+    )
 
-@router.get("/search")
-async def search_startups(
-    q: str | None = None,
-    category: str | None = None,
-):
-    query = {}
-    if q:
-        query["$or"] = [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"description": {"$regex": q, "$options": "i"}},
-            {"pitch": {"$regex": q, "$options": "i"}},
-        ]
 
-    if category:
-        query["category"] = category
+# ------------------------------
+# SIMILAR STARTUPS
+# ------------------------------
 
-    startups = await startups_collection.find(query).limit(50).to_list(50)
 
-    for s in startups:
-        s["_id"] = str(s["_id"])
-        s["user_id"] = str(s["user_id"])
+@router.get("/startups/{startup_id}/similar", response_model=List[StartUpPitchCard])
+async def get_similar_startups(startup_id: str, limit: int = SIMILAR_K):
+    """Pitches closest in content (TF-IDF cosine), most similar first"""
 
-    return startups
+    if not ObjectId.is_valid(startup_id):
+        raise HTTPException(status_code=400, detail="Invalid startup ID")
 
+    if not similar_index.built:
+        return trusted([])  # still building after startup
+    if startup_id not in similar_index:
+        # created through another worker since the last rebuild, or missing
+        doc = await startups_read_collection.find_one(
+            {"_id": ObjectId(startup_id)}, SIMILAR_PROJECTION
+        )
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Startup not found")
+        similar_index.add(startup_id, doc)
 
-@router.get("/startups/trending")
-async def get_trending_startups():
-    pipeline = [
-        {"$sort": {"timestamp": -1}},  # latest investments first
-        {"$group": {"_id": "$startup_id"}},  # unique startups
-        {"$limit": 10},
-    ]
+    # neighbours are precomputed (similar.py); cards come from card_cache
+    neighbours = similar_index.similar(startup_id, clamp_limit(limit))
+    cards = await _cards([neighbour for neighbour, _ in neighbours])
+    startups = []
+    for neighbour, _ in neighbours:
+        if neighbour in cards:
+            total = leaderboard.total(neighbour)
+            card = cards[neighbour]
+            startups.append(card if total is None else dict(card, total_funded=total))
 
-    recent = await investments_collection.aggregate(pipeline).to_list(10)
-    ids = [r["_id"] for r in recent]
+    return trusted(startups)
 
-    startups = await startups_collection.find({"_id": {"$in": ids}}).to_list(10)
 
-    for s in startups:
-        s["_id"] = str(s["_id"])
-        s["user_id"] = str(s["user_id"])
+# ------------------------------
+# SEARCH AND FILTER STARTUPS
+# ------------------------------
 
-    return startups
 
+@router.get("/search", response_model=StartUpPitchCardPage)
+async def search_startups(
+    q: str | None = None,
+    category: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    next_cursor = None
+    if q and q.strip() and SEARCH_BACKEND == "index":
+        # ranked ids come from memory, Mongo only fetches the hits by _id
+        after = None
+        if cursor:
+            values = decode_cursor(cursor)
+            if (
+                len(values) != 2
+                or not isinstance(values[0], (int, float))
+                or isinstance(values[0], bool)
+                or not isinstance(values[1], ObjectId)
+            ):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            score, last_id = values
+            after = (score, str(last_id))
+        limit = clamp_limit(limit)
+        hits = search_index.search(q, category=category, limit=limit + 1, after=after)
+        if len(hits) > limit:
+            hits = hits[:limit]
+            last_id, score = hits[-1]
+            next_cursor = encode_cursor(score, ObjectId(last_id))
+
+        ids = [ObjectId(doc_id) for doc_id, _ in hits]
+        docs = await startups_read_collection.find(
+            {"_id": {"$in": ids}}, CARD_PROJECTION
+        ).to_list(len(ids))
+        by_id = {str(d["_id"]): d for d in docs}
+        startups = [by_id[doc_id] for doc_id, _ in hits if doc_id in by_id]
+    else:
+        query = {}
+        if q:
+            query["$or"] = [
+                {"title": {"$regex": q, "$options": "i"}},
+                {"description": {"$regex": q, "$options": "i"}},
+                {"pitch": {"$regex": q, "$options": "i"}},
+            ]
+
+        if category:
+            query["category"] = category
+
+        startups, next_cursor = await paginate(
+            startups_read_collection,
+            query,
+            limit=limit,
+            cursor=cursor,
+            projection=CARD_PROJECTION,
+        )
+
+    return trusted({"items": startups, "next_cursor": next_cursor})
 
-@router.get("/startups/top-funded")
-async def get_top_funded_startups(limit: int = 10):
-    startups = (
-        await startups_collection.find({})
-        .sort("total_funded", -1)
-        .limit(limit)
-        .to_list(limit)
-    )
 
-    for s in startups:
-        s["_id"] = str(s["_id"])
-        s["user_id"] = str(s["user_id"])
+@router.get("/categories")
+async def get_categories(request: Request):
+    # counted in memory (leaderboard.py), so the tag is the counts themselves
+    counts = leaderboard.categories()
+    etag = make_etag("categories", *counts.items())
+    headers = validators("categories", etag)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
 
-    return startups
+    return trusted({"categories": list(counts), "counts": counts}, headers=headers)
 
 
-@router.get("/categories")
-async def get_categories():
-    pipeline = [{"$group": {"_id": "$category"}}, {"$sort": {"_id": 1}}]
+# ------------------------------
+# CACHE STATS
+# ------------------------------
 
-    items = await startups_collection.aggregate(pipeline).to_list(None)
-    categories = [item["_id"] for item in items if item["_id"]]
 
-    return {"categories": categories}
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "startups": startup_cache.stats(),
+        "cards": card_cache.stats(),
+        "auth_tokens": token_cache.stats(),
+        "auth_users": user_cache.stats(),
+    }
@@ -0,0 +1,267 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# title matches count three times as much as a pitch body match
+FIELD_BOOSTS = {"title": 3.0, "description": 2.0, "pitch": 1.0}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# how many vocabulary terms a type-ahead prefix may expand to
+MAX_PREFIX_EXPANSIONS = 50
+
+# full rebuilds pick up pitches created or edited through other workers
+SEARCH_REFRESH_SECONDS = int(os.getenv("SEARCH_REFRESH_SECONDS", 600))
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """In-memory inverted index over startup title, description and pitch.
+
+    Documents are keyed by their string id. Scoring is BM25 per field,
+    weighted by FIELD_BOOSTS and summed. All query terms must match; the last
+    term also matches as a prefix unless the query ends in whitespace, which
+    is what a search box needs while the user is still typing.
+
+    The routes keep it current for their own writes; `run_refresh` rebuilds
+    it every SEARCH_REFRESH_SECONDS so other workers' writes show up too.
+    """
+
+    def __init__(self, boosts: dict[str, float] = FIELD_BOOSTS):
+        self.boosts = boosts
+        self._reset()
+
+    def _reset(self):
+        # field -> term -> {doc_id: term frequency}
+        self.postings = {field: defaultdict(dict) for field in self.boosts}
+        # field -> doc_id -> number of tokens
+        self.lengths = {field: {} for field in self.boosts}
+        self.total_lengths = {field: 0 for field in self.boosts}
+        self.categories = {}
+        # doc_id -> field -> Counter, kept so a document can be removed
+        self.doc_terms = {}
+        # term -> number of documents with it in any field
+        self.doc_freq = Counter()
+        # sorted list of every indexed term, for prefix lookups
+        self.vocabulary = []
+        # edits made while a rebuild runs, replayed onto its result
+        self._log = None
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_terms
+
+    # ------------------------------
+    # MAINTENANCE
+    # ------------------------------
+
+    def add(self, doc_id: str, doc: dict):
+        """Index a document, replacing any previous version of it."""
+        if self._log is not None:
+            self._log.append((doc_id, doc))
+        self._remove(doc_id)
+
+        terms = {}
+        for field in self.boosts:
+            counts = Counter(tokenize(doc.get(field)))
+            terms[field] = counts
+            postings = self.postings[field]
+            for term, tf in counts.items():
+                postings[term][doc_id] = tf
+            self.lengths[field][doc_id] = sum(counts.values())
+            self.total_lengths[field] += self.lengths[field][doc_id]
+
+        for term in set().union(*terms.values()):
+            if not self.doc_freq[term]:
+                insort(self.vocabulary, term)
+            self.doc_freq[term] += 1
+        self.doc_terms[doc_id] = terms
+        self.categories[doc_id] = doc.get("category")
+
+    def remove(self, doc_id: str):
+        if self._log is not None:
+            self._log.append((doc_id, None))
+        self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for field, counts in terms.items():
+            postings = self.postings[field]
+            for term in counts:
+                docs = postings[term]
+                docs.pop(doc_id, None)
+                if not docs:
+                    del postings[term]
+            self.total_lengths[field] -= self.lengths[field].pop(doc_id, 0)
+
+        for term in set().union(*terms.values()):
+            self.doc_freq[term] -= 1
+            if not self.doc_freq[term]:
+                del self.doc_freq[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+        self.categories.pop(doc_id, None)
+
+    @classmethod
+    def build(cls, docs: list[tuple[str, dict]], boosts=FIELD_BOOSTS):
+        index = cls(boosts)
+        for doc_id, doc in docs:
+            index.add(doc_id, doc)
+        return index
+
+    async def rebuild(self, collection):
+        """Rebuild the whole index from Mongo in a worker thread and swap it in."""
+        projection = {field: 1 for field in self.boosts}
+        projection["category"] = 1
+        # log from before the scan: it may already have passed an edited pitch
+        self._log = []
+        try:
+            docs = [
+                (str(doc["_id"]), doc) async for doc in collection.find({}, projection)
+            ]
+            fresh = await asyncio.to_thread(self.build, docs, self.boosts)
+            log = self._log
+        finally:
+            self._log = None
+        self.__dict__.update(fresh.__dict__)
+        for doc_id, doc in log:
+            if doc is None:
+                self.remove(doc_id)
+            else:
+                self.add(doc_id, doc)
+        logger.info(
+            "Search index rebuilt: %d startups, %d edits replayed", len(self), len(log)
+        )
+
+    async def run_refresh(self, collection, interval=SEARCH_REFRESH_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebuild(collection)
+            except Exception:
+                logger.exception("Search index refresh failed")
+
+    # ------------------------------
+    # QUERYING
+    # ------------------------------
+
+    def expand_prefix(self, prefix: str) -> list[str]:
+        i = bisect_left(self.vocabulary, prefix)
+        matches = []
+        while (
+            i < len(self.vocabulary)
+            and self.vocabulary[i].startswith(prefix)
+            and len(matches) < MAX_PREFIX_EXPANSIONS
+        ):
+            matches.append(self.vocabulary[i])
+            i += 1
+        return matches
+
+    def _term_scores(self, term: str, candidates=None) -> dict[str, float]:
+        """BM25 contribution of one term, summed over the boosted fields.
+
+        With `candidates`, only those documents are scored, which keeps an
+        AND query proportional to its rarest term.
+        """
+        df = self.doc_freq.get(term, 0)
+        if not df:
+            return {}
+
+        n = len(self.doc_terms)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+        scores = defaultdict(float)
+        for field, boost in self.boosts.items():
+            postings = self.postings[field].get(term)
+            if not postings:
+                continue
+            if candidates is not None and len(candidates) < len(postings):
+                matches = ((d, postings[d]) for d in candidates if d in postings)
+            else:
+                matches = postings.items()
+            avg_len = self.total_lengths[field] / n or 1
+            lengths = self.lengths[field]
+            for doc_id, tf in matches:
+                norm = K1 * (1 - B + B * lengths[doc_id] / avg_len)
+                scores[doc_id] += boost * idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def search(
+        self,
+        q: str,
+        category: str | None = None,
+        limit: int = 50,
+        after: tuple[float, str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """Return up to `limit` (doc_id, score) pairs, best first.
+
+        `after` is the (score, doc_id) of the last hit of the previous page.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+
+        groups = [[token] for token in tokens]
+        if not q[-1].isspace():
+            groups[-1] = self.expand_prefix(tokens[-1]) or [tokens[-1]]
+        # rarest group first so every later group only scores survivors
+        groups.sort(key=lambda group: sum(self.doc_freq.get(t, 0) for t in group))
+
+        total = None
+        for group in groups:
+            # a prefix group scores as its best matching expansion
+            group_scores = {}
+            for term in group:
+                for doc_id, score in self._term_scores(term, total).items():
+                    if score > group_scores.get(doc_id, 0):
+                        group_scores[doc_id] = score
+
+            if total is None:
+                total = group_scores
+            else:
+                total = {
+                    doc_id: score + group_scores[doc_id]
+                    for doc_id, score in total.items()
+                    if doc_id in group_scores
+                }
+            if not total:
+                return []
+
+        if category is not None:
+            total = {
+                doc_id: score
+                for doc_id, score in total.items()
+                if self.categories.get(doc_id) == category
+            }
+
+        if after is not None:
+            total = {
+                doc_id: score
+                for doc_id, score in total.items()
+                if (score, doc_id) < after
+            }
+
+        return heapq.nlargest(limit, total.items(), key=lambda item: (item[1], item[0]))
+
+
+search_index = SearchIndex()
@@ -0,0 +1,50 @@
+"""JSON responses straight from Mongo documents.
+
+ObjectId and datetime are handled by the encoder, so routes no longer walk
+their results converting `_id`s to strings. Uses orjson when it is
+installed and falls back to the stdlib encoder otherwise.
+
+Routes whose documents already have the shape of their response model
+(thanks to projections.py) return `trusted(...)`: FastAPI sends a returned
+Response as is, skipping response_model validation and jsonable_encoder,
+while the declared response_model still documents the route in OpenAPI.
+"""
+
+import json
+from datetime import date, datetime
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def bson_default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=bson_default)
+    return json.dumps(
+        content, default=bson_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class BSONResponse(JSONResponse):
+    """JSONResponse that also understands ObjectId and renders with orjson."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def trusted(content, status_code: int = 200, headers: dict | None = None):
+    """Send documents without re-validating them against the response model."""
+    return BSONResponse(content, status_code=status_code, headers=headers)
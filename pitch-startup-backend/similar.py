@@ -0,0 +1,370 @@
+"""Similar pitches: TF-IDF over title, description, pitch and category.
+
+`rebuild` vectorizes every startup into a sparse, L2-normalised TF-IDF
+matrix, keeping each pitch's SIMILAR_MAX_TERMS strongest terms, and
+precomputes each one's SIMILAR_K nearest neighbours by cosine similarity a
+block of rows at a time: one sparse product per block, each row's top
+SIMILAR_K picked with argpartition. It runs in a thread, first at startup
+(the route answers with an empty list until it finishes); the numeric part
+releases the GIL, tokenizing doesn't, so requests slow down somewhat
+meanwhile.
+
+Between rebuilds the routes keep it current: a created or edited pitch is
+scored against every other one (a sparse product over the columns of its
+own terms) and offered to their neighbour lists; a deleted one is masked
+out and dropped from them. IDF weights stay those of the last rebuild, and
+a list that loses a deleted neighbour stays one short until the next
+rebuild (every SIMILAR_REFRESH_SECONDS, which also picks up other workers'
+edits).
+"""
+
+import asyncio
+import logging
+import math
+import os
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+from search import tokenize
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_K = int(os.getenv("SIMILAR_K", 10))
+SIMILAR_REFRESH_SECONDS = int(os.getenv("SIMILAR_REFRESH_SECONDS", 3600))
+# similarity scores held in memory at once while rebuilding (float32)
+SIMILAR_BLOCK_SCORES = int(os.getenv("SIMILAR_BLOCK_SCORES", 1 << 24))
+# pitches added since the last rebuild are kept apart, then merged
+SIMILAR_DELTA_ROWS = int(os.getenv("SIMILAR_DELTA_ROWS", 256))
+# terms in more than this share of pitches say nothing about similarity
+SIMILAR_MAX_DF = float(os.getenv("SIMILAR_MAX_DF", 0.5))
+# a pitch is represented by its strongest terms only, which keeps the
+# all-pairs product sparse
+SIMILAR_MAX_TERMS = int(os.getenv("SIMILAR_MAX_TERMS", 32))
+
+# a field's tokens count this many times
+FIELD_WEIGHTS = {"title": 2, "description": 1, "pitch": 1, "category": 2}
+SIMILAR_PROJECTION = {field: 1 for field in FIELD_WEIGHTS}
+
+
+def _term_counts(doc: dict) -> Counter:
+    tokens = []
+    for field, weight in FIELD_WEIGHTS.items():
+        tokens += tokenize(doc.get(field)) * weight
+    return Counter(tokens)
+
+
+def _count(counts: Counter, terms: dict) -> tuple[np.ndarray, np.ndarray]:
+    """(columns, term frequencies), giving unseen terms the next columns."""
+    new = [term for term in counts if term not in terms]
+    terms.update(zip(new, range(len(terms), len(terms) + len(new))))
+    return (
+        np.fromiter(map(terms.__getitem__, counts), np.int32, len(counts)),
+        np.fromiter(counts.values(), np.float32, len(counts)),
+    )
+
+
+def _weigh(
+    columns: np.ndarray, tf: np.ndarray, idf: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Normalised TF-IDF of a pitch's terms, strongest SIMILAR_MAX_TERMS only."""
+    weights = (1 + np.log(tf, dtype=np.float32)) * idf[columns]
+    if len(weights) > SIMILAR_MAX_TERMS:
+        strongest = np.argpartition(weights, -SIMILAR_MAX_TERMS)[-SIMILAR_MAX_TERMS:]
+        columns, weights = columns[strongest], weights[strongest]
+    keep = weights > 0  # too common terms have an IDF of 0
+    columns, weights = columns[keep], weights[keep]
+    norm = np.linalg.norm(weights)
+    return columns, weights / norm if norm else weights
+
+
+def _stack(vectors: list[tuple[np.ndarray, np.ndarray]], width: int) -> sp.csr_matrix:
+    """CSR matrix with one (columns, weights) vector per row."""
+    indptr = np.zeros(len(vectors) + 1, dtype=np.int64)
+    np.cumsum([len(columns) for columns, _ in vectors], out=indptr[1:])
+    return sp.csr_matrix(
+        (
+            np.concatenate([w for _, w in vectors]),
+            np.concatenate([c for c, _ in vectors]),
+            indptr,
+        ),
+        shape=(len(vectors), width),
+    )
+
+
+def _sparse_top_k(
+    scores: sp.csr_matrix, k: int, offset: int, alive: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """The k best positive scores of every row of a block, best first.
+
+    Row i of the block is row offset + i of the index, so that column (its
+    similarity to itself) is skipped, as are rows not `alive`. Each row's
+    nonzeros are packed into a padded dense array and argpartitioned, which
+    is linear in their number. Missing neighbours are row -1, score 0.
+    """
+    block = scores.shape[0]
+    lengths = np.diff(scores.indptr)
+    row = np.repeat(np.arange(block), lengths)
+    position = np.arange(scores.nnz) - scores.indptr[row]
+    width = max(int(lengths.max(initial=0)), k)
+
+    packed = np.zeros((block, width), dtype=np.float32)
+    columns = np.full((block, width), -1, dtype=np.int32)
+    skip = scores.indices == row + offset
+    if alive is not None:
+        skip |= ~alive[scores.indices]
+    packed[row, position] = np.where(skip, 0, scores.data)
+    columns[row, position] = scores.indices
+
+    best = np.argpartition(packed, -k, axis=1)[:, -k:]
+    top = np.take_along_axis(packed, best, axis=1)
+    order = np.argsort(-top, axis=1)
+    best = np.take_along_axis(best, order, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    rows = np.where(top > 0, np.take_along_axis(columns, best, axis=1), -1)
+    return rows.astype(np.int32), np.where(top > 0, top, 0).astype(np.float32)
+
+
+class SimilarIndex:
+    def __init__(self, k: int = SIMILAR_K):
+        self.k = k
+        self.terms = {}  # term -> column
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.documents = 0  # at the last rebuild, for the IDF of new terms
+        # rows [0, main.shape[0]) live in main (CSC, so a term's column is
+        # contiguous); later rows are in delta until the next merge
+        self.main = sp.csc_matrix((0, 0), dtype=np.float32)
+        self.delta = []  # (columns, weights) per row
+        self.ids = []  # row -> startup id, None once removed
+        self.rows = {}  # startup id -> row
+        self.alive = np.zeros(0, dtype=bool)
+        self.neighbour_rows = np.full((0, k), -1, dtype=np.int32)
+        self.neighbour_scores = np.zeros((0, k), dtype=np.float32)
+        self.built = False
+        # edits made while a rebuild runs, replayed onto its result
+        self._log = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, startup_id):
+        return startup_id in self.rows
+
+    # ------------------------------
+    # MAINTENANCE
+    # ------------------------------
+
+    def add(self, startup_id: str, doc: dict):
+        """Index a pitch (replacing any previous version) and rank its neighbours."""
+        self.add_many([(startup_id, doc)])
+
+    def add_many(self, docs: list[tuple[str, dict]]):
+        """add() for several pitches with one sparse product."""
+        docs = list(dict(docs).items())
+        if not docs:
+            return
+        if self._log is not None:
+            self._log.extend(docs)
+        for startup_id, _ in docs:
+            self._remove(startup_id)
+
+        vectors = [self._vector(doc) for _, doc in docs]
+        first = len(self.ids)
+        for startup_id, _ in docs:
+            self._new_row(startup_id)
+        self.delta.extend(vectors)
+
+        scores = self._scores(_stack(vectors, len(self.terms)))
+        stop = first + len(docs)
+        self.neighbour_rows[first:stop], self.neighbour_scores[first:stop] = (
+            _sparse_top_k(scores, self.k, first, self.alive)
+        )
+
+        # each new pitch joins every older list whose worst entry it beats
+        scores = scores.tocoo()
+        others, new, values = scores.col, scores.row + first, scores.data
+        offer = others < first
+        offer[offer] &= self.alive[others[offer]]
+        offer[offer] &= values[offer] > self.neighbour_scores[others[offer], -1]
+        for other, row, score in zip(others[offer], new[offer], values[offer]):
+            self._offer(other, row, score)
+
+        if len(self.delta) >= SIMILAR_DELTA_ROWS:
+            self._merge()
+
+    def remove(self, startup_id: str):
+        if self._log is not None:
+            self._log.append((startup_id, None))
+        self._remove(startup_id)
+
+    def _remove(self, startup_id: str):
+        row = self.rows.pop(startup_id, None)
+        if row is None:
+            return
+        self.ids[row] = None
+        self.alive[row] = False
+        self.neighbour_rows[row] = -1
+        self.neighbour_scores[row] = 0
+
+        size = len(self.ids)
+        for other, position in zip(*np.nonzero(self.neighbour_rows[:size] == row)):
+            for table, empty in (
+                (self.neighbour_rows, -1),
+                (self.neighbour_scores, 0),
+            ):
+                table[other, position:-1] = table[other, position + 1 :]
+                table[other, -1] = empty
+
+    def _vector(self, doc: dict) -> tuple[np.ndarray, np.ndarray]:
+        columns, tf = _count(_term_counts(doc), self.terms)
+        if len(self.terms) > len(self.idf):
+            # terms the last rebuild never saw get the IDF of a term in one pitch
+            new_idf = math.log((1 + self.documents) / 2) + 1
+            self.idf = np.concatenate(
+                [
+                    self.idf,
+                    np.full(len(self.terms) - len(self.idf), new_idf, np.float32),
+                ]
+            )
+        return _weigh(columns, tf, self.idf)
+
+    def _new_row(self, startup_id: str) -> int:
+        row = len(self.ids)
+        if row == len(self.alive):
+            grow = max(row, 1024)
+            self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+            self.neighbour_rows = np.concatenate(
+                [self.neighbour_rows, np.full((grow, self.k), -1, dtype=np.int32)]
+            )
+            self.neighbour_scores = np.concatenate(
+                [self.neighbour_scores, np.zeros((grow, self.k), dtype=np.float32)]
+            )
+        self.ids.append(startup_id)
+        self.rows[startup_id] = row
+        self.alive[row] = True
+        return row
+
+    def _scores(self, vectors: sp.csr_matrix) -> sp.csr_matrix:
+        """Cosine similarity of each vector with every row, main then delta."""
+        parts = [vectors[:, : self.main.shape[1]] @ self.main.T]
+        if self.delta:
+            parts.append(vectors @ _stack(self.delta, len(self.terms)).T)
+        return sp.hstack(parts, format="csr")
+
+    def _offer(self, row: int, candidate: int, score: float):
+        scores = self.neighbour_scores[row]
+        position = int(np.searchsorted(-scores, -score, side="right"))
+        if position == self.k:
+            return  # an earlier offer in the same batch raised the bar
+        for table, value in (
+            (self.neighbour_rows, candidate),
+            (self.neighbour_scores, score),
+        ):
+            table[row, position + 1 :] = table[row, position:-1]
+            table[row, position] = value
+
+    def _merge(self):
+        delta = _stack(self.delta, len(self.terms))
+        main = self.main.copy()
+        main.resize((main.shape[0], len(self.terms)))
+        self.main = sp.vstack([main, delta], format="csc")
+        self.delta = []
+
+    # ------------------------------
+    # QUERYING
+    # ------------------------------
+
+    def similar(
+        self, startup_id: str, limit: int = SIMILAR_K
+    ) -> list[tuple[str, float]]:
+        """(startup_id, cosine similarity) of the closest pitches, best first."""
+        row = self.rows.get(startup_id)
+        if row is None:
+            return []
+        return [
+            (self.ids[other], float(score))
+            for other, score in zip(
+                self.neighbour_rows[row, :limit], self.neighbour_scores[row, :limit]
+            )
+            if other >= 0
+        ]
+
+    # ------------------------------
+    # REBUILDING
+    # ------------------------------
+
+    @classmethod
+    def build(cls, docs: list[tuple[str, dict]], k: int = SIMILAR_K):
+        """A fresh index over (startup_id, doc) pairs, neighbours included."""
+        index = cls(k)
+        index.built = True
+        if not docs:
+            return index
+        # (columns, term frequencies) per pitch, numbering terms as they come
+        terms, counted = {}, []
+        for _, doc in docs:
+            counted.append(_count(_term_counts(doc), terms))
+        n = len(docs)
+        index.terms, index.documents = terms, n
+
+        # too common terms keep a column but an IDF of 0
+        df = np.bincount(np.concatenate([c for c, _ in counted]), minlength=len(terms))
+        index.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        if n >= 100:  # a small catalogue keeps every term
+            index.idf[df > SIMILAR_MAX_DF * n] = 0
+
+        matrix = _stack(
+            [_weigh(columns, tf, index.idf) for columns, tf in counted], len(terms)
+        )
+        del counted
+
+        for startup_id, _ in docs:
+            index._new_row(startup_id)
+        transposed = matrix.T.tocsr()
+        block = max(1, SIMILAR_BLOCK_SCORES // n)
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            rows, top = _sparse_top_k(matrix[start:stop] @ transposed, k, start)
+            index.neighbour_rows[start:stop] = rows
+            index.neighbour_scores[start:stop] = top
+
+        index.main = matrix.tocsc()
+        return index
+
+    async def rebuild(self, collection):
+        """Rebuild from Mongo in a worker thread and swap the result in."""
+        # log from before the scan: it may already have passed an edited pitch
+        self._log = []
+        try:
+            docs = [
+                (str(doc["_id"]), doc)
+                async for doc in collection.find({}, SIMILAR_PROJECTION)
+            ]
+            fresh = await asyncio.to_thread(self.build, docs, self.k)
+            log = self._log
+        finally:
+            self._log = None
+        self.__dict__.update(fresh.__dict__)
+        for startup_id, doc in log:
+            if doc is None:
+                self.remove(startup_id)
+            else:
+                self.add(startup_id, doc)
+        logger.info(
+            "Similarity index rebuilt: %d startups, %d terms, %d edits replayed",
+            len(self.rows),
+            len(self.terms),
+            len(log),
+        )
+
+    async def run_refresh(self, collection, interval=SIMILAR_REFRESH_SECONDS):
+        """Build now, then rebuild every interval seconds."""
+        while True:
+            try:
+                await self.rebuild(collection)
+            except Exception:
+                logger.exception("Similarity index refresh failed")
+            await asyncio.sleep(interval)
+
+
+similar_index = SimilarIndex()
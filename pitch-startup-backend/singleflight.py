@@ -0,0 +1,86 @@
+"""Single-flight: concurrent identical reads share one database call.
+
+The first caller for a key (the leader) starts the call as a task; callers
+arriving while it runs wait on the same task and get the same result, or
+the same exception. Results are shared objects, so callers must not mutate
+them.
+
+Each wait is bounded by the group's timeout (or the one passed to `do`).
+A caller that gives up gets a 504 and the key is released, so the next
+caller starts a fresh call instead of joining a stuck one. A cancelled
+caller (client went away) doesn't cancel the call for the others.
+"""
+
+import asyncio
+import os
+
+from fastapi import HTTPException
+from metrics import Counter
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in (
+    "1",
+    "true",
+)
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", 5))
+
+singleflight_calls = Counter(
+    "singleflight_calls_total",
+    "Reads by outcome: leader (ran the query), collapsed (shared it), timeout",
+    ("group", "outcome"),
+)
+
+
+def _retrieve(task: asyncio.Task):
+    # every waiter may have timed out; don't log "exception never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    def __init__(self, name: str, timeout: float = SINGLEFLIGHT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self.calls = {}  # key -> task
+
+    def forget(self, key):
+        """Make the next caller for key start a new call (e.g. after a write)."""
+        self.calls.pop(key, None)
+
+    async def do(self, key, fn, *args, timeout: float | None = None, **kwargs):
+        """Await fn(*args, **kwargs), sharing the call with concurrent callers."""
+        if not SINGLEFLIGHT_ENABLED:
+            return await fn(*args, **kwargs)
+
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self.calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            singleflight_calls.inc((self.name, "leader"))
+        else:
+            singleflight_calls.inc((self.name, "collapsed"))
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task), self.timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            singleflight_calls.inc((self.name, "timeout"))
+            self._done(key, task)
+            raise HTTPException(
+                status_code=504, detail="Timed out waiting for the database"
+            )
+
+    def _done(self, key, task: asyncio.Task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if task.done():
+            _retrieve(task)
+
+    def __len__(self):
+        return len(self.calls)
+
+
+startup_flight = SingleFlight("startup")
+analytics_flight = SingleFlight("analytics")
+startup_investments_flight = SingleFlight("startup_investments")
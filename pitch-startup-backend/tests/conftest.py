@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+# the modules read their settings at import time
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+os.environ.setdefault("INDEX_PLAN_CHECK", "off")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo():
+    """Bind the database module to an in-memory mongomock_motor client."""
+    pytest.importorskip("mongomock_motor")
+    import database
+    from benchmarks.stand_in import mongomock_client
+
+    database.disconnect()
+    database.connect(mongomock_client())
+    yield database
+    database.disconnect()
+
+
+@pytest.fixture
+def api(mongo):
+    """Run `scenario(client)` against the app, inside its lifespan."""
+    from main import app
+
+    def run(scenario):
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with (
+                app.router.lifespan_context(app),
+                httpx.AsyncClient(transport=transport, base_url="http://test") as c,
+            ):
+                return await scenario(c)
+
+        return asyncio.run(main())
+
+    return run
+
+
+STARTUP = {
+    "title": "Solar kiosks",
+    "description": "Pay-as-you-go solar",
+    "category": "Energy",
+    "pitch": "Kiosks that rent out charged batteries",
+    "funding_goal": 1000,
+}
+
+
+async def sign_in(client, email: str = "ada@example.com") -> dict:
+    """Register and log in a user; returns the Authorization header."""
+    account = {"email": email, "password": "Secret12!"}
+    await client.post("/api/register", json={**account, "full_name": "Ada"})
+    response = await client.post("/api/login", json=account)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def create_startup(client, headers: dict, **fields) -> str:
+    response = await client.post(
+        "/api/startups", json={**STARTUP, **fields}, headers=headers
+    )
+    return response.json()["id"]
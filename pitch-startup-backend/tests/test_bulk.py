@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from bson import ObjectId
+from conftest import STARTUP, create_startup, sign_in
+from singleflight import analytics_flight, startup_flight
+
+
+def test_bulk_create_reports_each_record(api):
+    async def scenario(client):
+        headers = await sign_in(client)
+        records = [STARTUP, {"title": "missing fields"}, {**STARTUP, "title": "Two"}]
+        body = "\n".join(json.dumps(record) for record in records)
+        response = await client.post(
+            "/api/startups/bulk",
+            content=body,
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        search = await client.get("/api/search", params={"q": "two "})
+        return response.json(), search.json()["items"]
+
+    result, hits = api(scenario)
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert [sorted(r) for r in result["results"]] == [
+        ["id", "index"],
+        ["error", "index"],
+        ["id", "index"],
+    ]
+    assert [hit["_id"] for hit in hits] == [result["results"][2]["id"]]
+
+
+def test_bulk_invest_counts_each_key_once(api, mongo):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        startup_id = await create_startup(client, owner)
+        headers = await sign_in(client)
+        records = [
+            {"startup_id": startup_id, "amount": 100, "idempotency_key": "row-1"},
+            {"startup_id": startup_id, "amount": 50},
+            {"startup_id": str(ObjectId()), "amount": 10},
+            {"startup_id": startup_id, "amount": -5},
+        ]
+        first = await client.post(
+            "/api/investments/bulk", json=records, headers=headers
+        )
+        again = await client.post(
+            "/api/investments/bulk", json=records[:1], headers=headers
+        )
+        startup = await mongo.startups_collection.find_one(
+            {"_id": ObjectId(startup_id)}
+        )
+        return first.json(), again.json(), startup
+
+    first, again, startup = api(scenario)
+    assert (first["inserted"], first["failed"]) == (2, 2)
+    assert first["results"][2]["error"] == "Startup not found"
+    assert again["results"][0]["error"] == "Duplicate idempotency key"
+    assert startup["total_funded"] == 150
+    assert startup["funding_stats"]["investment_count"] == 2
+    assert startup["funding_stats"]["investor_count"] == 1
+
+
+def test_bulk_invest_releases_in_flight_reads(api):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        startup_id = await create_startup(client, owner)
+        # reads of the startup that started before the bulk write
+        stale = asyncio.get_running_loop().create_future()
+        for flight in (startup_flight, analytics_flight):
+            flight.calls[startup_id] = stale
+        await client.post(
+            "/api/investments/bulk",
+            json=[{"startup_id": startup_id, "amount": 100}],
+            headers=await sign_in(client),
+        )
+        stale.cancel()
+        return [
+            startup_id in flight.calls for flight in (startup_flight, analytics_flight)
+        ]
+
+    assert api(scenario) == [False, False]
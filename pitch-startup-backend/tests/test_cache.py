@@ -0,0 +1,72 @@
+import time
+
+from cache import MISSING, LRUCache, startup_cache
+from conftest import STARTUP, create_startup, sign_in
+
+
+def test_get_set_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl=10, negative_ttl=2)
+
+    assert cache.get("a") is MISSING
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    cache.set_missing("b")
+    assert cache.get("b") is None
+
+    now[0] += 5
+    assert cache.get("a") == 1
+    assert cache.get("b") is MISSING
+
+    now[0] += 5
+    assert cache.get("a") is MISSING
+    assert cache.stats()["expirations"] == 2
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_zero_size_disables_the_cache():
+    cache = LRUCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+
+
+def test_startup_detail_reads_through_and_follows_writes(api):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        investor = await sign_in(client)
+        startup_id = await create_startup(client, owner)
+        url = f"/api/startups/{startup_id}"
+        before = startup_cache.stats()
+
+        titles = [(await client.get(url)).json()["title"] for _ in range(2)]
+        await client.put(url, json={**STARTUP, "title": "Wind kiosks"}, headers=owner)
+        titles.append((await client.get(url)).json()["title"])
+        await client.post(f"{url}/invest", json={"amount": 40}, headers=investor)
+        funded = (await client.get(url)).json()["total_funded"]
+        await client.delete(url, headers=owner)
+        gone = [(await client.get(url)).status_code for _ in range(2)]
+
+        after = startup_cache.stats()
+        hits = {key: after[key] - before[key] for key in ("hits", "negative_hits")}
+        return titles, funded, gone, hits
+
+    titles, funded, gone, hits = api(scenario)
+    assert titles == ["Solar kiosks", "Solar kiosks", "Wind kiosks"]
+    assert funded == 40
+    assert gone == [404, 404]
+    assert hits["hits"] >= 1
+    assert hits["negative_hits"] >= 2
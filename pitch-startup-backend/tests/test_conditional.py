@@ -0,0 +1,66 @@
+import asyncio
+
+from conditional import CollectionVersion
+from conftest import create_startup, sign_in
+
+
+def test_startup_detail_revalidates(api):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        startup_id = await create_startup(client, owner)
+        url = f"/api/startups/{startup_id}"
+        first = await client.get(url)
+        etag, modified = first.headers["etag"], first.headers["last-modified"]
+
+        statuses = [
+            (await client.get(url, headers=headers)).status_code
+            for headers in [
+                {"If-None-Match": etag},
+                {"If-None-Match": f'"other", W/{etag}'},
+                {"If-None-Match": '"other"'},
+                {"If-Modified-Since": modified},
+                # If-None-Match wins over If-Modified-Since
+                {"If-None-Match": '"other"', "If-Modified-Since": modified},
+            ]
+        ]
+        await client.post(
+            f"{url}/invest", json={"amount": 5}, headers=await sign_in(client)
+        )
+        funded = await client.get(url, headers={"If-None-Match": etag})
+        return statuses, funded.status_code, funded.headers["etag"] != etag
+
+    statuses, funded, changed = api(scenario)
+    assert statuses == [304, 304, 200, 304, 200]
+    assert (funded, changed) == (200, True)
+
+
+def test_list_revalidates_until_a_write(api):
+    async def scenario(client):
+        headers = await sign_in(client)
+        await create_startup(client, headers)
+        etag = (await client.get("/api/startups")).headers["etag"]
+        unchanged = await client.get("/api/startups", headers={"If-None-Match": etag})
+        await create_startup(client, headers, title="Another")
+        changed = await client.get("/api/startups", headers={"If-None-Match": etag})
+        return unchanged.status_code, unchanged.content, changed.status_code
+
+    assert api(scenario) == (304, b"", 200)
+
+
+def test_bumps_reach_other_workers_in_one_flush(mongo):
+    async def main():
+        writer, reader = CollectionVersion("test"), CollectionVersion("test")
+        before = await reader.current()
+        for _ in range(3):
+            writer.bump()
+        # the writer's own lists change before the shared counter does
+        mine = await writer.current()
+        await writer.close()
+        reader.fetched_at = 0  # past COLLECTION_VERSION_TTL
+        doc = await mongo.collection_versions_collection.find_one({"_id": "test"})
+        return before, mine, await writer.current(), await reader.current(), doc
+
+    before, mine, flushed, after, doc = asyncio.run(main())
+    assert mine != before
+    assert flushed == after != before
+    assert doc["version"] == 1
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+from datetime import datetime
+from urllib.parse import quote
+
+from bson import ObjectId
+from exports import export_response, invested_at_range
+
+USER = str(ObjectId())
+STARTUP = str(ObjectId())
+
+
+async def _seed(mongo):
+    await mongo.investments_collection.insert_many(
+        [
+            {
+                "user_id": USER,
+                "startup_id": STARTUP,
+                "amount": amount,
+                "invested_at": datetime(2024, 1, day, 12),
+            }
+            for day, amount in [(3, 30), (1, 10), (2, 20)]
+        ]
+    )
+
+
+def test_ndjson_and_csv_exports(api, mongo):
+    async def scenario(client):
+        await _seed(mongo)
+        ndjson = await client.get(f"/api/users/{USER}/investments/export")
+        table = await client.get(
+            f"/api/startups/{STARTUP}/investments/export",
+            params={"format": "csv", "since": "2024-01-02T00:00:00+00:00"},
+        )
+        return ndjson, table
+
+    ndjson, table = api(scenario)
+
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert ndjson.headers["content-disposition"] == (
+        f'attachment; filename="investments-user-{USER}.ndjson"'
+    )
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [row["amount"] for row in rows] == [10, 20, 30]
+    assert rows[0]["invested_at"].startswith("2024-01-01T12:00:00")
+
+    rows = list(csv.DictReader(io.StringIO(table.text)))
+    assert [row["amount"] for row in rows] == ["20", "30"]
+    assert set(rows[0]) == {"_id", "user_id", "startup_id", "amount", "invested_at"}
+
+
+def test_rejects_bad_ids_and_formats(api):
+    async def scenario(client):
+        return [
+            (
+                await client.get(f"/api/users/{quote(user_id)}/investments/export")
+            ).status_code
+            for user_id in ["日", 'a"b', "not-an-id"]
+        ] + [
+            (
+                await client.get(
+                    f"/api/users/{USER}/investments/export", params={"format": "xml"}
+                )
+            ).status_code
+        ]
+
+    assert api(scenario) == [400, 400, 400, 400]
+
+
+def test_range_mixes_aware_and_naive_bounds():
+    since = datetime.fromisoformat("2024-01-01T10:00:00+02:00")
+    until = datetime(2024, 1, 2)
+    assert invested_at_range(since, until) == {
+        "invested_at": {"$gte": datetime(2024, 1, 1, 8), "$lt": until}
+    }
+
+
+def test_filename_is_sanitized():
+    response = export_response(None, None, {}, "csv", 'investments-a"b日')
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="investments-a_b_.csv"'
+    )
@@ -0,0 +1,18 @@
+import health
+import pytest
+
+
+@pytest.mark.parametrize(
+    "max_pool_size, status, saturation", [(4, 503, 1.25), (0, 200, None)]
+)
+def test_readyz_pool_saturation(api, monkeypatch, max_pool_size, status, saturation):
+    pool = {"connections": 5, "checked_out": 5, "waiting": 2}
+    monkeypatch.setattr(health, "pool_stats", lambda: {"db:27017": dict(pool)})
+    monkeypatch.setattr(health, "MAX_POOL_SIZE", max_pool_size)
+
+    async def scenario(client):
+        return await client.get("/readyz")
+
+    response = api(scenario)
+    assert response.status_code == status
+    assert response.json()["pools"]["db:27017"]["saturation"] == saturation
@@ -0,0 +1,57 @@
+from conftest import create_startup, sign_in
+
+
+def test_retried_invest_counts_once(api, mongo):
+    async def scenario(client):
+        headers = await sign_in(client)
+        startup_id = await create_startup(client, headers)
+        statuses = []
+        for _ in range(3):
+            response = await client.post(
+                f"/api/startups/{startup_id}/invest",
+                json={"amount": 100},
+                headers={**headers, "Idempotency-Key": "retry-1"},
+            )
+            statuses.append(response.status_code)
+        startup = await mongo.startups_collection.find_one()
+        buckets = [
+            doc async for doc in mongo.funding_buckets_collection.find({}, {"_id": 0})
+        ]
+        investments = await mongo.investments_collection.count_documents({})
+        return statuses, startup, buckets, investments
+
+    statuses, startup, buckets, investments = api(scenario)
+    assert all(status < 300 for status in statuses)
+    assert investments == 1
+    assert startup["total_funded"] == 100
+    stats = startup["funding_stats"]
+    assert stats["investment_count"] == 1
+    assert stats["investor_count"] == 1
+    assert len(stats["recent_investments"]) == 1
+    assert {bucket["resolution"] for bucket in buckets} == {"hour", "day"}
+    assert all((b["sum"], b["count"]) == (100, 1) for b in buckets)
+
+
+def test_reused_key_on_another_startup_leaves_it_untouched(api):
+    async def scenario(client):
+        headers = await sign_in(client)
+        first = await create_startup(client, headers)
+        second = await create_startup(client, headers, title="Wind kiosks")
+        retry = {**headers, "Idempotency-Key": "once"}
+
+        await client.post(
+            f"/api/startups/{first}/invest", json={"amount": 50}, headers=retry
+        )
+        reused = await client.post(
+            f"/api/startups/{second}/invest", json={"amount": 50}, headers=retry
+        )
+        await client.post(
+            f"/api/startups/{second}/invest", json={"amount": 20}, headers=headers
+        )
+        analytics = await client.get(f"/api/startups/{second}/analytics")
+        return reused.status_code, analytics.json()
+
+    status, analytics = api(scenario)
+    assert status == 409
+    assert analytics["investment_count"] == 1
+    assert analytics["investor_count"] == 1
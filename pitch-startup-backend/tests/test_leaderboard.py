@@ -0,0 +1,120 @@
+import asyncio
+
+from bson import ObjectId
+from conftest import create_startup, sign_in
+from leaderboard import FundingLeaderboard
+
+
+def test_ranking_overall_and_per_category():
+    board = FundingLeaderboard()
+    board.add("a", "Energy", 100)
+    board.add("b", "Energy", 50)
+    board.add("c", "Agri", 75)
+    board.add("d", "", 10)
+    board.fund("b", 100)
+    board.set_category("c", "Energy")
+
+    assert board.top(2) == [("b", 150), ("a", 100)]
+    assert board.top(10, "Energy") == [("b", 150), ("a", 100), ("c", 75)]
+    assert board.top(10, "Agri") == []
+    # unnamed categories are ranked but not listed
+    assert board.categories() == {"Energy": 3}
+
+    board.remove("b")
+    board.fund("missing", 5)
+    assert board.top(1) == [("a", 100)]
+    assert board.total("b") is None and len(board) == 3
+
+
+def test_rebuild_rereads_startups_touched_during_the_scan(mongo):
+    startups = mongo.startups_collection
+    board = FundingLeaderboard()
+    ids = [ObjectId() for _ in range(3)]
+
+    async def main():
+        await startups.insert_many(
+            [
+                {"_id": oid, "total_funded": total, "category": "Energy"}
+                for oid, total in zip(ids, (10, 20, 30))
+            ]
+        )
+        find = startups.find
+        raced = []
+
+        def racing_find(query, *args, **kwargs):
+            if not raced:
+                # invested in and deleted while the full scan runs; the scan
+                # returns what it read before either write
+                raced.append(True)
+                board.fund(str(ids[0]), 100)
+                board.remove(str(ids[2]))
+                cursor = find(query, *args, **kwargs)
+
+                async def writes():
+                    await startups.update_one(
+                        {"_id": ids[0]}, {"$inc": {"total_funded": 100}}
+                    )
+                    await startups.delete_one({"_id": ids[2]})
+
+                return _AfterScan(cursor, writes)
+            return find(query, *args, **kwargs)
+
+        startups.find = racing_find
+        try:
+            await board.rebuild(startups)
+        finally:
+            del startups.find
+
+    asyncio.run(main())
+    assert board.top() == [(str(ids[0]), 110), (str(ids[1]), 20)]
+
+
+class _AfterScan:
+    """Async iterator over `cursor` that runs `writes` once it is exhausted."""
+
+    def __init__(self, cursor, writes):
+        self.cursor, self.writes = cursor, writes
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.cursor.__anext__()
+        except StopAsyncIteration:
+            await self.writes()
+            raise
+
+
+def test_top_funded_route(api):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        investor = await sign_in(client)
+        ids = [
+            await create_startup(client, owner, category=category)
+            for category in ["Energy", "Energy", "Agri"]
+        ]
+        for startup_id, amount in zip(ids, (30, 70, 50)):
+            await client.post(
+                f"/api/startups/{startup_id}/invest",
+                json={"amount": amount},
+                headers=investor,
+            )
+        overall = (await client.get("/api/startups/top-funded")).json()
+        energy = (
+            await client.get("/api/startups/top-funded", params={"category": "Energy"})
+        ).json()
+        categories = (await client.get("/api/categories")).json()
+        return ids, overall, energy, categories
+
+    ids, overall, energy, categories = api(scenario)
+    assert [(c["_id"], c["total_funded"]) for c in overall] == [
+        (ids[1], 70),
+        (ids[2], 50),
+        (ids[0], 30),
+    ]
+    assert [c["_id"] for c in energy] == [ids[1], ids[0]]
+    assert categories == {
+        "categories": ["Agri", "Energy"],
+        "counts": {"Agri": 1, "Energy": 2},
+    }
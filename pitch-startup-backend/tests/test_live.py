@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+from bson import ObjectId
+from conftest import create_startup, sign_in
+from fastapi import HTTPException
+from live import LiveBus, Subscription, parse_ids
+
+
+def _funding(startup_id, count, total=0):
+    return {
+        "type": "funding",
+        "startup_id": startup_id,
+        "investment_count": count,
+        "total_funded": total,
+    }
+
+
+def test_subscription_coalesces_per_startup():
+    subscription = Subscription({"a", "b", "c"}, max_pending=2)
+    subscription.push(_funding("a", 1, 10))
+    subscription.push({"type": "update", "startup_id": "a", "title": "New"})
+    subscription.push(_funding("a", 2, 30))
+    assert list(subscription.pending.values()) == [
+        {
+            "type": "update",
+            "startup_id": "a",
+            "title": "New",
+            "investment_count": 2,
+            "total_funded": 30,
+        }
+    ]
+
+    subscription.push(_funding("b", 1))
+    subscription.push({"type": "delete", "startup_id": "b"})
+    assert subscription.pending["b"] == {"type": "delete", "startup_id": "b"}
+
+    # past max_pending the oldest startup's event goes
+    subscription.push(_funding("c", 1))
+    assert list(subscription.pending) == ["b", "c"]
+    events = asyncio.run(subscription.next(timeout=0.01))
+    assert [event["startup_id"] for event in events] == ["b", "c"]
+    assert asyncio.run(subscription.next(timeout=0.01)) == []
+
+
+def test_bus_drops_stale_snapshots_and_unsubscribes():
+    bus = LiveBus()
+    subscription = bus.subscribe({"a"})
+    bus.publish(_funding("a", 3, 30))
+    bus.publish(_funding("a", 2, 20))  # read before the newer one, delivered after
+    bus.publish(_funding("b", 9))  # nobody watches b
+    assert list(subscription.pending.values()) == [_funding("a", 3, 30)]
+
+    bus.unsubscribe(subscription)
+    assert not bus.watching("a") and bus.subscribers == 0
+    assert bus.last_count == {}
+
+
+def test_parse_ids():
+    oid = str(ObjectId())
+    assert parse_ids(f"{oid},,{oid}") == [oid]
+    for ids in ["", "nope", ",".join(str(ObjectId()) for _ in range(101))]:
+        with pytest.raises(HTTPException):
+            parse_ids(ids)
+
+
+async def _open_stream(path: str, chunks: list, first: asyncio.Event):
+    """Run an SSE route through the ASGI app until the server ends the stream."""
+    from main import app
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 0),
+        "server": ("test", 80),
+    }
+
+    async def receive():
+        await asyncio.Event().wait()  # the client never hangs up
+
+    async def send(message):
+        if message.get("body"):
+            chunks.append(message["body"].decode())
+            first.set()
+
+    await app(scope, receive, send)
+
+
+def _events(chunks: list[str]) -> list[tuple[str, dict]]:
+    events = []
+    for block in "".join(chunks).split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_follows_a_startup_until_deleted(api):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        investor = await sign_in(client)
+        startup_id = await create_startup(client, owner)
+        chunks, received = [], asyncio.Event()
+        stream = asyncio.create_task(
+            _open_stream(f"/api/startups/{startup_id}/live", chunks, received)
+        )
+
+        async def next_chunk():
+            await asyncio.wait_for(received.wait(), 5)
+            received.clear()
+
+        await next_chunk()
+        await client.post(
+            f"/api/startups/{startup_id}/invest", json={"amount": 25}, headers=investor
+        )
+        await next_chunk()
+        await client.delete(f"/api/startups/{startup_id}", headers=owner)
+        await asyncio.wait_for(stream, 5)
+        missing = await client.get(f"/api/startups/{'0' * 24}/live")
+        return startup_id, _events(chunks), missing.status_code
+
+    startup_id, events, missing = api(scenario)
+    assert [kind for kind, _ in events] == ["snapshot", "funding", "delete"]
+    assert {event["startup_id"] for _, event in events} == {startup_id}
+    assert events[0][1]["total_funded"] == 0
+    assert events[1][1]["total_funded"] == 25
+    assert events[1][1]["investment_count"] == 1
+    assert missing == 404
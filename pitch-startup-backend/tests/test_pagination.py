@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from conftest import create_startup, sign_in
+from fastapi import HTTPException
+from pagination import (
+    MAX_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    paginate,
+)
+
+
+def test_cursor_round_trip_and_garbage():
+    oid = ObjectId()
+    at = datetime(2024, 1, 1, 12)
+    assert decode_cursor(encode_cursor(at, oid)) == [at, oid]
+    for cursor in ["%%%", encode_cursor(), "bm90IGpzb24"]:
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor)
+        assert error.value.status_code == 400
+
+
+def test_cursor_must_match_the_sort():
+    with pytest.raises(HTTPException):
+        keyset_filter({}, "invested_at", encode_cursor(ObjectId()))
+    with pytest.raises(HTTPException):
+        keyset_filter({}, None, encode_cursor(1, 2))
+
+
+def test_clamp_limit():
+    assert clamp_limit(5) == 5
+    assert clamp_limit(0) == clamp_limit(None) == clamp_limit(-1) > 0
+    assert clamp_limit(10**6) == MAX_PAGE_SIZE
+
+
+def test_pages_are_stable_under_inserts(mongo):
+    investments = mongo.investments_collection
+    # ties on the sort key are broken by _id
+    times = [datetime(2024, 1, day) for day in (1, 2, 2, 2, 3, 4, 5)]
+
+    async def main():
+        await investments.insert_many(
+            [{"user_id": "u", "invested_at": at} for at in times]
+        )
+        pages, cursor = [], None
+        while True:
+            docs, cursor = await paginate(
+                investments,
+                {"user_id": "u"},
+                limit=3,
+                cursor=cursor,
+                sort_key="invested_at",
+            )
+            pages.append(docs)
+            # a newer investment arriving mid-listing doesn't shift the pages
+            await investments.insert_one(
+                {"user_id": "u", "invested_at": datetime.now()}
+            )
+            if not cursor:
+                return pages
+
+    pages = asyncio.run(main())
+    assert [len(page) for page in pages] == [3, 3, 1]
+    listed = [(doc["invested_at"], doc["_id"]) for page in pages for doc in page]
+    assert listed == sorted(listed, reverse=True)
+    assert [at for at, _ in listed] == sorted(times, reverse=True)
+
+
+def test_list_routes_follow_cursors(api):
+    async def scenario(client):
+        headers = await sign_in(client)
+        ids = [await create_startup(client, headers, title=f"P{i}") for i in range(5)]
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/api/startups", params=params)).json()
+            seen += [card["_id"] for card in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        bad = [
+            (await client.get(path, params={"cursor": cursor})).status_code
+            for path, cursor in [
+                ("/api/startups", "garbage"),
+                ("/api/startups", encode_cursor("not-an-id")),
+                ("/api/search?q=p0", encode_cursor("high", ObjectId())),
+                ("/api/search?q=p0", encode_cursor(True, ObjectId())),
+            ]
+        ]
+        return ids, seen, bad
+
+    ids, seen, bad = api(scenario)
+    assert seen == ids[::-1]
+    assert bad == [400, 400, 400, 400]
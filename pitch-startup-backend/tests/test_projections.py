@@ -0,0 +1,53 @@
+from conftest import create_startup, sign_in
+from models import StartUpPitchCard
+from projections import CARD_PROJECTION, DETAIL_PROJECTION, projection_for
+
+
+def test_projection_follows_the_model():
+    assert projection_for(StartUpPitchCard) == CARD_PROJECTION
+    assert CARD_PROJECTION["_id"] == 1 and "id" not in CARD_PROJECTION
+    assert "pitch" not in CARD_PROJECTION
+    assert DETAIL_PROJECTION["pitch"] == 1
+
+
+def test_list_routes_never_read_pitch_bodies(api, mongo):
+    async def scenario(client):
+        headers = await sign_in(client)
+        startup_id = await create_startup(client, headers)
+        user_id = (await client.get(f"/api/startups/{startup_id}")).json()["user_id"]
+        investor = await sign_in(client, "bob@example.com")
+        await client.post(
+            f"/api/startups/{startup_id}/invest", json={"amount": 10}, headers=investor
+        )
+
+        projections = []
+        find = mongo.startups_read_collection.find
+
+        def recording_find(query=None, projection=None, *args, **kwargs):
+            projections.append(projection)
+            return find(query, projection, *args, **kwargs)
+
+        mongo.startups_read_collection.find = recording_find
+        try:
+            pages = [
+                (await client.get(path)).json()
+                for path in [
+                    "/api/startups",
+                    f"/api/users/{user_id}/startups",
+                    "/api/search?q=solar",
+                    "/api/startups/trending",
+                ]
+            ]
+        finally:
+            del mongo.startups_read_collection.find
+        return projections, pages
+
+    projections, pages = api(scenario)
+    assert projections and all(p == CARD_PROJECTION for p in projections)
+    cards = [
+        card
+        for page in pages
+        for card in (page["items"] if isinstance(page, dict) else page)
+    ]
+    assert len(cards) == 4
+    assert all("pitch" not in card for card in cards)
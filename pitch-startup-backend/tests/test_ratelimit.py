@@ -0,0 +1,76 @@
+import ipaddress
+
+import pytest
+import ratelimit
+from ratelimit import TokenBucket, client_ip, login_admission
+from starlette.requests import Request
+
+
+def test_bucket_allows_capacity_then_waits():
+    bucket = TokenBucket(capacity=3, period=60, maxsize=10)
+    assert [bucket.take("ip", now=0) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take("ip", now=0) == pytest.approx(20)
+    # one token back every period / capacity seconds
+    assert bucket.take("ip", now=20) == 0
+    assert bucket.take("ip", now=20) > 0
+    assert bucket.take("other", now=20) == 0
+
+
+def test_bucket_drops_least_recently_seen_key():
+    bucket = TokenBucket(capacity=1, period=60, maxsize=2)
+    bucket.take("a", now=0)
+    bucket.take("b", now=0)
+    bucket.take("c", now=0)
+    assert list(bucket.buckets) == ["b", "c"]
+    assert bucket.take("a", now=0) == 0
+
+
+def _request(peer: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_client_ip_trusts_only_listed_proxies(monkeypatch):
+    monkeypatch.setattr(
+        ratelimit, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")]
+    )
+    assert client_ip(_request("203.0.113.5", "1.2.3.4")) == "203.0.113.5"
+    assert client_ip(_request("10.0.0.1", "1.2.3.4")) == "1.2.3.4"
+    # a client can prepend anything; only the hop our proxies saw counts
+    assert client_ip(_request("10.0.0.1", "6.6.6.6, 1.2.3.4, 10.0.0.2")) == "1.2.3.4"
+    assert client_ip(_request("10.0.0.1")) == "10.0.0.1"
+
+
+def test_login_admission(api, monkeypatch):
+    monkeypatch.setattr(
+        ratelimit, "TRUSTED_PROXIES", [ipaddress.ip_network("127.0.0.1/32")]
+    )
+    monkeypatch.setattr(login_admission, "by_ip", TokenBucket(2, 60, 10))
+    monkeypatch.setattr(login_admission, "by_email", TokenBucket(3, 60, 10))
+
+    async def scenario(client):
+        async def login(ip, email="ada@example.com"):
+            response = await client.post(
+                "/api/login",
+                json={"email": email, "password": "Wrong123!"},
+                headers={"X-Forwarded-For": ip},
+            )
+            return response.status_code, response.headers.get("retry-after")
+
+        statuses = [await login("1.1.1.1") for _ in range(3)]
+        # another address gets its own bucket, but the email's is spent
+        statuses += [await login("2.2.2.2"), await login("2.2.2.2")]
+        statuses.append(await login("3.3.3.3", "bob@example.com"))
+        monkeypatch.setattr(ratelimit, "AUTH_MAX_IN_FLIGHT", 0)
+        statuses.append(await login("4.4.4.4", "eve@example.com"))
+        return statuses
+
+    assert api(scenario) == [
+        (400, None),
+        (400, None),
+        (429, "30"),
+        (400, None),
+        (429, "20"),
+        (400, None),
+        (503, "1"),
+    ]
@@ -0,0 +1,21 @@
+import asyncio
+
+
+def test_concurrent_registrations_of_one_email(api, mongo):
+    account = {"email": "ada@example.com", "password": "Secret12!", "full_name": "Ada"}
+
+    async def scenario(client):
+        responses = await asyncio.gather(
+            *(client.post("/api/register", json=account) for _ in range(3))
+        )
+        users = await mongo.users_collection.count_documents({})
+        return (
+            sorted(response.status_code for response in responses),
+            [response.json() for response in responses if response.status_code == 400],
+            users,
+        )
+
+    statuses, errors, users = api(scenario)
+    assert statuses == [200, 400, 400]
+    assert errors == [{"detail": "User already exists"}] * 2
+    assert users == 1
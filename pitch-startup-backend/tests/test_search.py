@@ -0,0 +1,133 @@
+import asyncio
+
+from bson import ObjectId
+from conftest import STARTUP, create_startup, sign_in
+from search import SearchIndex
+
+DOCS = {
+    "a": {"title": "Solar kiosks", "pitch": "solar batteries for rent"},
+    "b": {"title": "Battery recycling", "pitch": "recover lithium from batteries"},
+    "c": {"title": "Farm drones", "pitch": "drones spray crops", "category": "Agri"},
+}
+
+
+def _index():
+    return SearchIndex.build(list(DOCS.items()))
+
+
+def _ids(hits):
+    return [doc_id for doc_id, _ in hits]
+
+
+def test_title_match_outranks_body_match():
+    index = _index()
+    # "batteries" is in both bodies; only b has battery in the title
+    assert _ids(index.search("battery ")) == ["b"]
+    assert _ids(index.search("solar ")) == ["a"]
+    index.add("d", {"title": "Kiosks", "pitch": "solar solar"})
+    assert _ids(index.search("solar ")) == ["a", "d"]
+
+
+def test_all_terms_must_match():
+    index = _index()
+    assert _ids(index.search("batteries lithium ")) == ["b"]
+    assert index.search("batteries drones ") == []
+
+
+def test_last_term_matches_as_prefix_while_typing():
+    index = _index()
+    assert set(_ids(index.search("batt"))) == {"a", "b"}
+    assert index.search("batt ") == []
+
+
+def test_category_filter_and_paging():
+    index = _index()
+    assert _ids(index.search("drones", category="Agri")) == ["c"]
+    assert index.search("drones", category="Energy") == []
+
+    first = index.search("batteries ", limit=1)
+    second = index.search("batteries ", limit=1, after=(first[0][1], first[0][0]))
+    assert len(second) == 1 and second[0][0] != first[0][0]
+
+
+def test_doc_freq_follows_add_and_remove():
+    index = _index()
+    assert index.doc_freq["batteries"] == 2
+    assert index.doc_freq["solar"] == 1
+
+    index.add("a", {"title": "Wind kiosks"})
+    assert index.doc_freq["batteries"] == 1
+    assert "solar" not in index.doc_freq
+    assert "solar" not in index.vocabulary
+    assert "wind" in index.vocabulary
+
+    index.remove("b")
+    assert "batteries" not in index.doc_freq
+    assert index.vocabulary == sorted(index.doc_freq)
+    assert len(index) == 2
+
+
+def test_rebuild_keeps_edits_made_during_the_scan(mongo):
+    startups = mongo.startups_collection
+    index = SearchIndex()
+    ids = {key: ObjectId() for key in DOCS}
+
+    async def main():
+        await startups.insert_many([{"_id": ids[key], **DOCS[key]} for key in DOCS])
+        find = startups.find
+
+        def racing_find(*args, **kwargs):
+            # a pitch created, and one the scan will still read deleted,
+            # while the rebuild runs
+            index.add("new", {"title": "Tidal turbines"})
+            index.remove(str(ids["a"]))
+            return find(*args, **kwargs)
+
+        startups.find = racing_find
+        try:
+            await index.rebuild(startups)
+        finally:
+            del startups.find
+
+    asyncio.run(main())
+    assert _ids(index.search("tidal ")) == ["new"]
+    assert index.search("solar ") == []
+    assert len(index) == 3
+    assert index.vocabulary == sorted(index.doc_freq)
+
+
+def test_search_route_pages_and_follows_edits(api):
+    async def scenario(client):
+        headers = await sign_in(client)
+        ids = [
+            await create_startup(client, headers, title=f"Solar {name}")
+            for name in ["kiosks", "roofs", "boats"]
+        ]
+        pages, cursor = [], None
+        while True:
+            params = {
+                "q": "solar ",
+                "limit": 2,
+                **({"cursor": cursor} if cursor else {}),
+            }
+            page = (await client.get("/api/search", params=params)).json()
+            pages.append([card["_id"] for card in page["items"]])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        await client.put(
+            f"/api/startups/{ids[0]}",
+            json={**STARTUP, "title": "Wind kiosks", "description": "Turbines"},
+            headers=headers,
+        )
+        await client.delete(f"/api/startups/{ids[1]}", headers=headers)
+        after = (await client.get("/api/search", params={"q": "solar "})).json()
+        wind = (await client.get("/api/search", params={"q": "wind"})).json()
+        return ids, pages, after["items"], wind["items"]
+
+    ids, pages, after, wind = api(scenario)
+    assert [len(page) for page in pages] == [2, 1]
+    assert sorted(sum(pages, [])) == sorted(ids)
+    assert [card["_id"] for card in after] == [ids[2]]
+    assert [card["_id"] for card in wind] == [ids[0]]
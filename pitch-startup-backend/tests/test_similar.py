@@ -0,0 +1,119 @@
+import asyncio
+
+from bson import ObjectId
+from conftest import create_startup, sign_in
+from similar import SimilarIndex, similar_index
+
+DOCS = {
+    "solar-kiosk": {"title": "Solar kiosks", "pitch": "solar panels charge batteries"},
+    "solar-roof": {"title": "Solar roofs", "pitch": "solar panels on every roof"},
+    "battery": {"title": "Battery swap", "pitch": "swap charged batteries fast"},
+    "drone": {
+        "title": "Farm drones",
+        "pitch": "drones spray crops",
+        "category": "Agri",
+    },
+    "crop": {
+        "title": "Crop sensors",
+        "pitch": "sensors watch crops",
+        "category": "Agri",
+    },
+}
+
+
+def _ids(neighbours):
+    return [startup_id for startup_id, _ in neighbours]
+
+
+def test_neighbours_rank_by_shared_content():
+    index = SimilarIndex.build(list(DOCS.items()), k=3)
+    neighbours = index.similar("solar-kiosk")
+    assert _ids(neighbours)[:2] == ["solar-roof", "battery"]
+    assert "solar-kiosk" not in _ids(neighbours)
+    scores = [score for _, score in neighbours]
+    assert scores == sorted(scores, reverse=True) and 0 < scores[0] <= 1
+    assert _ids(index.similar("drone"))[0] == "crop"
+    assert index.similar("unknown") == []
+
+
+def test_incremental_edits_match_a_rebuild():
+    index = SimilarIndex.build(
+        [(key, doc) for key, doc in DOCS.items() if key != "crop"], k=3
+    )
+    index.add("crop", DOCS["crop"])
+    assert _ids(index.similar("drone"))[0] == "crop"
+    assert _ids(index.similar("crop"))[0] == "drone"
+
+    # an edit moves a pitch to new neighbours
+    index.add("battery", {"title": "Crop drones", "pitch": "drones watch crops"})
+    assert "battery" not in _ids(index.similar("solar-kiosk"))
+    assert "battery" in _ids(index.similar("drone"))
+
+    index.remove("drone")
+    assert "drone" not in _ids(index.similar("crop"))
+    assert "drone" not in index and index.similar("drone") == []
+
+
+def test_rebuild_keeps_edits_made_during_the_scan(mongo):
+    startups = mongo.startups_collection
+    index = SimilarIndex(k=3)
+    ids = {key: ObjectId() for key in DOCS}
+
+    async def main():
+        await startups.insert_many([{"_id": ids[key], **DOCS[key]} for key in DOCS])
+        find = startups.find
+
+        def racing_find(*args, **kwargs):
+            index.add("new", {"title": "Solar boats", "pitch": "solar panels afloat"})
+            index.remove(str(ids["solar-roof"]))
+            return find(*args, **kwargs)
+
+        startups.find = racing_find
+        try:
+            await index.rebuild(startups)
+        finally:
+            del startups.find
+
+    asyncio.run(main())
+    assert index.built and len(index) == 5
+    assert str(ids["solar-roof"]) not in index
+    assert _ids(index.similar(str(ids["solar-kiosk"])))[0] == "new"
+
+
+def test_similar_route(api, mongo):
+    async def scenario(client):
+        headers = await sign_in(client)
+        await similar_index.rebuild(mongo.startups_collection)
+        ids = {
+            key: await create_startup(
+                client, headers, **{"description": key, "category": "General", **doc}
+            )
+            for key, doc in DOCS.items()
+        }
+        # created through another worker: indexed on first request
+        other = await mongo.startups_collection.insert_one(
+            {
+                **(await mongo.startups_collection.find_one({})),
+                "_id": ObjectId(),
+                "title": "Solar farms",
+                "pitch": "solar panels in fields",
+            }
+        )
+        assert str(other.inserted_id) not in similar_index
+        similar = (
+            await client.get(f"/api/startups/{ids['solar-kiosk']}/similar")
+        ).json()
+        from_other = (
+            await client.get(f"/api/startups/{other.inserted_id}/similar")
+        ).json()
+        errors = [
+            (await client.get(f"/api/startups/{ObjectId()}/similar")).status_code,
+            (await client.get("/api/startups/nope/similar")).status_code,
+        ]
+        return ids, similar, from_other, errors
+
+    ids, similar, from_other, errors = api(scenario)
+    assert [card["_id"] for card in similar][:2] == [ids["solar-roof"], ids["battery"]]
+    assert all("pitch" not in card for card in similar)
+    assert from_other[0]["_id"] in {ids["solar-roof"], ids["solar-kiosk"]}
+    assert errors == [404, 400]
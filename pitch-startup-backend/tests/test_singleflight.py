@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from cache import MISSING, LRUCache, startup_cache
+from conftest import STARTUP, create_startup, sign_in
+from fastapi import HTTPException
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return {"key": key}
+
+    async def main():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("a", load, "a") for _ in range(5)))
+        assert len(flight) == 0
+        await flight.do("a", load, "a")
+        return results
+
+    results = asyncio.run(main())
+    assert calls == ["a", "a"]
+    assert all(result is results[0] for result in results)
+
+
+def test_callers_share_the_exception():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        flight = SingleFlight("test")
+        return await asyncio.gather(
+            flight.do("a", fail), flight.do("a", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_timeout_releases_the_key():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return len(calls)
+
+    async def main():
+        flight = SingleFlight("test", timeout=0.01)
+        with pytest.raises(HTTPException) as error:
+            await flight.do("a", load)
+        assert error.value.status_code == 504
+        assert len(flight) == 0
+        # the next caller starts afresh instead of joining the stuck call
+        return await flight.do("a", load, timeout=1)
+
+    assert asyncio.run(main()) == 2
+
+
+def test_load_that_raced_a_write_is_dropped():
+    cache = LRUCache(maxsize=4, ttl=60)
+    token = cache.token()
+    cache.mark_written("a")
+    cache.set("a", "stale", since=token)
+    assert cache.get("a") is MISSING
+
+    # other keys, and loads started after the write, still fill
+    cache.set("b", "fresh", since=token)
+    cache.set("a", "fresh", since=cache.token())
+    assert cache.get("a") == cache.get("b") == "fresh"
+
+    token = cache.token()
+    cache.invalidate("a")
+    cache.set_missing("a", since=token)
+    assert cache.get("a") is MISSING
+
+
+def test_forgotten_writes_still_block_older_loads():
+    cache = LRUCache(maxsize=1, ttl=60)
+    token = cache.token()
+    cache.mark_written("a")
+    cache.mark_written("b")  # pushes "a" out of the write log
+    cache.set("a", "stale", since=token)
+    assert cache.get("a") is MISSING
+
+
+def test_concurrent_misses_share_one_query(api, mongo):
+    async def scenario(client):
+        startup_id = await create_startup(client, await sign_in(client))
+        startup_cache.invalidate(startup_id)
+        find_one = mongo.startups_collection.find_one
+        queries = []
+
+        async def slow_find_one(*args, **kwargs):
+            queries.append(args)
+            await asyncio.sleep(0.01)
+            return await find_one(*args, **kwargs)
+
+        mongo.startups_collection.find_one = slow_find_one
+        try:
+            responses = await asyncio.gather(
+                *(client.get(f"/api/startups/{startup_id}") for _ in range(5))
+            )
+        finally:
+            del mongo.startups_collection.find_one
+        return [response.status_code for response in responses], len(queries)
+
+    statuses, queries = api(scenario)
+    assert statuses == [200] * 5
+    assert queries == 1
+
+
+def test_load_that_raced_an_edit_does_not_refill_the_cache(api, mongo):
+    async def scenario(client):
+        headers = await sign_in(client)
+        startup_id = await create_startup(client, headers)
+        url = f"/api/startups/{startup_id}"
+        startup_cache.invalidate(startup_id)
+        find_one = mongo.startups_collection.find_one
+        read, edited = asyncio.Event(), asyncio.Event()
+
+        async def stale_find_one(*args, **kwargs):
+            doc = await find_one(*args, **kwargs)
+            read.set()
+            await edited.wait()  # the edit lands before this read returns
+            return doc
+
+        mongo.startups_collection.find_one = stale_find_one
+        load = asyncio.create_task(client.get(url))
+        await read.wait()
+        del mongo.startups_collection.find_one
+        await client.put(url, json={**STARTUP, "title": "Wind kiosks"}, headers=headers)
+        edited.set()
+        await load
+        return (await client.get(url)).json()["title"]
+
+    assert api(scenario) == "Wind kiosks"
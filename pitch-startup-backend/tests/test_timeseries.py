@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from conftest import create_startup, sign_in
+from fastapi import HTTPException
+from timeseries import (
+    TIMESERIES_MAX_POINTS,
+    backfill,
+    read_series,
+    read_series_from_investments,
+    record_buckets,
+    series_range,
+    unrecord_buckets,
+)
+
+STARTUP = str(ObjectId())
+DAY = datetime(2024, 3, 1)
+
+
+def test_series_range_aligns_to_buckets():
+    since, until = series_range(
+        "hour", DAY + timedelta(minutes=30), DAY + timedelta(hours=2, minutes=5)
+    )
+    assert (since, until) == (DAY, DAY + timedelta(hours=3))
+    # offsets are converted to naive UTC
+    since, until = series_range(
+        "day",
+        datetime(2024, 3, 1, 1, tzinfo=timezone(timedelta(hours=2))),
+        DAY + timedelta(days=2),
+    )
+    assert (since, until) == (DAY - timedelta(days=1), DAY + timedelta(days=2))
+
+    for args in [
+        ("week", None, None),
+        ("day", DAY, DAY),
+        ("hour", DAY, DAY + timedelta(hours=TIMESERIES_MAX_POINTS + 1)),
+    ]:
+        with pytest.raises(HTTPException) as error:
+            series_range(*args)
+        assert error.value.status_code == 400
+
+
+def _investments():
+    return [
+        {"startup_id": STARTUP, "amount": amount, "invested_at": DAY + offset}
+        for amount, offset in [
+            (10, timedelta(minutes=5)),
+            (20, timedelta(minutes=50)),
+            (5, timedelta(hours=2)),
+            (40, timedelta(days=1, hours=3)),
+        ]
+    ]
+
+
+def test_buckets_match_the_investments(mongo):
+    buckets = mongo.funding_buckets_collection
+    investments = _investments()
+
+    async def main():
+        await record_buckets(investments)
+        hours = await read_series(
+            buckets, STARTUP, "hour", DAY, DAY + timedelta(hours=4)
+        )
+        days = await read_series(buckets, STARTUP, "day", DAY, DAY + timedelta(days=2))
+        await mongo.investments_collection.insert_many([dict(i) for i in investments])
+        fallback = await read_series_from_investments(
+            mongo.investments_collection, STARTUP, "hour", DAY, DAY + timedelta(hours=4)
+        )
+        await unrecord_buckets(investments[-1:])
+        after_undo = await buckets.count_documents({"startup_id": STARTUP})
+        await backfill()
+        rebuilt = await read_series(
+            buckets, STARTUP, "day", DAY, DAY + timedelta(days=2)
+        )
+        return hours, days, fallback, after_undo, rebuilt
+
+    hours, days, fallback, after_undo, rebuilt = asyncio.run(main())
+    assert [(p["sum"], p["count"]) for p in hours] == [(30, 2), (0, 0), (5, 1), (0, 0)]
+    assert [p["start"] for p in hours] == [DAY + timedelta(hours=h) for h in range(4)]
+    assert [(p["sum"], p["count"]) for p in days] == [(35, 3), (40, 1)]
+    assert fallback == hours
+    # the last investment's hour and day buckets are dropped once empty
+    assert after_undo == 3
+    assert rebuilt == days
+
+
+def test_timeseries_route(api):
+    async def scenario(client):
+        owner = await sign_in(client, "owner@example.com")
+        startup_id = await create_startup(client, owner)
+        url = f"/api/startups/{startup_id}/analytics/timeseries"
+        headers = await sign_in(client)
+        for amount in (15, 25):
+            await client.post(
+                f"/api/startups/{startup_id}/invest",
+                json={"amount": amount},
+                headers=headers,
+            )
+        series = (await client.get(url, params={"resolution": "hour"})).json()
+        errors = [
+            (await client.get(url, params={"resolution": "week"})).status_code,
+            (
+                await client.get(f"/api/startups/{ObjectId()}/analytics/timeseries")
+            ).status_code,
+            (await client.get("/api/startups/nope/analytics/timeseries")).status_code,
+        ]
+        return series, errors
+
+    series, errors = api(scenario)
+    assert len(series["points"]) == 48
+    assert (series["points"][-1]["sum"], series["points"][-1]["count"]) == (40, 2)
+    assert sum(point["count"] for point in series["points"]) == 2
+    assert errors == [400, 404, 400]
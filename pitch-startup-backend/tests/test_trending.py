@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from trending import TrendingEngine
+
+A, B = str(ObjectId()), str(ObjectId())
+
+
+def test_score_halves_every_half_life():
+    engine = TrendingEngine(half_life_hours=1, window_hours=48, count_weight=0)
+    now = datetime.utcnow()
+    engine.add(A, 100, now - timedelta(hours=2))
+    engine.add(B, 100, now)
+
+    scores = dict(engine.top())
+    assert scores[B] == pytest.approx(100, rel=1e-3)
+    assert scores[A] == pytest.approx(25, rel=1e-3)
+    assert [sid for sid, _ in engine.top()] == [B, A]
+
+
+def test_newer_investment_outranks_larger_older_one():
+    engine = TrendingEngine(half_life_hours=1, window_hours=48, count_weight=0)
+    now = datetime.utcnow()
+    engine.add(A, 300, now - timedelta(hours=3))
+    engine.add(B, 100, now)
+    assert engine.top(1)[0][0] == B
+
+
+def test_investments_drop_out_after_the_window():
+    engine = TrendingEngine(half_life_hours=24, window_hours=2, count_weight=0)
+    now = datetime.utcnow()
+    engine.add(A, 100, now - timedelta(hours=1))
+    engine.add(B, 100, now - timedelta(hours=1))
+    engine.add(B, 50, now)
+
+    engine.expire(now + timedelta(hours=2))
+    assert list(engine.scores) == [B]
+    assert dict(engine.top())[B] == pytest.approx(50, rel=0.1)
+
+    engine.expire(now + timedelta(hours=4))
+    assert len(engine) == 0
+    assert engine.ranked == []
+    assert engine.bucket_refs == {}
+
+
+def test_ignores_old_investments_and_invalid_ids():
+    engine = TrendingEngine(window_hours=2)
+    engine.add(A, 100, datetime.utcnow() - timedelta(hours=3))
+    engine.add("not-an-id", 100, datetime.utcnow())
+    assert len(engine) == 0
+
+
+def _investment(startup_id, amount, invested_at):
+    return {
+        "_id": ObjectId(),
+        "startup_id": startup_id,
+        "user_id": "u",
+        "amount": amount,
+        "invested_at": invested_at,
+    }
+
+
+def test_workers_agree_after_refresh(mongo):
+    checkpoints = mongo.trending_checkpoints_collection
+    investments = mongo.investments_collection
+    now = datetime.utcnow()
+
+    async def main():
+        first, second = TrendingEngine(), TrendingEngine()
+        # each worker only saw its own investments
+        for engine, startup_id, hours_ago in [(first, A, 5), (second, B, 3)]:
+            doc = _investment(startup_id, 100, now - timedelta(hours=hours_ago))
+            await investments.insert_one(doc)
+            engine.add(doc["startup_id"], 100, doc["invested_at"], doc["_id"])
+        doc = _investment(B, 50, now)
+        await investments.insert_one(doc)
+        second.add(B, 50, doc["invested_at"], doc["_id"])
+
+        await first.refresh(checkpoints, investments)
+        await second.refresh(checkpoints, investments)
+        return first.top(), second.top(), await checkpoints.count_documents({})
+
+    first, second, hours = asyncio.run(main())
+    assert [sid for sid, _ in first] == [sid for sid, _ in second] == [B, A]
+    for (_, mine), (_, theirs) in zip(first, second):
+        assert mine == pytest.approx(theirs)
+    # every closed hour of the window, written once whichever worker got there
+    assert hours >= 7 * 24 - 1
+
+
+def test_refresh_replays_adds_it_did_not_read(mongo):
+    checkpoints = mongo.trending_checkpoints_collection
+    investments = mongo.investments_collection
+    now = datetime.utcnow()
+    engine = TrendingEngine(count_weight=0)
+    scanned = _investment(A, 100, now)
+
+    async def main():
+        await investments.insert_one(scanned)
+        find = investments.find
+
+        def racing_find(query, *args, **kwargs):
+            if "$lt" not in query["invested_at"]:
+                # invests whose add() lands while the refresh scans: one the
+                # scan reads, one inserted after it went past
+                engine.add(A, 100, now, scanned["_id"])
+                engine.add(A, 30, now, ObjectId())
+            return find(query, *args, **kwargs)
+
+        investments.find = racing_find
+        try:
+            await engine.refresh(checkpoints, investments)
+        finally:
+            del investments.find
+
+    asyncio.run(main())
+    assert dict(engine.top())[A] == pytest.approx(130, rel=1e-3)
+
+
+def test_deleted_startup_stays_out_after_refresh(mongo):
+    checkpoints = mongo.trending_checkpoints_collection
+    investments = mongo.investments_collection
+    engine = TrendingEngine()
+
+    async def main():
+        await investments.insert_one(_investment(A, 100, datetime.utcnow()))
+        engine.remove_startup(A)
+        await engine.refresh(checkpoints, investments)
+
+    asyncio.run(main())
+    assert engine.top() == []
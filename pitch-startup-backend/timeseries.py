@@ -0,0 +1,247 @@
+"""Per-startup funding over time, pre-aggregated into hourly and daily buckets.
+
+Each bucket is one document {startup_id, resolution, start, sum, count}
+(start in UTC, like invested_at). invest and bulk invest $inc the hour and
+the day bucket of every investment, so a chart reads at most
+TIMESERIES_MAX_POINTS small documents instead of scanning investments.
+
+Buckets are written next to the startup rollup but not atomically with it
+unless INVEST_TRANSACTIONS is on. Recompute them from the investments
+collection with:
+
+    python -m timeseries
+
+Like `python -m rollups`, investments recorded while it runs may be
+overwritten by the recomputed totals; run it again if that matters.
+
+Startups whose buckets cover every investment carry BUCKETS_COMPLETE: new
+ones from the start, older ones (from before buckets existed) once that has
+run. Until then their series is computed from the investments.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from database import (
+    connect,
+    disconnect,
+    funding_buckets_collection,
+    investments_collection,
+    startups_collection,
+)
+from exports import naive_utc
+from fastapi import HTTPException
+from pymongo import ASCENDING, DeleteOne, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# range returned when the client sends no `since`
+DEFAULT_SPAN = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+TIMESERIES_MAX_POINTS = int(os.getenv("TIMESERIES_MAX_POINTS", 1000))
+BUCKETS_COMPLETE = "buckets_complete"
+
+
+def bucket_start(when: datetime, resolution: str) -> datetime:
+    if resolution == "hour":
+        return when.replace(minute=0, second=0, microsecond=0)
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_to_buckets(totals: dict, investment: dict):
+    # totals: (startup_id, resolution, start) -> [sum, count]
+    for resolution in RESOLUTIONS:
+        key = (
+            investment["startup_id"],
+            resolution,
+            bucket_start(investment["invested_at"], resolution),
+        )
+        totals[key][0] += investment["amount"]
+        totals[key][1] += 1
+
+
+def _bucket_filter(key: tuple) -> dict:
+    startup_id, resolution, start = key
+    return {"startup_id": startup_id, "resolution": resolution, "start": start}
+
+
+def _bucket_totals(investments: list[dict]) -> dict:
+    totals = defaultdict(lambda: [0, 0])
+    for investment in investments:
+        _add_to_buckets(totals, investment)
+    return totals
+
+
+async def record_buckets(investments: list[dict], session=None):
+    """Add the investments to their hour and day buckets."""
+    await funding_buckets_collection.bulk_write(
+        [
+            UpdateOne(
+                _bucket_filter(key),
+                {"$inc": {"sum": total, "count": count}},
+                upsert=True,
+            )
+            for key, (total, count) in _bucket_totals(investments).items()
+        ],
+        ordered=False,
+        session=session,
+    )
+
+
+async def unrecord_buckets(investments: list[dict]):
+    """Undo record_buckets, dropping buckets that end up empty."""
+    ops = []
+    for key, (total, count) in _bucket_totals(investments).items():
+        ops.append(
+            UpdateOne(_bucket_filter(key), {"$inc": {"sum": -total, "count": -count}})
+        )
+        ops.append(DeleteOne({**_bucket_filter(key), "count": {"$lte": 0}}))
+    await funding_buckets_collection.bulk_write(ops)
+
+
+# ------------------------------
+# READING
+# ------------------------------
+
+
+def series_range(
+    resolution: str, since: datetime | None, until: datetime | None
+) -> tuple[datetime, datetime]:
+    """Bucket-aligned [since, until) for a request, defaulting to the recent past.
+
+    until rounds up, so the bucket holding `until` is included.
+    """
+    step = RESOLUTIONS.get(resolution)
+    if step is None:
+        raise HTTPException(
+            status_code=400, detail="resolution must be one of: hour, day"
+        )
+    # buckets are naive UTC, like invested_at
+    since, until = naive_utc(since), naive_utc(until)
+
+    end = until or datetime.utcnow()
+    until = bucket_start(end, resolution)
+    if until < end:
+        until += step
+    since = bucket_start(since or until - DEFAULT_SPAN[resolution], resolution)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if (until - since) / step > TIMESERIES_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {TIMESERIES_MAX_POINTS} points per request",
+        )
+    return since, until
+
+
+async def read_series(
+    collection, startup_id: str, resolution: str, since: datetime, until: datetime
+) -> list[dict]:
+    """Every bucket in [since, until), oldest first, zeros where nobody invested."""
+    query = {
+        "startup_id": startup_id,
+        "resolution": resolution,
+        "start": {"$gte": since, "$lt": until},
+    }
+    found = {}
+    async for doc in collection.find(
+        query, {"_id": 0, "start": 1, "sum": 1, "count": 1}
+    ):
+        found[doc["start"]] = doc
+    return _fill(found, resolution, since, until)
+
+
+async def read_series_from_investments(
+    investments, startup_id: str, resolution: str, since: datetime, until: datetime
+) -> list[dict]:
+    """read_series for a startup without BUCKETS_COMPLETE: buckets the
+    investments in range on the fly."""
+    query = {"startup_id": startup_id, "invested_at": {"$gte": since, "$lt": until}}
+    found = defaultdict(lambda: {"sum": 0, "count": 0})
+    async for investment in investments.find(
+        query, {"_id": 0, "amount": 1, "invested_at": 1}
+    ):
+        bucket = found[bucket_start(investment["invested_at"], resolution)]
+        bucket["sum"] += investment["amount"]
+        bucket["count"] += 1
+    return _fill(found, resolution, since, until)
+
+
+def _fill(found: dict, resolution: str, since: datetime, until: datetime) -> list[dict]:
+    points, step, start = [], RESOLUTIONS[resolution], since
+    while start < until:
+        doc = found.get(start)
+        points.append(
+            {
+                "start": start,
+                "sum": doc["sum"] if doc else 0,
+                "count": doc["count"] if doc else 0,
+            }
+        )
+        start += step
+    return points
+
+
+# ------------------------------
+# BACKFILL
+# ------------------------------
+
+
+async def backfill(batch_size: int = 500):
+    """Recompute every bucket from the investments collection.
+
+    Streams investments in startup_id order (the startup_id_invested_at_id
+    index) and keeps only the current startup's bucket totals in memory,
+    writing them in bulk_writes of about batch_size.
+    """
+    ops, totals = [], defaultdict(lambda: [0, 0])
+    current, startups, buckets = None, 0, 0
+
+    cursor = investments_collection.find(
+        {}, {"_id": 0, "startup_id": 1, "amount": 1, "invested_at": 1}
+    ).sort("startup_id", ASCENDING)
+    async for investment in cursor.batch_size(batch_size):
+        if investment["startup_id"] != current:
+            ops.extend(_set_buckets(totals))
+            buckets += len(totals)
+            startups += current is not None
+            current, totals = investment["startup_id"], defaultdict(lambda: [0, 0])
+            if len(ops) >= batch_size:
+                await funding_buckets_collection.bulk_write(ops, ordered=False)
+                ops = []
+        _add_to_buckets(totals, investment)
+
+    ops.extend(_set_buckets(totals))
+    buckets += len(totals)
+    startups += current is not None
+    if ops:
+        await funding_buckets_collection.bulk_write(ops, ordered=False)
+    await startups_collection.update_many({}, {"$set": {BUCKETS_COMPLETE: True}})
+    logger.info("Backfilled %d funding buckets for %d startups", buckets, startups)
+
+
+def _set_buckets(totals: dict) -> list[UpdateOne]:
+    return [
+        UpdateOne(
+            _bucket_filter(key),
+            {"$set": {"sum": total, "count": count}},
+            upsert=True,
+        )
+        for key, (total, count) in totals.items()
+    ]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        connect()
+        try:
+            await backfill()
+        finally:
+            disconnect()
+
+    asyncio.run(main())
@@ -0,0 +1,269 @@
+"""Time-decayed trending scores for startups, maintained as investments arrive.
+
+Each investment adds (amount + TRENDING_COUNT_WEIGHT) to its startup's
+score, decaying with a half-life of TRENDING_HALF_LIFE_HOURS, and drops out
+entirely once it is older than TRENDING_WINDOW_HOURS.
+
+Scores are kept relative to a fixed reference time t0, i.e. as
+sum(weight * exp(rate * (invested_at - t0))). Decay multiplies every score by
+the same factor, so it never changes the ranking: only new investments and
+window expiry do. That keeps a sorted (score, startup_id) list valid between
+updates and makes top-K a slice.
+
+Contributions are also bucketed by hour so expiry can subtract them exactly.
+Each hour is checkpointed to Mongo once it has closed, computed from the
+investments themselves, so the document is the same whichever worker writes
+it. Every TRENDING_REFRESH_SECONDS (and at startup) a worker reloads the
+checkpoints and replays the investments made since the last one, which is
+how investments made through other workers reach its ranking.
+"""
+
+import asyncio
+import logging
+import math
+import copy
+import os
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+TRENDING_WINDOW_HOURS = int(os.getenv("TRENDING_WINDOW_HOURS", 7 * 24))
+# an investment counts as if it were this much extra money
+TRENDING_COUNT_WEIGHT = float(os.getenv("TRENDING_COUNT_WEIGHT", 100))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", 300))
+# an hour is checkpointed this long after it ends: investments carry the time
+# the server received them and can be inserted a little later
+TRENDING_CHECKPOINT_LAG_SECONDS = int(os.getenv("TRENDING_CHECKPOINT_LAG_SECONDS", 300))
+
+HOUR = timedelta(hours=1)
+INVESTMENT_PROJECTION = {"startup_id": 1, "amount": 1, "invested_at": 1}
+
+# rebase t0 before exp() gets anywhere near float overflow
+_MAX_EXPONENT = 500
+
+
+def _hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class TrendingEngine:
+    def __init__(
+        self,
+        half_life_hours: float = TRENDING_HALF_LIFE_HOURS,
+        window_hours: int = TRENDING_WINDOW_HOURS,
+        count_weight: float = TRENDING_COUNT_WEIGHT,
+    ):
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.window = timedelta(hours=window_hours)
+        self.count_weight = count_weight
+        # startups deleted through this worker; their investments remain
+        self.removed = set()
+        self._reset()
+
+    def _reset(self):
+        self.t0 = _hour(datetime.utcnow())
+        # startup_id -> score relative to t0
+        self.scores = {}
+        # ascending (score, startup_id); the top-K is the tail
+        self.ranked = []
+        # hour -> {startup_id: contribution relative to that hour}
+        self.buckets = {}
+        # startup_id -> number of buckets it has contributions in
+        self.bucket_refs = {}
+        # investments added while a refresh runs, replayed onto its result
+        self._log = None
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _factor(self, ts: datetime) -> float:
+        return math.exp(self.rate * (ts - self.t0).total_seconds())
+
+    def _set_score(self, startup_id: str, score: float | None):
+        """Move a startup within the ranking; None drops it."""
+        old = self.scores.pop(startup_id, None)
+        if old is not None:
+            del self.ranked[bisect_left(self.ranked, (old, startup_id))]
+        if score is not None:
+            self.scores[startup_id] = score
+            insort(self.ranked, (score, startup_id))
+
+    def _maybe_rebase(self, ts: datetime):
+        if self.rate * (ts - self.t0).total_seconds() <= _MAX_EXPONENT:
+            return
+        new_t0 = _hour(ts)
+        scale = 1 / self._factor(new_t0)
+        self.t0 = new_t0
+        self.scores = {sid: score * scale for sid, score in self.scores.items()}
+        self.ranked = sorted((score, sid) for sid, score in self.scores.items())
+
+    def _contribute(self, hour: datetime, startup_id: str, local: float):
+        bucket = self.buckets.setdefault(hour, {})
+        if startup_id not in bucket:
+            bucket[startup_id] = 0
+            self.bucket_refs[startup_id] = self.bucket_refs.get(startup_id, 0) + 1
+        bucket[startup_id] += local
+        score = self.scores.get(startup_id, 0) + local * self._factor(hour)
+        self._set_score(startup_id, score)
+
+    # ------------------------------
+    # UPDATES
+    # ------------------------------
+
+    def _local(self, amount: float, invested_at: datetime, hour: datetime) -> float:
+        weight = amount + self.count_weight
+        return weight * math.exp(self.rate * (invested_at - hour).total_seconds())
+
+    def add(
+        self, startup_id: str, amount: float, invested_at: datetime, investment_id=None
+    ):
+        """Fold one investment into the scores."""
+        if self._log is not None:
+            self._log.append((investment_id, startup_id, amount, invested_at))
+        # invest used to record the investment before validating the id
+        if not ObjectId.is_valid(startup_id):
+            return
+        if invested_at < datetime.utcnow() - self.window:
+            return
+        self._maybe_rebase(invested_at)
+
+        hour = _hour(invested_at)
+        self._contribute(hour, startup_id, self._local(amount, invested_at, hour))
+
+    def remove_startup(self, startup_id: str):
+        self.removed.add(startup_id)
+        self._set_score(startup_id, None)
+        self.bucket_refs.pop(startup_id, None)
+        for bucket in self.buckets.values():
+            bucket.pop(startup_id, None)
+
+    def expire(self, now: datetime | None = None):
+        """Subtract every hourly bucket that slid out of the window."""
+        cutoff = _hour((now or datetime.utcnow()) - self.window)
+        for hour in sorted(h for h in self.buckets if h < cutoff):
+            factor = self._factor(hour)
+            for startup_id, local in self.buckets.pop(hour).items():
+                self.bucket_refs[startup_id] -= 1
+                if self.bucket_refs[startup_id] == 0:
+                    # exact zero instead of a float residue
+                    del self.bucket_refs[startup_id]
+                    self._set_score(startup_id, None)
+                else:
+                    score = self.scores[startup_id] - local * factor
+                    self._set_score(startup_id, score)
+
+    # ------------------------------
+    # READS
+    # ------------------------------
+
+    def top(self, k: int = 10) -> list[tuple[str, float]]:
+        """(startup_id, current decayed score) for the k hottest startups."""
+        now = datetime.utcnow()
+        self.expire(now)
+        self._maybe_rebase(now)
+        now_factor = self._factor(now)
+        return [(sid, score / now_factor) for score, sid in reversed(self.ranked[-k:])]
+
+    # ------------------------------
+    # PERSISTENCE
+    # ------------------------------
+
+    def load_buckets(self, docs: list[dict]):
+        for doc in docs:
+            for startup_id, local in doc["contributions"].items():
+                if ObjectId.is_valid(startup_id):
+                    self._contribute(doc["_id"], startup_id, local)
+
+    async def _contributions(self, investments, hour: datetime) -> dict[str, float]:
+        """startup_id -> contribution relative to `hour`, for that hour's investments."""
+        contributions = {}
+        async for inv in investments.find(
+            {"invested_at": {"$gte": hour, "$lt": hour + HOUR}}, INVESTMENT_PROJECTION
+        ):
+            startup_id = inv["startup_id"]
+            if ObjectId.is_valid(startup_id):
+                local = self._local(inv.get("amount", 0), inv["invested_at"], hour)
+                contributions[startup_id] = contributions.get(startup_id, 0) + local
+        return contributions
+
+    async def checkpoint(self, checkpoints, investments):
+        """Checkpoint every closed hour in the window that doesn't have one yet."""
+        now = datetime.utcnow()
+        start = _hour(now - self.window)
+        closed = _hour(now - timedelta(seconds=TRENDING_CHECKPOINT_LAG_SECONDS))
+        # documents without `complete` predate per-hour checkpoints; redo them
+        done = {
+            doc["_id"]
+            async for doc in checkpoints.find(
+                {"_id": {"$gte": start}, "complete": True}, {"_id": 1}
+            )
+        }
+        hour = start
+        while hour < closed:
+            if hour not in done:
+                contributions = await self._contributions(investments, hour)
+                await checkpoints.replace_one(
+                    {"_id": hour},
+                    {"contributions": contributions, "complete": True},
+                    upsert=True,
+                )
+            hour += HOUR
+        await checkpoints.delete_many({"_id": {"$lt": start}})
+
+    async def refresh(self, checkpoints, investments):
+        """Rebuild the scores from the checkpoints plus the investments since."""
+        await self.checkpoint(checkpoints, investments)
+        start = _hour(datetime.utcnow() - self.window)
+        # log from before the reads: the scan may already have passed an
+        # investment whose add() is still to come
+        self._log = []
+        try:
+            docs = await checkpoints.find(
+                {"_id": {"$gte": start}, "complete": True}
+            ).to_list(None)
+            hours = {doc["_id"] for doc in docs}
+            since = start
+            while since in hours:
+                since += HOUR
+
+            fresh = copy.copy(self)
+            fresh._reset()
+            fresh.load_buckets([doc for doc in docs if doc["_id"] < since])
+            seen = set()
+            async for inv in investments.find(
+                {"invested_at": {"$gte": since}}, INVESTMENT_PROJECTION
+            ):
+                seen.add(inv["_id"])
+                fresh.add(inv["startup_id"], inv.get("amount", 0), inv["invested_at"])
+            log = self._log
+        finally:
+            self._log = None
+
+        for investment_id, startup_id, amount, invested_at in log:
+            if investment_id is None or investment_id not in seen:
+                fresh.add(startup_id, amount, invested_at)
+        for startup_id in self.removed:
+            fresh.remove_startup(startup_id)
+        self.__dict__.update(fresh.__dict__)
+        logger.info(
+            "Trending refreshed: %d checkpointed hours, %d investments replayed",
+            sum(doc["_id"] < since for doc in docs),
+            len(seen),
+        )
+
+    async def run_refresh(
+        self, checkpoints, investments, interval=TRENDING_REFRESH_SECONDS
+    ):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh(checkpoints, investments)
+            except Exception:
+                logger.exception("Trending refresh failed")
+
+
+trending = TrendingEngine()